@@ -0,0 +1,215 @@
+"""
+API benchmark suite: seeds a dataset and drives the main endpoints
+in-process through the Django test client.
+
+    python -m benchmarks.api --users 1000 --recipes-per-user 1000 --output before.json
+    python -m benchmarks.api --users 1000 --recipes-per-user 1000 --compare before.json
+
+For every endpoint the report records latency percentiles, the number of
+SQL queries per request and the peak memory allocated while serving one
+request (measured in a separate tracemalloc pass, so tracing does not skew
+the latencies). Each endpoint is warmed up first; caches are cleared
+before the warm-up, so cached endpoints are measured warm.
+
+The JSON report includes the commit, interpreter and database it was taken
+on; pass a previous report to --compare to print the relative change.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from benchmarks import datasets
+from benchmarks.utils import Timer, setup_django, test_database
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+@dataclass
+class Endpoint:
+    name: str
+    method: str
+    paths: list
+    headers: dict
+    data: list = None
+    requests: int = None
+
+    def request(self, client, i):
+        path = self.paths[i % len(self.paths)]
+        if self.method == "POST":
+            return client.post(path, self.data[i % len(self.data)], content_type="application/json")
+        return client.get(path, headers=self.headers)
+
+
+def endpoints(staff, members, args):
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from recipe.models import Recipe
+
+    def auth(user):
+        return {"authorization": f"Bearer {RefreshToken.for_user(user).access_token}"}
+
+    member = members[0]
+    pks = Recipe.objects.filter(owner=member).order_by("-created_at").values_list("pk", flat=True)[:args.requests]
+    logins = [{"email": datasets.user_email(i), "password": datasets.PASSWORD} for i in range(len(members))]
+    return [
+        Endpoint("recipe-list", "GET", ["/api/recipes/"], auth(member)),
+        Endpoint("recipe-list-staff", "GET", ["/api/recipes/"], auth(staff)),
+        Endpoint("recipe-detail", "GET", [f"/api/recipes/{pk}/" for pk in pks], auth(member)),
+        Endpoint("token", "POST", ["/api/token/"], {}, data=logins, requests=args.logins),
+        Endpoint("users", "GET", ["/api/users/"], auth(staff)),
+    ]
+
+
+def summarize(values, scale=1):
+    values = sorted(value * scale for value in values)
+    summary = {"min": values[0], "mean": statistics.fmean(values), "max": values[-1]}
+    for percentile in PERCENTILES:
+        # Nearest-rank percentile, so small samples report an observed value
+        summary[f"p{percentile}"] = values[max(0, -(-len(values) * percentile // 100) - 1)]
+    return {key: round(value, 3) for key, value in summary.items()}
+
+
+def run(client, endpoint, requests, warmup):
+    from django.core.cache import caches
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    for alias in caches:
+        caches[alias].clear()
+    for i in range(warmup):
+        endpoint.request(client, i)
+
+    latencies, queries = [], []
+    for i in range(requests):
+        with CaptureQueriesContext(connection) as captured, Timer() as timer:
+            response = endpoint.request(client, i)
+        assert response.status_code == 200, (endpoint.name, response.status_code, response.content[:200])
+        latencies.append(timer.elapsed)
+        queries.append(len(captured))
+
+    peaks = []
+    for i in range(min(requests, 5)):
+        tracemalloc.start()
+        try:
+            endpoint.request(client, i)
+            peaks.append(tracemalloc.get_traced_memory()[1])
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "method": endpoint.method,
+        "path": endpoint.paths[0],
+        "requests": requests,
+        "response_bytes": len(response.content),
+        "latency_ms": summarize(latencies, 1000),
+        "queries": summarize(queries),
+        "peak_memory_kb": round(max(peaks) / 1024, 1),
+    }
+
+
+def metadata():
+    import django
+    from django.db import connection
+
+    def git(*args):
+        try:
+            return subprocess.run(
+                ["git", *args], capture_output=True, text=True, check=True, cwd=os.path.dirname(__file__)
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
+
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "django": django.get_version(),
+        "database": connection.vendor,
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def print_report(report, baseline=None):
+    def change(name, section, key):
+        if baseline is None or name not in baseline["endpoints"]:
+            return ""
+        before = baseline["endpoints"][name][section][key] if key else baseline["endpoints"][name][section]
+        after = report["endpoints"][name][section][key] if key else report["endpoints"][name][section]
+        return f"({(after - before) / before:+.0%})" if before else ""
+
+    dataset = report["dataset"]
+    print(f"{dataset['users']} users x {dataset['recipes_per_user']} recipes on {report['meta']['database']}, "
+          f"seeded in {dataset['seconds']:.1f}s")
+    if baseline is not None:
+        print(f"compared with {baseline['meta']['commit']} ({baseline['meta']['created_at']})")
+    print(f"{'endpoint':<18} {'p50 ms':>16} {'p99 ms':>16} {'queries':>14} {'peak KB':>18}")
+    for name, result in report["endpoints"].items():
+        print(
+            f"{name:<18} "
+            f"{result['latency_ms']['p50']:8.2f}{change(name, 'latency_ms', 'p50'):>8} "
+            f"{result['latency_ms']['p99']:8.2f}{change(name, 'latency_ms', 'p99'):>8} "
+            f"{result['queries']['max']:6g}{change(name, 'queries', 'max'):>8} "
+            f"{result['peak_memory_kb']:10.1f}{change(name, 'peak_memory_kb', None):>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--recipes-per-user", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--requests", type=int, default=200, help="timed requests per endpoint")
+    parser.add_argument("--logins", type=int, default=20, help="timed requests for /api/token/ (password hashing)")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--only", nargs="+", metavar="ENDPOINT", help="run only these endpoints")
+    parser.add_argument("--output", default="benchmark-report.json")
+    parser.add_argument("--compare", metavar="REPORT", help="a previous report to compare against")
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test import Client
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+
+    with test_database():
+        with Timer() as timer:
+            staff, members = datasets.seed(args.users, args.recipes_per_user, args.seed)
+        report = {
+            "meta": metadata(),
+            "dataset": {
+                "users": args.users,
+                "recipes_per_user": args.recipes_per_user,
+                "seed": args.seed,
+                "seconds": round(timer.elapsed, 3),
+            },
+            "endpoints": {},
+        }
+        client = Client()
+        for endpoint in endpoints(staff, members, args):
+            if args.only and endpoint.name not in args.only:
+                continue
+            requests = endpoint.requests or args.requests
+            started = time.perf_counter()
+            report["endpoints"][endpoint.name] = run(client, endpoint, requests, args.warmup)
+            print(f"  {endpoint.name}: {requests} requests in {time.perf_counter() - started:.1f}s")
+
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+        file.write("\n")
+    print_report(report, baseline)
+    print(f"report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Load test of the recipe endpoints through the ASGI handler, comparing the
+sync DRF views with the native async views.
+
+    python -m benchmarks.async_views --requests 2000 --concurrency 100
+
+Each simulated client alternates between the recipe list and a recipe
+detail. Sync views are run by Django's thread-sensitive executor, so every
+in-flight request holds a thread; async views only leave the event loop for
+the queries themselves. Reported per mode: throughput, latency percentiles
+and the peak number of live threads.
+"""
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+
+from benchmarks.utils import Timer, setup_django, test_database
+
+
+async def drive(client, urls, headers, requests, concurrency):
+    latencies = []
+    peak_threads = threading.active_count()
+
+    async def worker(offset, count):
+        nonlocal peak_threads
+        for i in range(count):
+            url = urls[(offset + i) % len(urls)]
+            started = time.perf_counter()
+            response = await client.get(url, headers=headers)
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.content
+            peak_threads = max(peak_threads, threading.active_count())
+
+    share, extra = divmod(requests, concurrency)
+    await asyncio.gather(*(worker(i, share + (i < extra)) for i in range(concurrency)))
+    return latencies, peak_threads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--recipes", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.core.cache import caches
+    from django.test import AsyncClient, override_settings
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from recipe import cache as recipe_cache
+    from recipe.models import Recipe
+    from users.models import CustomUser
+
+    with test_database():
+        user = CustomUser.objects.create_user(email="bench@example.com", name="Bench", password="benchmark")
+        recipes = Recipe.objects.bulk_create([
+            Recipe(
+                name=f"Recipe {i}",
+                instructions="Mix well",
+                ingredients="flour, eggs, milk",
+                number_of_servings=2,
+                main_image="https://picsum.photos/seed/picsum/200/300",
+                preparation_time="00:20:00",
+                owner=user,
+            )
+            for i in range(args.recipes)
+        ])
+        urls = [url for recipe in recipes for url in ("/api/recipes/", f"/api/recipes/{recipe.pk}/")]
+        headers = {"authorization": f"Bearer {RefreshToken.for_user(user).access_token}"}
+        client = AsyncClient()
+
+        results = []
+        for name, urlconf in (("sync views", settings.ROOT_URLCONF), ("async views", settings.ASGI_ROOT_URLCONF)):
+            caches[recipe_cache.CACHE_ALIAS].clear()
+            with override_settings(ASGI_ROOT_URLCONF=urlconf):
+                with Timer() as timer:
+                    latencies, peak_threads = asyncio.run(
+                        drive(client, urls, headers, args.requests, args.concurrency)
+                    )
+            results.append((name, timer.elapsed, sorted(latencies), peak_threads))
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}")
+    print(f"{'mode':<12} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'threads':>8}")
+    for name, elapsed, latencies, peak_threads in results:
+        p50 = statistics.median(latencies) * 1000
+        p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+        print(f"{name:<12} {args.requests / elapsed:8.1f} {p50:8.1f} {p99:8.1f} {peak_threads:8d}")
+
+
+if __name__ == "__main__":
+    main()
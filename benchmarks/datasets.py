@@ -0,0 +1,66 @@
+"""
+Seeded datasets for the benchmarks. The same arguments always produce the
+same rows (apart from primary keys and timestamps), so reports taken on
+different commits measure the same workload.
+"""
+import random
+from datetime import timedelta
+
+PASSWORD = "benchmark-password"
+STAFF_EMAIL = "staff@example.com"
+
+WORDS = (
+    "apple", "basil", "butter", "carrot", "chili", "cinnamon", "garlic", "ginger",
+    "honey", "lemon", "lentil", "mushroom", "onion", "pepper", "potato", "rice",
+    "saffron", "spinach", "tomato", "vanilla",
+)
+
+
+def user_email(index):
+    return f"user{index}@example.com"
+
+
+def seed(users=1000, recipes_per_user=1000, seed=0, batch_size=2000):
+    """
+    Create ``users`` regular users with ``recipes_per_user`` recipes each,
+    plus one staff user. Every user's password is ``PASSWORD``; it is hashed
+    once and shared, since hashing is what ``/api/token/`` measures, not
+    seeding. Returns ``(staff, users)``.
+    """
+    from django.contrib.auth.hashers import make_password
+    from django.utils import timezone
+
+    from recipe.models import Recipe, preparation_seconds
+    from users.models import CustomUser
+
+    rng = random.Random(seed)
+    password = make_password(PASSWORD)
+    staff = CustomUser(email=STAFF_EMAIL, name="Staff", password=password, is_staff=True)
+    members = [CustomUser(email=user_email(i), name=f"User {i}", password=password) for i in range(users)]
+    CustomUser.objects.bulk_create([staff, *members], batch_size=batch_size)
+
+    now = timezone.now()
+    batch = []
+    for owner in members:
+        for i in range(recipes_per_user):
+            ingredients = rng.sample(WORDS, rng.randint(3, 8))
+            preparation_time = f"{rng.randint(0, 2):02d}:{rng.randrange(0, 60, 5):02d}:00"
+            batch.append(Recipe(
+                name=f"{ingredients[0].title()} {ingredients[1]} {i}",
+                instructions=" ".join(rng.choice(WORDS) for _ in range(rng.randint(20, 120))),
+                ingredients=", ".join(ingredients),
+                number_of_servings=rng.randint(1, 12),
+                main_image="https://picsum.photos/seed/picsum/200/300",
+                preparation_time=preparation_time,
+                # bulk_create skips Recipe.save(), which fills these in
+                preparation_seconds=preparation_seconds(preparation_time),
+                ingredient_count=len(ingredients),
+                created_at=now - timedelta(seconds=len(batch)),
+                owner=owner,
+            ))
+            if len(batch) >= batch_size:
+                Recipe.objects.bulk_create(batch)
+                now -= timedelta(seconds=len(batch))
+                batch = []
+    Recipe.objects.bulk_create(batch)
+    return staff, members
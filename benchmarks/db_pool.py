@@ -0,0 +1,93 @@
+"""
+Requests per second of the recipe detail endpoint with and without the
+connection pool. Needs the PostgreSQL backend:
+
+    DB_HOST=localhost python -m benchmarks.db_pool --requests 2000 --threads 8
+
+Every request ends the way it does under a real server with
+CONN_MAX_AGE = 0: the thread's connection is closed. Without the pool that
+closes the TCP connection and the next request pays a fresh connect and
+authentication; with it the connection goes back to the pool.
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.utils import Timer, setup_django, test_database
+
+
+def drive(urls, headers, requests, threads):
+    from django.db import connections
+    from django.test import Client
+
+    def worker(offset, count):
+        client = Client()
+        for i in range(count):
+            response = client.get(urls[(offset + i) % len(urls)], headers=headers)
+            assert response.status_code == 200, response.content
+            # The test client leaves connections open; a server closes them
+            connections.close_all()
+
+    share, extra = divmod(requests, threads)
+    with ThreadPoolExecutor(threads) as executor:
+        for future in [executor.submit(worker, i, share + (i < extra)) for i in range(threads)]:
+            future.result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--recipes", type=int, default=100)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.db import connection
+    from rest_framework_simplejwt.tokens import RefreshToken
+
+    from recipe.models import Recipe
+    from users.models import CustomUser
+
+    if connection.vendor != "postgresql":
+        parser.error("point DB_HOST at PostgreSQL")
+
+    pool_options = settings.DATABASES["default"]["OPTIONS"].get("pool") or {"max_size": args.threads}
+    with test_database():
+        user = CustomUser.objects.create_user(email="bench@example.com", name="Bench", password="benchmark")
+        recipes = Recipe.objects.bulk_create([
+            Recipe(
+                name=f"Recipe {i}",
+                instructions="Mix well",
+                ingredients="flour, eggs, milk",
+                number_of_servings=2,
+                main_image="https://picsum.photos/seed/picsum/200/300",
+                preparation_time="00:20:00",
+                owner=user,
+            )
+            for i in range(args.recipes)
+        ])
+        # Sparse reads skip the recipe cache, so every request queries
+        urls = [f"/api/recipes/{recipe.pk}/?fields=name,instructions" for recipe in recipes]
+        headers = {"authorization": f"Bearer {RefreshToken.for_user(user).access_token}"}
+
+        results = []
+        for name, pool in (("no pool", None), ("pool", pool_options)):
+            # Every thread reads the settings dict shared by the connection handler
+            connection.close()
+            connection.close_pool()
+            connection.settings_dict["OPTIONS"]["pool"] = pool
+            drive(urls, headers, args.threads, args.threads)
+            with Timer() as timer:
+                drive(urls, headers, args.requests, args.threads)
+            results.append((name, timer.elapsed))
+        connection.close_pool()
+
+    print(f"{args.requests} recipe detail requests, {args.threads} threads, "
+          f"pool size {pool_options['max_size']}")
+    baseline = results[0][1]
+    for name, elapsed in results:
+        print(f"{name:<10} {args.requests / elapsed:8.1f} req/s {baseline / elapsed:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
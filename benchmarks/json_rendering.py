@@ -0,0 +1,76 @@
+"""
+DRF's JSONRenderer vs FastJSONRenderer on a large page of recipes.
+
+    python -m benchmarks.json_rendering --recipes 10000
+"""
+import argparse
+import tracemalloc
+import uuid
+from unittest import mock
+
+from benchmarks.utils import Timer, setup_django
+
+
+def measure(render, repeat):
+    timings = []
+    for _ in range(repeat):
+        with Timer() as timer:
+            render()
+        timings.append(timer.elapsed)
+    tracemalloc.start()
+    render()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(timings), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+
+    from cooky_recipe_apis import renderers
+
+    owner = uuid.uuid4()
+    page = {
+        "next": "http://testserver/api/recipes/?cursor=abc",
+        "previous": None,
+        "results": [
+            {
+                "id": uuid.uuid4(),
+                "number_of_servings": 4,
+                "main_image": "https://picsum.photos/seed/picsum/200/300",
+                "preparation_time": "00:45:00",
+                "name": f"Recipe {i}",
+                "instructions": "Whisk, fold and bake until golden. " * 20,
+                "ingredients": "flour, eggs, milk, butter, sugar, salt",
+                "created_at": "2024-05-01T12:30:15.123456Z",
+                "owner": owner,
+            }
+            for i in range(args.recipes)
+        ],
+    }
+
+    expected = JSONRenderer().render(page)
+    assert renderers.FastJSONRenderer().render(page) == expected
+    results = [("JSONRenderer", measure(lambda: JSONRenderer().render(page), args.repeat))]
+    if renderers.orjson is not None:
+        results.append(("FastJSONRenderer", measure(lambda: renderers.FastJSONRenderer().render(page), args.repeat)))
+    with mock.patch.object(renderers, "orjson", None):
+        assert renderers.FastJSONRenderer().render(page) == expected
+        results.append(
+            ("FastJSONRenderer (stdlib)", measure(lambda: renderers.FastJSONRenderer().render(page), args.repeat))
+        )
+
+    print(f"{args.recipes} recipes, {len(expected) / 1e6:.1f} MB of JSON, best of {args.repeat}")
+    baseline = results[0][1][0]
+    for name, (elapsed, peak) in results:
+        print(f"{name:<26} {elapsed * 1000:8.1f}ms {baseline / elapsed:6.1f}x  peak {peak / 1e6:6.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
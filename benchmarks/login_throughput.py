@@ -0,0 +1,67 @@
+"""
+Login throughput of the token endpoint before and after moving password
+hashing onto the async hashing pool.
+
+    python -m benchmarks.login_throughput --logins 64 --concurrency 16
+
+"Sync" drives the DRF view, which under ASGI runs in Django's single
+thread-sensitive executor. "Async" drives the native async view through the
+same ASGI handler. Per-core figures divide by the number of cores each mode
+can keep busy.
+"""
+import argparse
+import asyncio
+import os
+
+from benchmarks.utils import Timer, setup_django, test_database
+
+
+async def drive(client, logins, concurrency):
+    async def worker(count):
+        for _ in range(count):
+            response = await client.post(
+                "/api/token/",
+                {"email": "bench@example.com", "password": "benchmark-password"},
+                content_type="application/json",
+            )
+            assert response.status_code == 200, response.content
+
+    share, extra = divmod(logins, concurrency)
+    await asyncio.gather(*(worker(share + (i < extra)) for i in range(concurrency)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.test import AsyncClient, override_settings
+
+    cores = os.cpu_count() or 1
+    with test_database():
+        get_user_model().objects.create_user(
+            email="bench@example.com", name="Bench", password="benchmark-password"
+        )
+        client = AsyncClient()
+        results = []
+        with override_settings(ASGI_ROOT_URLCONF=settings.ROOT_URLCONF):
+            with Timer() as timer:
+                asyncio.run(drive(client, args.logins, args.concurrency))
+        results.append(("sync view", timer.elapsed, 1))
+        with Timer() as timer:
+            asyncio.run(drive(client, args.logins, args.concurrency))
+        results.append(("async view + pool", timer.elapsed, min(settings.PASSWORD_HASH_WORKERS, cores)))
+
+    print(f"{args.logins} logins, concurrency {args.concurrency}, {cores} cores, "
+          f"{settings.PASSWORD_HASH_WORKERS} hashing workers")
+    for name, elapsed, busy_cores in results:
+        rate = args.logins / elapsed
+        print(f"{name:<20} {rate:8.1f} logins/s {rate / busy_cores:8.1f} logins/s/core")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Insert throughput and primary key index size with uuid4 vs uuid7 keys.
+
+    python -m benchmarks.primary_keys --rows 500000 --batch 1000
+
+Each generator fills its own table shaped like recipe_recipe's key. Insert
+rates are reported for the first and last tenth of the batches, to show
+how random keys slow down as the index outgrows the cache, and the index
+size shows the cost of the page splits random keys cause.
+"""
+import argparse
+import uuid
+
+from benchmarks.utils import Timer, setup_django, test_database
+
+
+def index_size(connection, table):
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute("SELECT pg_relation_size(%s)", [f"{table}_pkey"])
+        elif connection.vendor == "sqlite":
+            cursor.execute("SELECT SUM(pgsize) FROM dbstat WHERE name = %s", [f"sqlite_autoindex_{table}_1"])
+        else:
+            return None
+        return cursor.fetchone()[0]
+
+
+def fill(connection, table, generate, rows, batch):
+    from django.db import models
+
+    field = models.UUIDField()
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TABLE {quote(table)} (id {connection.data_types['UUIDField']} PRIMARY KEY, "
+            f"name varchar(255) NOT NULL)"
+        )
+        timings = []
+        for start in range(0, rows, batch):
+            values = [
+                (field.get_db_prep_value(generate(), connection), f"Recipe {i}")
+                for i in range(start, min(start + batch, rows))
+            ]
+            with Timer() as timer:
+                cursor.executemany(f"INSERT INTO {quote(table)} (id, name) VALUES (%s, %s)", values)
+            timings.append((len(values), timer.elapsed))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=500000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+
+    from cooky_recipe_apis.ids import uuid7
+
+    results = []
+    with test_database():
+        for name, generate in (("uuid4", uuid.uuid4), ("uuid7", uuid7)):
+            table = f"bench_{name}"
+            timings = fill(connection, table, generate, args.rows, args.batch)
+            tenth = max(1, len(timings) // 10)
+
+            def rate(batches):
+                return sum(count for count, _ in batches) / sum(elapsed for _, elapsed in batches)
+
+            total = sum(elapsed for _, elapsed in timings)
+            results.append((name, args.rows / total, rate(timings[:tenth]), rate(timings[-tenth:]),
+                            index_size(connection, table)))
+
+    print(f"{args.rows} rows in batches of {args.batch} on {connection.vendor}")
+    print(f"{'key':<6} {'rows/s':>10} {'first 10%':>10} {'last 10%':>10} {'index MB':>9}")
+    for name, overall, first, last, size in results:
+        size = f"{size / 2 ** 20:9.1f}" if size is not None else f"{'n/a':>9}"
+        print(f"{name:<6} {overall:10.0f} {first:10.0f} {last:10.0f} {size}")
+
+
+if __name__ == "__main__":
+    main()
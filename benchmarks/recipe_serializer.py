@@ -0,0 +1,82 @@
+"""
+RecipeSerializer vs RecipeValuesSerializer on a large recipe list.
+
+    python -m benchmarks.recipe_serializer --recipes 10000
+
+"serialize" times building the response data from already-fetched rows
+(model instances vs. values() dicts); "end to end" adds the query and JSON
+rendering. The rendered bytes of both paths are checked to be identical.
+"""
+import argparse
+
+from benchmarks.utils import Timer, setup_django, test_database
+
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        with Timer() as timer:
+            result = func()
+        timings.append(timer.elapsed)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipes", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+
+    from recipe.models import Recipe
+    from recipe.serializers import RecipeSerializer, RecipeValuesSerializer
+    from users.models import CustomUser
+
+    with test_database():
+        user = CustomUser.objects.create_user(email="bench@example.com", name="Bench", password="benchmark")
+        Recipe.objects.bulk_create(
+            [
+                Recipe(
+                    name=f"Recipe {i}",
+                    instructions="Whisk, fold and bake until golden. " * 20,
+                    ingredients="flour, eggs, milk, butter, sugar, salt",
+                    number_of_servings=4,
+                    main_image="https://picsum.photos/seed/picsum/200/300",
+                    preparation_time="00:45:00",
+                    owner=user,
+                )
+                for i in range(args.recipes)
+            ],
+            batch_size=1000,
+        )
+        recipes = Recipe.objects.order_by("-created_at", "-pk")
+        values_serializer = RecipeValuesSerializer()
+        instances = list(recipes)
+        rows = list(values_serializer.values(recipes))
+
+        model_serialize, _ = best_of(args.repeat, lambda: RecipeSerializer(instances, many=True).data)
+        values_serialize, _ = best_of(args.repeat, lambda: values_serializer.to_representation(rows))
+        model_total, model_bytes = best_of(
+            args.repeat, lambda: JSONRenderer().render(RecipeSerializer(recipes.all(), many=True).data)
+        )
+        values_total, values_bytes = best_of(
+            args.repeat,
+            lambda: JSONRenderer().render(
+                RecipeValuesSerializer().to_representation(RecipeValuesSerializer().values(recipes.all()))
+            ),
+        )
+
+    assert model_bytes == values_bytes, "Rendered JSON differs"
+    print(f"{args.recipes} recipes, best of {args.repeat}; output is byte-identical")
+    print(f"{'':<12} {'model':>10} {'values':>10} {'speedup':>8}")
+    for name, model, values in (
+        ("serialize", model_serialize, values_serialize),
+        ("end to end", model_total, values_total),
+    ):
+        print(f"{name:<12} {model * 1000:8.1f}ms {values * 1000:8.1f}ms {model / values:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
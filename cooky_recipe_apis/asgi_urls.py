@@ -0,0 +1,11 @@
+# cook_recipe_apis/asgi_urls.py
+from django.urls import include, path
+
+from .urls import urlpatterns as wsgi_urlpatterns
+
+# Native async views take precedence; everything else falls through to the
+# regular URLconf.
+urlpatterns = [
+    path('api/', include('recipe.async_urls')),
+    path('api/', include('users.async_urls')),
+] + wsgi_urlpatterns
@@ -0,0 +1,95 @@
+import functools
+
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import exception_handler
+
+from users.authentication import CachedJWTAuthentication
+
+from . import timing
+from .renderers import copy_headers
+
+
+async def _stream(pieces):
+    for piece in pieces:
+        yield piece
+
+
+def render_response(request, response):
+    """
+    Render a DRF ``Response`` with the default renderer into a plain
+    ``HttpResponse``, so the async handler does not have to hop to a thread
+    to render it after the view returns. Large lists are streamed in
+    chunks when the renderer supports it.
+    """
+    if not isinstance(response, Response):
+        return response
+    renderer = api_settings.DEFAULT_RENDERER_CLASSES[0]()
+    if hasattr(renderer, "iter_render") and renderer.is_large(response.data):
+        rendered = StreamingHttpResponse(
+            _stream(renderer.iter_render(response.data)),
+            status=response.status_code,
+            content_type=renderer.media_type,
+        )
+    else:
+        with timing.span("render"):
+            content = renderer.render(
+                response.data, renderer.media_type, {"request": request, "response": response}
+            )
+        rendered = HttpResponse(content, status=response.status_code, content_type=renderer.media_type)
+    return copy_headers(response, rendered)
+
+
+def async_api_view(http_method_names, permission_classes=None):
+    """
+    The async counterpart of ``@api_view`` + ``@permission_classes``.
+
+    The decorated coroutine receives a DRF ``Request`` whose user was
+    resolved with the async ORM, and may return a DRF ``Response`` or any
+    ``HttpResponse``. Authentication, permission and ``APIException``
+    errors are rendered the same way DRF's sync views render them.
+    """
+    if permission_classes is None:
+        permission_classes = api_settings.DEFAULT_PERMISSION_CLASSES
+    http_method_names = [method.upper() for method in http_method_names]
+
+    def decorator(func):
+        @csrf_exempt
+        @functools.wraps(func)
+        async def view(request, *args, **kwargs):
+            authenticator = CachedJWTAuthentication()
+            request = Request(
+                request, parsers=[parser() for parser in api_settings.DEFAULT_PARSER_CLASSES]
+            )
+            try:
+                if request.method not in http_method_names:
+                    raise exceptions.MethodNotAllowed(request.method)
+                user_auth = await authenticator.aauthenticate(request)
+                if user_auth is None:
+                    request.user, request.auth = AnonymousUser(), None
+                else:
+                    request.user, request.auth = user_auth
+                for permission in permission_classes:
+                    permission = permission()
+                    if not permission.has_permission(request, None):
+                        if not request.user.is_authenticated:
+                            raise exceptions.NotAuthenticated()
+                        raise exceptions.PermissionDenied(getattr(permission, "message", None))
+                response = await func(request, *args, **kwargs)
+            except Exception as exc:
+                if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+                    exc.auth_header = authenticator.authenticate_header(request)
+                response = exception_handler(exc, {"request": request})
+                if response is None:
+                    raise
+            return render_response(request, response)
+
+        view.http_method_names = http_method_names
+        return view
+
+    return decorator
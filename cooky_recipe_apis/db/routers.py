@@ -0,0 +1,92 @@
+"""
+Primary/replica routing with read-your-writes stickiness.
+
+Writes always go to the primary (``default``). Reads go to a replica from
+``settings.DATABASE_REPLICAS``, picked at random once per request so all
+of a request's reads see the same snapshot, only while serving a safe
+(GET, HEAD, OPTIONS) request that has not written anything, for a user who
+has not written in the last ``REPLICA_PIN_SECONDS``. Everything else reads
+from the primary: write requests, code outside a request (management
+commands, the shell), transactions, and users pinned after a write, which
+``ReplicaPinningMiddleware`` records in the ``DATABASE_PIN_CACHE`` cache.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_current = ContextVar('db_routing', default=None)
+
+
+class RoutingState:
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+        self.replica = None
+
+
+@contextmanager
+def activate(state):
+    token = _current.set(state)
+    try:
+        yield state
+    finally:
+        _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+def _pin_key(user_id):
+    return f'db-pin:{user_id}'
+
+
+def remember_write(user_id):
+    """Pin ``user_id`` to the primary for ``REPLICA_PIN_SECONDS``."""
+    caches[settings.DATABASE_PIN_CACHE].set(_pin_key(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+
+async def aremember_write(user_id):
+    await caches[settings.DATABASE_PIN_CACHE].aset(_pin_key(user_id), True, settings.REPLICA_PIN_SECONDS)
+
+
+def _needs_pin_check(state):
+    return state is not None and not state.pinned and settings.DATABASE_REPLICAS
+
+
+def pin_if_recent_writer(user_id):
+    """Read from the primary for the rest of the request if ``user_id`` wrote recently."""
+    state = _current.get()
+    if _needs_pin_check(state) and caches[settings.DATABASE_PIN_CACHE].get(_pin_key(user_id)):
+        state.pinned = True
+
+
+async def apin_if_recent_writer(user_id):
+    state = _current.get()
+    if _needs_pin_check(state) and await caches[settings.DATABASE_PIN_CACHE].aget(_pin_key(user_id)):
+        state.pinned = True
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        replicas = settings.DATABASE_REPLICAS
+        state = _current.get()
+        if not replicas or state is None or state.pinned or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        if state.replica not in replicas:
+            state.replica = random.choice(replicas)
+        return state.replica
+
+    def db_for_write(self, model, **hints):
+        state = _current.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
@@ -0,0 +1,287 @@
+"""
+In-process metrics, served at ``/metrics`` in the Prometheus text
+exposition format.
+
+Every process keeps its own registry. When several workers serve the API,
+set ``METRICS_MULTIPROCESS_DIR`` to a directory shared by all of them (and
+emptied when the service starts): each process then flushes its samples
+to ``<pid>.json`` there every ``METRICS_FLUSH_INTERVAL`` seconds, from a
+background thread so no request waits on the file, and at exit.
+``/metrics`` reports the sum over all files, whichever worker answers the
+scrape.
+"""
+import atexit
+import bisect
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def _key(self, labels):
+        # JSON-encoded label values, so snapshots can be written to disk as-is
+        return json.dumps([str(labels[name]) for name in self.labelnames])
+
+    def _labels(self, key):
+        return list(zip(self.labelnames, json.loads(key)))
+
+    def snapshot(self):
+        return dict(self.values)
+
+    def merge(self, into, values):
+        raise NotImplementedError
+
+    def exposition(self, values):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        for key in sorted(values):
+            lines.extend(self.samples(self._labels(key), values[key]))
+        return lines
+
+
+class Counter(Metric):
+    """
+    A monotonically increasing count. ``callback`` (returning ``{labels
+    tuple: value}``) makes it read its values from existing process-wide
+    counters at collection time instead of being incremented.
+    """
+    type = 'counter'
+
+    def __init__(self, name, documentation, labelnames=(), callback=None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def snapshot(self):
+        if self.callback is None:
+            return super().snapshot()
+        return {
+            self._key(dict(zip(self.labelnames, labels))): value
+            for labels, value in self.callback().items()
+        }
+
+    def merge(self, into, values):
+        for key, value in values.items():
+            into[key] = into.get(key, 0) + value
+
+    def samples(self, labels, value):
+        yield f'{self.name}{_format_labels(labels)} {_format_value(value)}'
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        # Per-bucket counts (the last one is +Inf), then the sum
+        counts = self.values.get(key)
+        if counts is None:
+            counts = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def snapshot(self):
+        return {key: list(counts) for key, counts in self.values.items()}
+
+    def merge(self, into, values):
+        for key, counts in values.items():
+            if key in into:
+                into[key] = [a + b for a, b in zip(into[key], counts)]
+            else:
+                into[key] = list(counts)
+
+    def samples(self, labels, counts):
+        cumulative = 0
+        for bound, count in zip((*self.buckets, math.inf), counts):
+            cumulative += count
+            yield f'{self.name}_bucket{_format_labels([*labels, ("le", _format_value(bound))])} {cumulative}'
+        yield f'{self.name}_sum{_format_labels(labels)} {_format_value(counts[-1])}'
+        yield f'{self.name}_count{_format_labels(labels)} {cumulative}'
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self.flusher_lock = threading.Lock()
+        self.flusher_pid = None
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self):
+        with self.lock:
+            return {name: metric.snapshot() for name, metric in self.metrics.items()}
+
+    @property
+    def directory(self):
+        return settings.METRICS_MULTIPROCESS_DIR
+
+    def flush(self):
+        """Write this process's samples to the multiprocess directory."""
+        if not self.directory:
+            return
+        path = os.path.join(self.directory, f'{os.getpid()}.json')
+        with open(f'{path}.tmp', 'w') as file:
+            json.dump(self.snapshot(), file)
+        os.replace(f'{path}.tmp', path)
+
+    def start_flushing(self):
+        """Start this process's flushing thread, unless it is already running."""
+        pid = os.getpid()
+        if self.flusher_pid == pid:
+            return
+        with self.flusher_lock:
+            # Threads do not survive a fork, so every worker starts its own
+            if self.flusher_pid != pid:
+                self.flusher_pid = pid
+                threading.Thread(target=self._flush_periodically, name='metrics-flush', daemon=True).start()
+
+    def _flush_periodically(self):
+        while True:
+            time.sleep(settings.METRICS_FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except OSError:
+                logger.exception('Could not flush metrics to %s', self.directory)
+
+    def collect(self):
+        """Return the samples to report: this process's, or every process's in multiprocess mode."""
+        if not self.directory:
+            return self.snapshot()
+        merged = {name: {} for name in self.metrics}
+        # This process's own file may be a flush behind
+        for name, values in self.snapshot().items():
+            self.metrics[name].merge(merged[name], values)
+        own = f'{os.getpid()}.json'
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.json') or filename == own:
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as file:
+                    snapshot = json.load(file)
+            except (OSError, ValueError):
+                continue
+            for name, values in snapshot.items():
+                if name in self.metrics:
+                    self.metrics[name].merge(merged[name], values)
+        return merged
+
+    def exposition(self):
+        samples = self.collect()
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.extend(metric.exposition(samples[name]))
+        lines.extend(cache_hit_ratios(samples[CACHE_LOOKUPS.name]))
+        return '\n'.join(lines) + '\n'
+
+
+def _recipe_cache_lookups():
+    from recipe.cache import get_stats
+
+    stats = get_stats()
+    return {('recipes', 'hit'): stats['hits'], ('recipes', 'miss'): stats['misses']}
+
+
+def _user_cache_lookups():
+    from users.authentication import user_cache
+
+    return {('users', 'hit'): user_cache.hits, ('users', 'miss'): user_cache.misses}
+
+
+def _cache_lookups():
+    return {**_recipe_cache_lookups(), **_user_cache_lookups()}
+
+
+def cache_hit_ratios(lookups):
+    """A gauge of hits / lookups per cache, computed from the (merged) lookup counts."""
+    totals = {}
+    for key, value in lookups.items():
+        cache, result = json.loads(key)
+        totals.setdefault(cache, {'hit': 0, 'miss': 0})[result] += value
+    yield '# HELP cooky_cache_hit_ratio Share of cache lookups that were hits.'
+    yield '# TYPE cooky_cache_hit_ratio gauge'
+    for cache, counts in sorted(totals.items()):
+        lookups = counts['hit'] + counts['miss']
+        ratio = counts['hit'] / lookups if lookups else 0
+        yield f'cooky_cache_hit_ratio{_format_labels([("cache", cache)])} {_format_value(ratio)}'
+
+
+registry = Registry()
+
+REQUESTS = registry.register(Counter(
+    'cooky_http_requests_total', 'HTTP requests by URL name, method and status code.', ['route', 'method', 'status'],
+))
+REQUEST_DURATION = registry.register(Histogram(
+    'cooky_http_request_duration_seconds', 'HTTP request latency by URL name.', ['route', 'method'],
+))
+DB_QUERIES = registry.register(Histogram(
+    'cooky_db_queries_per_request', 'SQL queries per request by URL name.', ['route'], buckets=QUERY_COUNT_BUCKETS,
+))
+DB_DURATION = registry.register(Histogram(
+    'cooky_db_duration_seconds', 'SQL time per request by URL name.', ['route'],
+))
+CACHE_LOOKUPS = registry.register(Counter(
+    'cooky_cache_lookups_total', 'Cache lookups by cache and result.', ['cache', 'result'], callback=_cache_lookups,
+))
+
+
+def observe_request(request, response, timings):
+    """Record a finished request; called by ``MetricsMiddleware``."""
+    match = request.resolver_match
+    route = match.url_name if match is not None and match.url_name else 'unmatched'
+    with registry.lock:
+        REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+        REQUEST_DURATION.observe(time.perf_counter() - timings.started, route=route, method=request.method)
+        DB_QUERIES.observe(len(timings.queries), route=route)
+        DB_DURATION.observe(timings.db, route=route)
+    if registry.directory:
+        registry.start_flushing()
+
+
+atexit.register(registry.flush)
@@ -0,0 +1,244 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from rest_framework.permissions import SAFE_METHODS
+
+from . import metrics, timing
+from .db import routers
+
+timing_logger = logging.getLogger('cooky_recipe_apis.timing')
+
+
+class ASGIURLConfMiddleware:
+    """
+    Route requests that arrive through the ASGI handler with
+    ``settings.ASGI_ROOT_URLCONF`` so they reach the native async views,
+    while WSGI requests keep using ``ROOT_URLCONF``.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.urlconf = settings.ASGI_ROOT_URLCONF
+        return await self.get_response(request)
+
+
+class TimedMiddleware:
+    """
+    Base for middleware that reports on ``timing.RequestTimings``: runs the
+    rest of the chain with the current request's timings active (starting
+    them unless an outer middleware already did) and hands them to
+    ``finish()``. Makes sure every connection records its queries.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        # New connections get the recorder when they connect; ones that are
+        # already open are covered by install_query_recorders()
+        connection_created.connect(timing.install_query_recorder)
+        self.install_query_recorders()
+        self.installed_async = False
+
+    def install_query_recorders(self):
+        for connection in connections.all(initialized_only=True):
+            timing.install_query_recorder(connection)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        timings = timing.current()
+        if timings is not None:
+            return self.finish(request, self.get_response(request), timings)
+        with timing.activate(timing.RequestTimings()) as timings:
+            response = self.get_response(request)
+        return self.finish(request, response, timings)
+
+    async def __acall__(self, request):
+        if not self.installed_async:
+            # The async ORM queries from the thread-sensitive executor
+            await sync_to_async(self.install_query_recorders)()
+            self.installed_async = True
+        timings = timing.current()
+        if timings is not None:
+            return self.finish(request, await self.get_response(request), timings)
+        with timing.activate(timing.RequestTimings()) as timings:
+            response = await self.get_response(request)
+        return self.finish(request, response, timings)
+
+    def finish(self, request, response, timings):
+        return response
+
+
+class RequestTimingMiddleware(TimedMiddleware):
+    """
+    Measure where each request's time goes and report it in a
+    ``Server-Timing`` header and a log line on the ``cooky_recipe_apis.timing``
+    logger: total, SQL (time and query count), view, render and any
+    ``timing.span()`` phases such as auth. Requests slower than
+    ``settings.REQUEST_TIMING_SLOW_MS`` are logged as warnings together with
+    their SQL.
+
+    Removes itself from the middleware chain unless
+    ``settings.REQUEST_TIMING`` is set.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_TIMING:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        if self.is_async:
+            # Sync hooks would be run in a worker thread by the async handler
+            self.process_view = self.aprocess_view
+            self.process_template_response = self.aprocess_template_response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timing.current().view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered by the handler once this returns
+        timing.current().view_finished = time.perf_counter()
+        return response
+
+    # Called through the class: in async mode the instance attributes point
+    # at these coroutines themselves
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        RequestTimingMiddleware.process_view(self, request, view_func, view_args, view_kwargs)
+
+    async def aprocess_template_response(self, request, response):
+        return RequestTimingMiddleware.process_template_response(self, request, response)
+
+    def finish(self, request, response, timings):
+        finished = time.perf_counter()
+        view_started = timings.view_started or finished
+        if timings.view_finished is not None:
+            view = timings.view_finished - view_started
+            render = finished - timings.view_finished
+        else:
+            # Async views render inside the view, under a "render" span
+            render = timings.spans.get('render', 0.0)
+            view = finished - view_started - render
+        durations = {
+            'total': finished - timings.started,
+            'db': timings.db,
+            **{name: elapsed for name, elapsed in timings.spans.items() if name != 'render'},
+            'view': view,
+            'render': render,
+        }
+        response['Server-Timing'] = ', '.join(
+            f'{name};dur={elapsed * 1000:.1f}' + (f';desc="{len(timings.queries)} queries"' if name == 'db' else '')
+            for name, elapsed in durations.items()
+        )
+
+        slow = durations['total'] * 1000 >= settings.REQUEST_TIMING_SLOW_MS
+        if slow or timing_logger.isEnabledFor(logging.INFO):
+            fields = {
+                'method': request.method,
+                'path': request.path,
+                'route': request.resolver_match.url_name if request.resolver_match else None,
+                'status': response.status_code,
+                'queries': len(timings.queries),
+                **{f'{name}_ms': round(elapsed * 1000, 1) for name, elapsed in durations.items()},
+            }
+            message = ' '.join(f'{key}={value}' for key, value in fields.items())
+            if slow:
+                timing_logger.warning(
+                    'slow request %s\n%s',
+                    message,
+                    '\n'.join(f'{elapsed * 1000:.1f}ms {sql}' for sql, elapsed in timings.queries),
+                    extra={'timing': fields, 'queries': timings.queries},
+                )
+            else:
+                timing_logger.info(message, extra={'timing': fields})
+        return response
+
+
+class MetricsMiddleware(TimedMiddleware):
+    """
+    Record each request's count, latency and SQL in ``metrics.registry``.
+    Removes itself from the middleware chain unless ``settings.METRICS`` is
+    set.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def finish(self, request, response, timings):
+        metrics.observe_request(request, response, timings)
+        return response
+
+
+class ReplicaPinningMiddleware:
+    """
+    Scope database routing to the request (see ``db.routers``): safe
+    requests may read from a replica, and when a request writes, its user
+    reads from the primary for the next ``REPLICA_PIN_SECONDS``. Removes
+    itself from the middleware chain unless ``DATABASE_REPLICAS`` is set,
+    and refuses to start if ``DATABASE_PIN_CACHE`` is private to the
+    process, since other workers would never see its pins.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        if isinstance(caches[settings.DATABASE_PIN_CACHE], (LocMemCache, DummyCache)):
+            raise ImproperlyConfigured(
+                f'DATABASE_PIN_CACHE ({settings.DATABASE_PIN_CACHE!r}) must be a cache shared by all workers '
+                f'when DB_REPLICAS is set, not {type(caches[settings.DATABASE_PIN_CACHE]).__name__}.'
+            )
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        with routers.activate(routers.RoutingState(pinned=request.method not in SAFE_METHODS)) as state:
+            response = self.get_response(request)
+            user = self.writer(request, state)
+            if user is not None:
+                routers.remember_write(user.pk)
+        return response
+
+    async def __acall__(self, request):
+        with routers.activate(routers.RoutingState(pinned=request.method not in SAFE_METHODS)) as state:
+            response = await self.get_response(request)
+            user = self.writer(request, state)
+            if user is not None:
+                await routers.aremember_write(user.pk)
+        return response
+
+    def writer(self, request, state):
+        # DRF sets the user it authenticated on the underlying HttpRequest
+        user = getattr(request, 'user', None)
+        if state.wrote and user is not None and user.is_authenticated:
+            return user
+        return None
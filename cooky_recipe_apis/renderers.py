@@ -0,0 +1,163 @@
+import codecs
+import datetime
+import uuid
+from decimal import Decimal
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Datetimes go through DRF's encoder, which trims microseconds to milliseconds
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+# Types that are never, and never hold, a float
+_PLAIN_TYPES = frozenset([str, int, bool, type(None), uuid.UUID, datetime.datetime, datetime.date])
+
+_encoder = encoders.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(',', ':'))
+
+
+def _escape_line_separators(content):
+    # Keep the output a strict JavaScript subset, like DRF's JSONRenderer
+    if b'\xe2\x80' in content:
+        content = content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return content
+
+
+def _has_floats(data):
+    """Whether a float or Decimal appears anywhere in ``data``'s dicts, lists and tuples."""
+    pending = [data]
+    while pending:
+        value = pending.pop()
+        if isinstance(value, dict):
+            children = [*value, *value.values()]
+        elif isinstance(value, (list, tuple)):
+            children = value
+        elif isinstance(value, (float, Decimal)):
+            return True
+        else:
+            continue
+        # Rows of plain values are cleared without a step per value
+        if not _PLAIN_TYPES.issuperset(map(type, children)):
+            pending.extend(children)
+    return False
+
+
+def dumps(data):
+    """
+    Encode ``data`` as compact UTF-8 JSON bytes, byte-identical to DRF's
+    default ``JSONRenderer`` output. Uses orjson when it is installed and
+    ``data`` holds no floats: orjson writes 1e16 and 0.00001 where Python
+    writes 1e+16 and 1e-05, and NaN and infinities as null where DRF
+    raises ``ValueError``.
+    """
+    if orjson is not None and not _has_floats(data):
+        try:
+            return _escape_line_separators(orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS))
+        except orjson.JSONEncodeError:
+            # e.g. integers wider than 64 bits; the stdlib encoder decides
+            pass
+    return _escape_line_separators(_encoder.encode(data).encode())
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    ``JSONRenderer`` that encodes with orjson when available (UUIDs are
+    handled natively instead of through ``JSONEncoder.default``) and falls
+    back to the stdlib encoder otherwise, or when the data holds floats
+    (see ``dumps()``).
+
+    ``iter_render()`` encodes lists longer than ``chunk_size`` (at the top
+    level or as a value of the top-level dict, e.g. a page's ``results``)
+    ``chunk_size`` items at a time, so streaming responses never hold the
+    whole document in memory. ``chunk_size`` defaults to the
+    ``JSON_RENDER_CHUNK_SIZE`` setting.
+    """
+
+    def __init__(self):
+        self.chunk_size = settings.JSON_RENDER_CHUNK_SIZE
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or self.ensure_ascii or not self.compact or not self.strict:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+    def is_large(self, data):
+        """Whether ``iter_render()`` would split ``data`` into chunks."""
+        if isinstance(data, list):
+            return len(data) > self.chunk_size
+        return isinstance(data, dict) and all(isinstance(key, str) for key in data) and any(
+            isinstance(value, list) and len(value) > self.chunk_size for value in data.values()
+        )
+
+    def iter_render(self, data):
+        """Yield the encoded JSON for ``data`` in pieces."""
+        if not self.is_large(data):
+            yield dumps(data)
+        elif isinstance(data, list):
+            yield b'['
+            for start in range(0, len(data), self.chunk_size):
+                yield (b',' if start else b'') + dumps(data[start:start + self.chunk_size])[1:-1]
+            yield b']'
+        else:
+            yield b'{'
+            for index, (key, value) in enumerate(data.items()):
+                yield (b',' if index else b'') + dumps(key) + b':'
+                yield from self.iter_render(value)
+            yield b'}'
+
+
+def copy_headers(response, rendered):
+    for header, value in response.items():
+        if header.lower() != 'content-type':
+            rendered[header] = value
+    return rendered
+
+
+def stream_large(request, response):
+    """
+    Return a sync view's ``Response`` as a ``StreamingHttpResponse`` encoded
+    with ``iter_render()`` when JSON was negotiated and its data is large;
+    otherwise return it unchanged, for DRF to render in one piece.
+    """
+    renderer = getattr(request, 'accepted_renderer', None)
+    if (
+        not isinstance(response, Response)
+        or not isinstance(renderer, FastJSONRenderer)
+        or renderer.get_indent(request.accepted_media_type, {}) is not None
+        or not renderer.is_large(response.data)
+    ):
+        return response
+    streamed = StreamingHttpResponse(
+        renderer.iter_render(response.data), status=response.status_code, content_type=renderer.media_type
+    )
+    return copy_headers(response, streamed)
+
+
+class FastJSONParser(JSONParser):
+    """``JSONParser`` that decodes with orjson when it is installed."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None or not self.strict:
+            return super().parse(stream, media_type, parser_context)
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            content = stream.read()
+            if codecs.lookup(encoding).name != 'utf-8':
+                content = content.decode(encoding)
+            # orjson rejects NaN and Infinity, like the strict stdlib parser
+            return orjson.loads(content)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
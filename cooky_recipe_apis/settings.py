@@ -9,6 +9,7 @@ https://docs.djangoproject.com/en/4.2/topics/settings/
 For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
+import json
 import os
 from pathlib import Path
 from datetime import timedelta
@@ -47,6 +48,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'cooky_recipe_apis.middleware.RequestTimingMiddleware',
+    'cooky_recipe_apis.middleware.MetricsMiddleware',
+    'cooky_recipe_apis.middleware.ReplicaPinningMiddleware',
+    'cooky_recipe_apis.middleware.ASGIURLConfMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     "corsheaders.middleware.CorsMiddleware",
@@ -59,6 +64,10 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = 'cooky_recipe_apis.urls'
 
+# Requests served through asgi.py are routed with this URLconf instead, which
+# swaps in the native async views; see cooky_recipe_apis.middleware.
+ASGI_ROOT_URLCONF = 'cooky_recipe_apis.asgi_urls'
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -81,13 +90,75 @@ WSGI_APPLICATION = 'cooky_recipe_apis.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# PostgreSQL connections come from Django's per-process psycopg pool; set
+# DB_POOL_MAX_SIZE=0 to connect per request instead, optionally kept open
+# with DB_CONN_MAX_AGE. CONN_HEALTH_CHECKS makes the pool check connections
+# before handing them out.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'django.db.backends.postgresql')
+DB_POOL_MAX_SIZE = int(os.environ.get('DB_POOL_MAX_SIZE', 10))
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'ENGINE': DB_ENGINE,
+        'NAME': os.environ.get('DB_NAME', 'cookyrecipe'),
+        'USER': os.environ.get('DB_USER', 'cookyadmin'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', 'CookyRecipe123'),
+        'HOST': os.environ.get('DB_HOST', 'postgresdb'),
+        'PORT': os.environ.get('DB_PORT', '5432'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 0)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            'pool': {
+                'min_size': min(int(os.environ.get('DB_POOL_MIN_SIZE', 1)), DB_POOL_MAX_SIZE),
+                'max_size': DB_POOL_MAX_SIZE,
+                'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+                'max_lifetime': float(os.environ.get('DB_POOL_MAX_LIFETIME', 3600)),
+                'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', 600)),
+            },
+        } if DB_POOL_MAX_SIZE and DB_ENGINE == 'django.db.backends.postgresql' else {},
     }
 }
 
+# Read replicas: a comma separated list of hosts (or, with SQLite, database
+# files) holding copies of the default database. Each becomes a "replicaN"
+# alias with otherwise the same settings. Safe requests read from them;
+# a user who writes reads from the primary for REPLICA_PIN_SECONDS, as
+# recorded in DATABASE_PIN_CACHE. That cache must be shared by all workers,
+# so with replicas the recipes cache (by default) has to be pointed at a
+# shared backend; ReplicaPinningMiddleware refuses to start otherwise.
+for _index, _replica in enumerate(filter(None, os.environ.get('DB_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica{_index}'] = {
+        **DATABASES['default'],
+        'NAME' if 'sqlite3' in DATABASES['default']['ENGINE'] else 'HOST': _replica.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+DATABASE_ROUTERS = ['cooky_recipe_apis.db.routers.PrimaryReplicaRouter']
+DATABASE_PIN_CACHE = os.environ.get('DATABASE_PIN_CACHE', 'recipes')
+REPLICA_PIN_SECONDS = int(os.environ.get('REPLICA_PIN_SECONDS', 5))
+
+
+# Password hashing
+# The first hasher is used for new hashes; stored hashes made with any other
+# listed hasher, or with a different iteration count, are upgraded on login.
+
+PASSWORD_HASHERS = os.environ.get(
+    'PASSWORD_HASHERS',
+    'users.hashers.PBKDF2PasswordHasher,'
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher,'
+    'django.contrib.auth.hashers.Argon2PasswordHasher,'
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher,'
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+).split(',')
+
+# None keeps Django's default for the installed version
+PASSWORD_HASH_ITERATIONS = int(os.environ['PASSWORD_HASH_ITERATIONS']) if os.environ.get('PASSWORD_HASH_ITERATIONS') else None
+
+# Threads used by the async login and registration views for hashing
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -109,10 +180,24 @@ AUTH_PASSWORD_VALIDATORS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
+    ),
+    # orjson-backed when it is installed, stdlib json otherwise
+    'DEFAULT_RENDERER_CLASSES': (
+        'cooky_recipe_apis.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'cooky_recipe_apis.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ),
 }
 
+# Per-process cache of users resolved from access tokens
+AUTH_USER_CACHE_SIZE = int(os.environ.get('AUTH_USER_CACHE_SIZE', 10000))
+AUTH_USER_CACHE_TTL = int(os.environ.get('AUTH_USER_CACHE_TTL', 60))
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
@@ -130,6 +215,82 @@ SIMPLE_JWT = {
 
 AUTH_USER_MODEL = 'users.CustomUser'
 
+# Caches
+# The recipes cache holds rendered recipe payloads. Point RECIPE_CACHE_BACKEND
+# at e.g. django.core.cache.backends.redis.RedisCache (with
+# RECIPE_CACHE_OPTIONS='{}') to share it between workers, and bump RECIPE_CACHE_VERSION whenever the payload format changes.
+
+RECIPE_CACHE_VERSION = 1
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'recipes': {
+        'BACKEND': os.environ.get('RECIPE_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('RECIPE_CACHE_LOCATION', 'recipes'),
+        'TIMEOUT': int(os.environ.get('RECIPE_CACHE_TIMEOUT', 3600)),
+        'VERSION': RECIPE_CACHE_VERSION,
+        'OPTIONS': json.loads(os.environ.get('RECIPE_CACHE_OPTIONS', '{"MAX_ENTRIES": 10000}')),
+    },
+}
+
+# Recipe list pagination
+RECIPE_PAGE_SIZE = int(os.environ.get('RECIPE_PAGE_SIZE', 50))
+RECIPE_MAX_PAGE_SIZE = int(os.environ.get('RECIPE_MAX_PAGE_SIZE', 500))
+
+# JSON responses with a list longer than this (a full page at the default
+# maximum page size, say) are streamed this many items at a time
+JSON_RENDER_CHUNK_SIZE = int(os.environ.get('JSON_RENDER_CHUNK_SIZE', 100))
+
+# Rows fetched per round trip by the streaming export
+RECIPE_EXPORT_CHUNK_SIZE = int(os.environ.get('RECIPE_EXPORT_CHUNK_SIZE', 2000))
+
+# Maximum number of create, update and delete items in one bulk request
+RECIPE_BULK_MAX_ITEMS = int(os.environ.get('RECIPE_BULK_MAX_ITEMS', 100))
+
+# Maximum number of ids in one ?ids= multi-get on the recipe list
+RECIPE_MULTI_GET_MAX_IDS = int(os.environ.get('RECIPE_MULTI_GET_MAX_IDS', 100))
+
+# Changes feed long polling: the longest ?wait= honoured, and how often a
+# waiting request checks for new changes, in seconds
+RECIPE_CHANGES_MAX_WAIT = float(os.environ.get('RECIPE_CHANGES_MAX_WAIT', 30))
+RECIPE_CHANGES_POLL_INTERVAL = float(os.environ.get('RECIPE_CHANGES_POLL_INTERVAL', 1))
+
+# Request timing
+# Adds a Server-Timing header (total, db, auth, view and render) to every
+# response and logs it on the cooky_recipe_apis.timing logger: one INFO line
+# per request, and a WARNING with the request's SQL for requests slower than
+# REQUEST_TIMING_SLOW_MS. Off unless REQUEST_TIMING is set, as the header
+# shows every client how long the server spent where.
+REQUEST_TIMING = os.environ.get('REQUEST_TIMING', 'false').lower() in ('1', 'true', 'yes')
+REQUEST_TIMING_SLOW_MS = int(os.environ.get('REQUEST_TIMING_SLOW_MS', 500))
+
+# Prometheus metrics, served at /metrics
+# With several workers, point METRICS_MULTIPROCESS_DIR at a directory they
+# all share (emptied on deploy) so every scrape reports all of them. Set
+# METRICS_TOKEN to require "Authorization: Bearer <token>" on scrapes.
+METRICS = os.environ.get('METRICS', 'true').lower() in ('1', 'true', 'yes')
+METRICS_MULTIPROCESS_DIR = os.environ.get('METRICS_MULTIPROCESS_DIR') or None
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 1))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or None
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        # Set to INFO to log every request, not only slow ones
+        'cooky_recipe_apis.timing': {
+            'handlers': ['console'],
+            'level': os.environ.get('REQUEST_TIMING_LOG_LEVEL', 'WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
 SWAGGER_SETTINGS = {
     'SECURITY_DEFINITIONS': {
         'Bearer': {
@@ -141,17 +302,6 @@ SWAGGER_SETTINGS = {
     'USE_SESSION_AUTH': False,
 }
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'cookyrecipe',
-        'USER': 'cookyadmin',
-        'PASSWORD': 'CookyRecipe123',
-        'HOST': 'postgresdb',
-        'PORT': '5432',
-    }
-}
-
 
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
@@ -0,0 +1,400 @@
+import datetime
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from decimal import Decimal
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured, MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse
+from django.test import AsyncClient, Client, RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail, ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.models import CustomUser
+
+from . import ids, metrics, renderers
+from .db import routers
+from .middleware import ReplicaPinningMiddleware
+from .renderers import FastJSONParser, FastJSONRenderer
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    data = ReturnDict(
+        [
+            ("id", uuid.UUID("12345678-1234-5678-1234-567812345678")),
+            ("name", "Crème brûlée \u2028 \u2029 \"quoted\" \\ \n"),
+            ("created_at", datetime.datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=datetime.timezone.utc)),
+            ("date", datetime.date(2024, 5, 1)),
+            ("duration", datetime.timedelta(minutes=90)),
+            ("error", ErrorDetail("Invalid", code="invalid")),
+            ("lazy", gettext_lazy("Lazy text")),
+            ("numbers", [0, -1, 2 ** 63 - 1, True, False, None]),
+            ("nested", {"results": [{"a": 1}, {"b": []}], 1: "int key"}),
+            ("huge", 2 ** 70),
+        ],
+        serializer=None,
+    )
+
+    def assertSameAsDRF(self, data, renderer=None):
+        renderer = renderer or FastJSONRenderer()
+        self.assertEqual(renderer.render(data), JSONRenderer().render(data))
+
+    def test_matches_drf_renderer(self):
+        with mock.patch.object(renderers.orjson, "dumps", wraps=renderers.orjson.dumps) as dumps:
+            self.assertSameAsDRF(self.data)
+        dumps.assert_called_once()
+        self.assertEqual(FastJSONRenderer().render(None), b"")
+
+    def test_floats_are_encoded_like_drf(self):
+        # orjson would write 1e16, 0.00001 and 1e-7
+        self.assertSameAsDRF({"big": 1e16, "small": [1e-05, 1e-7], "half": 0.5, "price": Decimal("1.50"), 1.5: "key"})
+        self.assertEqual(FastJSONRenderer().render({"big": 1e16}), b'{"big":1e+16}')
+        for value in (float("nan"), float("inf"), [{"deep": -float("inf")}]):
+            with self.assertRaises(ValueError):
+                JSONRenderer().render({"value": value})
+            with self.assertRaises(ValueError):
+                FastJSONRenderer().render({"value": value})
+
+    def test_matches_drf_renderer_without_orjson(self):
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertSameAsDRF(self.data)
+
+    def test_non_utc_datetimes(self):
+        with timezone.override("Asia/Kolkata"):
+            value = timezone.localtime(datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc))
+        self.assertSameAsDRF({"when": value, "naive": datetime.datetime(2024, 1, 1, 8, 0)})
+
+    def test_indent_falls_back_to_drf(self):
+        renderer = FastJSONRenderer()
+        self.assertEqual(
+            renderer.render(self.data, "application/json; indent=2"),
+            JSONRenderer().render(self.data, "application/json; indent=2"),
+        )
+
+    def test_large_lists_render_in_chunks(self):
+        page = {"next": None, "previous": "http://testserver/?cursor=x", "results": [{"n": i} for i in range(25)]}
+        renderer = FastJSONRenderer()
+        renderer.chunk_size = 10
+        self.assertTrue(renderer.is_large(page))
+        self.assertFalse(renderer.is_large(page["results"][:10]))
+        pieces = list(renderer.iter_render(page))
+        self.assertGreater(len(pieces), 3)
+        self.assertEqual(b"".join(pieces), JSONRenderer().render(page))
+        self.assertEqual(b"".join(renderer.iter_render(page["results"])), JSONRenderer().render(page["results"]))
+        with mock.patch.object(renderers, "orjson", None):
+            self.assertSameAsDRF(page, renderer)
+            self.assertSameAsDRF(page["results"][:10], renderer)
+
+
+class FastJSONParserTests(SimpleTestCase):
+    def parse(self, parser, content, encoding="utf-8"):
+        return parser.parse(io.BytesIO(content), "application/json", {"encoding": encoding})
+
+    def test_matches_drf_parser(self):
+        content = '{"name": "Crème", "n": [1, 2.5, null, true], "nested": {"a": "\\u2028"}}'
+        for encoding in ("utf-8", "utf-16"):
+            self.assertEqual(
+                self.parse(FastJSONParser(), content.encode(encoding), encoding),
+                self.parse(JSONParser(), content.encode(encoding), encoding),
+            )
+
+    def test_invalid_json(self):
+        for content in (b"", b"{", b'{"n": NaN}', b"\xff"):
+            with self.assertRaises(ParseError):
+                self.parse(FastJSONParser(), content)
+        with mock.patch.object(renderers, "orjson", None), self.assertRaises(ParseError):
+            self.parse(FastJSONParser(), b"{")
+
+
+def server_timing(response):
+    metrics = {}
+    for metric in response["Server-Timing"].split(", "):
+        name, *params = metric.split(";")
+        metrics[name] = dict(param.split("=", 1) for param in params)
+    return metrics
+
+
+@override_settings(REQUEST_TIMING=True)
+class RequestTimingMiddlewareTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email="timing@example.com", name="Timing", password="testpassword")
+        self.headers = {"authorization": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+
+    def test_server_timing_header(self):
+        with self.assertLogs("cooky_recipe_apis.timing", "INFO") as logs, self.assertNumQueries(3):
+            response = Client().get("/api/recipes/", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        metrics = server_timing(response)
+        self.assertEqual(list(metrics), ["total", "db", "auth", "view", "render"])
+        self.assertEqual(metrics["db"]["desc"], '"3 queries"')
+        self.assertGreaterEqual(float(metrics["total"]["dur"]), float(metrics["view"]["dur"]))
+
+        [record] = logs.records
+        self.assertEqual(record.levelname, "INFO")
+        self.assertIn("method=GET path=/api/recipes/ route=recipe-list status=200 queries=3", record.getMessage())
+        self.assertEqual(record.timing["queries"], 3)
+
+    async def test_async_views(self):
+        response = await AsyncClient().get("/api/recipes/", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        metrics = server_timing(response)
+        self.assertEqual(list(metrics), ["total", "db", "auth", "view", "render"])
+        self.assertEqual(metrics["db"]["desc"], '"3 queries"')
+        self.assertGreater(float(metrics["view"]["dur"]), 0)
+
+    async def test_sync_views_under_asgi(self):
+        # Routes without an async view run the sync DRF view in a thread
+        headers = {**self.headers, "accept": "application/json"}
+        response = await AsyncClient().get("/api/recipes/pantry/?items=eggs", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        metrics = server_timing(response)
+        self.assertGreater(float(metrics["view"]["dur"]), 0)
+        self.assertGreaterEqual(float(metrics["render"]["dur"]), 0)
+
+    @override_settings(REQUEST_TIMING_SLOW_MS=0)
+    def test_slow_requests_log_their_sql(self):
+        with self.assertLogs("cooky_recipe_apis.timing", "WARNING") as logs:
+            Client().get("/api/recipes/", headers=self.headers)
+        [record] = logs.records
+        self.assertTrue(record.getMessage().startswith("slow request method=GET"))
+        self.assertIn('FROM "recipe_recipe"', record.getMessage())
+        self.assertEqual(len(record.queries), 3)
+
+    @override_settings(REQUEST_TIMING=False)
+    def test_disabled(self):
+        response = Client().get("/api/recipes/", headers=self.headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Server-Timing", response)
+
+
+def metric_value(text, sample):
+    for line in text.splitlines():
+        if line.startswith(sample + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+class MetricsTests(TestCase):
+    requests = 'cooky_http_requests_total{route="recipe-list",method="GET",status="200"}'
+    latency_count = 'cooky_http_request_duration_seconds_count{route="recipe-list",method="GET"}'
+    latency_inf = 'cooky_http_request_duration_seconds_bucket{route="recipe-list",method="GET",le="+Inf"}'
+    queries = 'cooky_db_queries_per_request_bucket{route="recipe-list",le="3"}'
+
+    def setUp(self):
+        caches["recipes"].clear()
+        self.user = CustomUser.objects.create_user(email="metrics@example.com", name="Metrics", password="testpassword")
+        self.headers = {"authorization": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+
+    def scrape(self, **headers):
+        response = Client().get("/metrics", headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], metrics.CONTENT_TYPE)
+        return response.content.decode()
+
+    def test_requests_are_recorded_per_route(self):
+        before = self.scrape()
+        Client().get("/api/recipes/", headers=self.headers)
+        after = self.scrape()
+        self.assertEqual(metric_value(after, self.requests), metric_value(before, self.requests) + 1)
+        self.assertEqual(metric_value(after, self.latency_count), metric_value(before, self.latency_count) + 1)
+        self.assertEqual(metric_value(after, self.latency_inf), metric_value(after, self.latency_count))
+        self.assertEqual(metric_value(after, self.queries), metric_value(before, self.queries) + 1)
+        self.assertIn("# TYPE cooky_http_request_duration_seconds histogram", after)
+        self.assertIn('cooky_cache_hit_ratio{cache="users"}', after)
+
+    async def test_async_requests_are_recorded(self):
+        before = metric_value(metrics.registry.exposition(), self.requests)
+        await AsyncClient().get("/api/recipes/", headers=self.headers)
+        self.assertEqual(metric_value(metrics.registry.exposition(), self.requests), before + 1)
+
+    def test_unmatched_routes(self):
+        Client().get("/no-such-page/")
+        self.assertIn('cooky_http_requests_total{route="unmatched",method="GET",status="404"}', self.scrape())
+
+    def test_histogram_exposition(self):
+        histogram = metrics.Histogram("test_seconds", "Test.", ["route"], buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value, route='a"b')
+        self.assertEqual(histogram.exposition(histogram.snapshot()), [
+            "# HELP test_seconds Test.",
+            "# TYPE test_seconds histogram",
+            'test_seconds_bucket{route="a\\"b",le="0.1"} 2',
+            'test_seconds_bucket{route="a\\"b",le="1"} 3',
+            'test_seconds_bucket{route="a\\"b",le="+Inf"} 4',
+            'test_seconds_sum{route="a\\"b"} 3.65',
+            'test_seconds_count{route="a\\"b"} 4',
+        ])
+
+    def test_multiprocess_mode_sums_all_workers(self):
+        with tempfile.TemporaryDirectory() as directory, self.settings(METRICS_MULTIPROCESS_DIR=directory):
+            own = metric_value(self.scrape(), self.requests)
+            key = json.dumps(["recipe-list", "GET", "200"])
+            # A stale file of this process's own is superseded by its live samples
+            with open(os.path.join(directory, f"{os.getpid()}.json"), "w") as file:
+                json.dump({metrics.REQUESTS.name: {key: 100}}, file)
+            with open(os.path.join(directory, "1.json"), "w") as file:
+                json.dump({metrics.REQUESTS.name: {key: 5}}, file)
+            self.assertEqual(metric_value(self.scrape(), self.requests), own + 5)
+
+    def test_samples_are_flushed_off_the_request_path(self):
+        flushed_by = []
+        flush = metrics.registry.flush
+
+        def record_flush():
+            flushed_by.append(threading.current_thread())
+            flush()
+
+        with (
+            tempfile.TemporaryDirectory() as directory,
+            self.settings(METRICS_MULTIPROCESS_DIR=directory, METRICS_FLUSH_INTERVAL=0.01),
+            mock.patch.object(metrics.registry, "flush", record_flush),
+        ):
+            Client().get("/api/recipes/", headers=self.headers)
+            path = os.path.join(directory, f"{os.getpid()}.json")
+            deadline = time.monotonic() + 5
+            while not os.path.exists(path) and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertTrue(os.path.exists(path))
+        self.assertNotIn(threading.current_thread(), flushed_by)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_token(self):
+        self.assertEqual(Client().get("/metrics").status_code, 403)
+        self.scrape(authorization="Bearer secret")
+
+
+# Pins have to be shared by all workers, so a per-process cache will not do
+PIN_CACHES = {
+    **settings.CACHES,
+    "pins": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.path.join(tempfile.gettempdir(), "cooky-test-pins"),
+    },
+}
+
+
+@override_settings(
+    DATABASE_REPLICAS=["replica1", "replica2"], CACHES=PIN_CACHES, DATABASE_PIN_CACHE="pins", REPLICA_PIN_SECONDS=5
+)
+class PrimaryReplicaRouterTests(SimpleTestCase):
+    user_id = "8d4c2fd6-5b9e-4a57-a5a4-4f2b6f3c1a10"
+
+    def setUp(self):
+        caches["pins"].clear()
+        self.router = routers.PrimaryReplicaRouter()
+
+    def test_reads_outside_requests_use_the_primary(self):
+        self.assertEqual(self.router.db_for_read(CustomUser), "default")
+        self.assertEqual(self.router.db_for_write(CustomUser), "default")
+
+    def test_safe_requests_read_from_replicas(self):
+        with routers.activate(routers.RoutingState()):
+            replica = self.router.db_for_read(CustomUser)
+            self.assertIn(replica, ["replica1", "replica2"])
+            # One replica per request, so its reads see one snapshot
+            self.assertEqual({self.router.db_for_read(CustomUser) for _ in range(10)}, {replica})
+            with mock.patch.object(connections["default"], "in_atomic_block", True):
+                self.assertEqual(self.router.db_for_read(CustomUser), "default")
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas(self):
+        with routers.activate(routers.RoutingState()):
+            self.assertEqual(self.router.db_for_read(CustomUser), "default")
+
+    def test_writes_pin_the_request(self):
+        with routers.activate(routers.RoutingState()) as state:
+            self.assertEqual(self.router.db_for_write(CustomUser), "default")
+            self.assertTrue(state.wrote)
+            self.assertEqual(self.router.db_for_read(CustomUser), "default")
+
+    def test_recent_writers_are_pinned(self):
+        with routers.activate(routers.RoutingState()) as state:
+            routers.pin_if_recent_writer(self.user_id)
+            self.assertFalse(state.pinned)
+        routers.remember_write(self.user_id)
+        with routers.activate(routers.RoutingState()) as state:
+            routers.pin_if_recent_writer(self.user_id)
+            self.assertEqual(self.router.db_for_read(CustomUser), "default")
+
+    def test_middleware_pins_users_who_write(self):
+        user = CustomUser(id=uuid.UUID(self.user_id), email="writer@example.com")
+        seen = []
+
+        def view(request):
+            state = routers.current()
+            seen.append(state.pinned)
+            request.user = user
+            if request.method == "POST":
+                self.router.db_for_write(CustomUser)
+            return HttpResponse()
+
+        middleware = ReplicaPinningMiddleware(view)
+        middleware(RequestFactory().get("/api/recipes/"))
+        self.assertIsNone(caches["pins"].get(f"db-pin:{self.user_id}"))
+        middleware(RequestFactory().post("/api/recipes/"))
+        self.assertEqual(seen, [False, True])
+        self.assertTrue(caches["pins"].get(f"db-pin:{self.user_id}"))
+
+    async def test_async_middleware(self):
+        user = CustomUser(id=uuid.UUID(self.user_id), email="writer@example.com")
+
+        async def view(request):
+            request.user = user
+            self.router.db_for_write(CustomUser)
+            return HttpResponse()
+
+        await ReplicaPinningMiddleware(view)(RequestFactory().delete("/api/recipes/"))
+        self.assertTrue(await caches["pins"].aget(f"db-pin:{self.user_id}"))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_middleware_is_removed_without_replicas(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            ReplicaPinningMiddleware(lambda request: HttpResponse())
+
+    @override_settings(DATABASE_PIN_CACHE="default")
+    def test_middleware_refuses_a_per_process_pin_cache(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, "'default'"):
+            ReplicaPinningMiddleware(lambda request: HttpResponse())
+
+
+class UUID7Tests(SimpleTestCase):
+    def test_layout(self):
+        before = time.time_ns() // 1_000_000
+        value = ids.uuid7()
+        after = time.time_ns() // 1_000_000
+        self.assertEqual(value.version, 7)
+        self.assertEqual(value.variant, uuid.RFC_4122)
+        self.assertTrue(before <= value.int >> 80 <= after)
+
+    def test_ids_are_increasing(self):
+        values = [ids.uuid7() for _ in range(10000)]
+        self.assertEqual(values, sorted(values))
+        self.assertEqual(len(set(values)), len(values))
+
+    def test_counter_overflow_and_clock_going_back(self):
+        with mock.patch.object(ids.time, "time_ns", return_value=10**15):
+            values = [ids.uuid7() for _ in range(5000)]
+        with mock.patch.object(ids.time, "time_ns", return_value=10**15 - 10**9):
+            values.append(ids.uuid7())
+        self.assertEqual(values, sorted(values))
+        self.assertEqual(len(set(values)), len(values))
+        self.assertGreater(values[-1].int >> 80, 10**9)
+
+    def test_model_defaults(self):
+        from recipe.models import Recipe
+
+        self.assertEqual(CustomUser().pk.version, 7)
+        self.assertEqual(Recipe().pk.version, 7)
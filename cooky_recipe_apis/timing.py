@@ -0,0 +1,75 @@
+"""
+Per-request timings collected by ``RequestTimingMiddleware``.
+
+The middleware activates a ``RequestTimings`` for each request; SQL is
+recorded by an execute wrapper installed on every database connection, and
+other code marks phases with ``span()``. Outside a request, or when the
+middleware is disabled, both are no-ops.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []
+        self.db = 0.0
+        self.spans = {}
+        self.view_started = None
+        self.view_finished = None
+
+    def add_span(self, name, elapsed):
+        self.spans[name] = self.spans.get(name, 0.0) + elapsed
+
+
+def current():
+    """The timings of the request being served, or ``None``."""
+    return _current.get()
+
+
+@contextmanager
+def activate(timings):
+    token = _current.set(timings)
+    try:
+        yield timings
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def span(name):
+    """Add the time spent in the block to the current request's ``name`` phase."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add_span(name, time.perf_counter() - started)
+
+
+def record_query(execute, sql, params, many, context):
+    """``connection.execute_wrapper()`` hook that times each query."""
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        timings.db += elapsed
+        timings.queries.append((sql, elapsed))
+
+
+def install_query_recorder(connection, **kwargs):
+    """Install ``record_query`` on ``connection``; a ``connection_created`` receiver."""
+    if record_query not in connection.execute_wrappers:
+        # First, so ``execute_wrapper()`` blocks still pop their own wrapper
+        connection.execute_wrappers.insert(0, record_query)
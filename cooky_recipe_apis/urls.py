@@ -5,6 +5,8 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
+from .views import metrics
+
 schema_view = get_schema_view(
     openapi.Info(
         title="Cooky Recipe APIs",
@@ -22,6 +24,7 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('recipe.urls')),
     path('api/', include('users.urls')),
+    path('metrics', metrics, name='metrics'),
 
     # drf-yasg URLs for Swagger
     path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
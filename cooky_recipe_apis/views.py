@@ -0,0 +1,17 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseForbidden
+from django.views.decorators.http import require_GET
+
+from . import metrics as metrics_registry
+
+
+@require_GET
+def metrics(request):
+    """Prometheus scrape endpoint."""
+    if settings.METRICS_TOKEN:
+        authorization = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(authorization.encode(), f'Bearer {settings.METRICS_TOKEN}'.encode()):
+            return HttpResponseForbidden()
+    return HttpResponse(metrics_registry.registry.exposition(), content_type=metrics_registry.CONTENT_TYPE)
@@ -1,6 +1,31 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate, post_save, pre_delete
 
 
 class RecipeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipe'
+
+    def ready(self):
+        from users.models import CustomUser
+
+        from .models import Recipe
+        from .signals import (
+            bump_collection_versions,
+            bump_owner_collection_versions,
+            invalidate_cached_recipe,
+            record_owner_deletion,
+            record_recipe_save,
+            reindex_recipe_ingredients,
+            reinstall_sqlite_search_index,
+        )
+
+        post_migrate.connect(reinstall_sqlite_search_index, sender=self)
+        post_save.connect(reindex_recipe_ingredients, sender=Recipe)
+        post_save.connect(invalidate_cached_recipe, sender=Recipe)
+        post_save.connect(bump_collection_versions, sender=Recipe)
+        post_save.connect(record_recipe_save, sender=Recipe)
+        # Recipe deletes are recorded by Recipe.delete() and, for a deleted
+        # user's recipes, in one go before the cascade; see recipe.changes
+        pre_delete.connect(record_owner_deletion, sender=CustomUser)
+        post_save.connect(bump_owner_collection_versions, sender=CustomUser)
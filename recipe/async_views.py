@@ -0,0 +1,160 @@
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework import permissions, status
+from rest_framework.response import Response
+
+from cooky_recipe_apis.async_api import async_api_view
+
+from . import cache as recipe_cache, changes, versions
+from .export import CONTENT_TYPES, STREAMERS, astream
+from .filters import filter_recipes, load_only, requested_expansions, requested_fields, requested_ids
+from .models import Recipe
+from .pagination import RecipeCursorPagination
+from .permissions import IsRecipeOwnerOrAdmin
+from .search import search_recipes
+from .serializers import RecipeSerializer, RecipeValuesSerializer
+
+
+@async_api_view(["GET", "POST"], [permissions.IsAuthenticated])
+async def recipe_list(request):
+    if request.method == "GET":
+        if request.user.is_staff:
+            recipes = Recipe.objects.all()
+        else:
+            recipes = Recipe.objects.filter(owner=request.user)
+
+        serializer = RecipeValuesSerializer(fields=requested_fields(request), expand=requested_expansions(request))
+        ids = requested_ids(request)
+        if ids is None:
+            recipes, ordering = filter_recipes(recipes, request)
+
+        scope = versions.scope_for(request.user)
+        etag, last_modified = versions.validators(request, scope, *await versions.aget_version(scope))
+        not_modified = versions.not_modified(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        if ids is not None:
+            found = {row["id"]: row async for row in serializer.values(recipes.filter(pk__in=ids))}
+            response = Response({
+                "results": serializer.to_representation([found[pk] for pk in ids if pk in found]),
+                "missing": [str(pk) for pk in ids if pk not in found],
+            })
+            return versions.set_validators(response, etag, last_modified)
+
+        paginator = RecipeCursorPagination()
+        query = request.query_params.get("q")
+        if query:
+            recipes = search_recipes(recipes, query)
+            paginator.ordering = "-search_rank"
+        if ordering:
+            paginator.ordering = ordering
+        # Read straight from .values() rows; only the requested columns are fetched
+        recipes = serializer.values(recipes, paginator.ordering.lstrip("-"))
+
+        page = await paginator.apaginate_queryset(recipes, request)
+        response = paginator.get_paginated_response(serializer.to_representation(page))
+        return versions.set_validators(response, etag, last_modified)
+
+    serializer = RecipeSerializer(data=request.data)
+    if serializer.is_valid():
+        serializer.instance = await Recipe.objects.acreate(owner=request.user, **serializer.validated_data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+@async_api_view(["GET", "PUT", "DELETE"], [permissions.IsAuthenticated, IsRecipeOwnerOrAdmin])
+async def recipe_detail(request, pk):
+    fields = requested_fields(request) if request.method == "GET" else None
+    expand = requested_expansions(request) if request.method == "GET" else ()
+    if request.method == "GET" and fields is None and not expand:
+        cached = await recipe_cache.aget_payload(pk)
+        if cached is not None:
+            owner_id, payload = cached
+            if not request.user.is_staff and str(request.user.pk) != owner_id:
+                return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+            etag, last_modified = await versions.arecipe_validators(request, owner_id)
+            not_modified = versions.not_modified(request, etag, last_modified)
+            if not_modified is not None:
+                return not_modified
+            response = HttpResponse(payload, content_type="application/json")
+            return versions.set_validators(response, etag, last_modified)
+
+    recipes = Recipe.objects.all()
+    if expand:
+        recipes = recipes.select_related(*expand)
+    if fields is not None:
+        recipes = load_only(recipes, [*fields, "owner"])
+    try:
+        recipe = await recipes.aget(pk=pk)
+    except Recipe.DoesNotExist:
+        return Response({"error": "Recipe not found"}, status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    # Compare ids: ``recipe.owner`` would be a lazy, synchronous query
+    if not request.user.is_staff and request.user.pk != recipe.owner_id:
+        return Response({"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN)
+
+    if request.method == "GET":
+        etag, last_modified = await versions.arecipe_validators(request, recipe.owner_id)
+        not_modified = versions.not_modified(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        serializer = RecipeSerializer(recipe, fields=fields, expand=expand)
+        if fields is None and not expand:
+            await recipe_cache.aset_payload(recipe, serializer.data)
+        return versions.set_validators(Response(serializer.data), etag, last_modified)
+
+    elif request.method == "PUT":
+        serializer = RecipeSerializer(recipe, data=request.data)
+        if serializer.is_valid():
+            for name, value in serializer.validated_data.items():
+                setattr(recipe, name, value)
+            await recipe.asave()
+            await recipe_cache.aset_payload(recipe, serializer.data)
+            return Response({"message": "Successfully updated", "updated_recipe": serializer.data})
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    await recipe.adelete()
+    return Response({"message": "Successfully deleted"}, status=status.HTTP_200_OK)
+
+
+@async_api_view(["GET"], [permissions.IsAuthenticated])
+async def recipe_export(request):
+    export_type = request.query_params.get("type", "ndjson")
+    if export_type not in STREAMERS:
+        return Response(
+            {"error": f"type must be one of: {', '.join(STREAMERS)}"}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if request.user.is_staff:
+        recipes = Recipe.objects.all()
+    else:
+        recipes = Recipe.objects.filter(owner=request.user)
+    recipes = recipes.order_by("created_at", "pk")
+
+    chunk_size = settings.RECIPE_EXPORT_CHUNK_SIZE
+    # An async iterator, so each chunk is sent as soon as it is read
+    response = StreamingHttpResponse(
+        astream(STREAMERS[export_type](recipes, chunk_size), chunk_size),
+        content_type=CONTENT_TYPES[export_type],
+    )
+    response["Content-Disposition"] = f'attachment; filename="recipes.{export_type}"'
+    return response
+
+
+@async_api_view(["GET"], [permissions.IsAuthenticated])
+async def recipe_changes(request):
+    since = request.query_params.get("since")
+    try:
+        cursor = changes.decode_cursor(since) if since else None
+        wait = changes.parse_wait(request.query_params.get("wait"))
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if cursor is None:
+        return Response({"results": [], "cursor": await changes.ahead(request.user), "has_more": False})
+    # Waiting here only holds a coroutine, not a worker thread
+    page_size = RecipeCursorPagination().get_page_size(request)
+    return Response(await changes.apoll(request.user, cursor, page_size, wait))
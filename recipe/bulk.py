@@ -0,0 +1,117 @@
+import uuid
+
+from django.db import transaction
+
+from . import cache as recipe_cache, changes, versions
+from .ingredients import index_ingredients
+from .models import Recipe, RecipeChange
+from .serializers import RecipeSerializer
+
+
+def _parse_id(value):
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        return None
+
+
+def _errors_or_none(errors):
+    return errors if any(errors) else None
+
+
+class BulkRecipeWrite:
+    """
+    Validate and apply a batch of recipe creates, updates and deletes for
+    ``user``. Everything is validated up front; nothing is written unless
+    every item is valid, and then all writes happen in one transaction with
+    one statement per operation type.
+    """
+
+    def __init__(self, user, create=(), update=(), delete=()):
+        self.user = user
+        self.create_data = list(create)
+        self.update_data = list(update)
+        self.delete_data = list(delete)
+        self.errors = {}
+
+    def visible_recipes(self):
+        if self.user.is_staff:
+            return Recipe.objects.all()
+        return Recipe.objects.filter(owner=self.user)
+
+    def is_valid(self):
+        self.create_serializer = RecipeSerializer(data=self.create_data, many=True)
+        if not self.create_serializer.is_valid():
+            self.errors['create'] = self.create_serializer.errors
+
+        self.update_serializer = RecipeSerializer(data=self.update_data, many=True)
+        update_errors = [{} for _ in self.update_data]
+        if not self.update_serializer.is_valid():
+            update_errors = list(self.update_serializer.errors)
+        update_ids = [
+            _parse_id(item.get('id')) if isinstance(item, dict) else None
+            for item in self.update_data
+        ]
+        self.update_instances = self.visible_recipes().in_bulk(
+            [pk for pk in update_ids if pk is not None]
+        )
+        for index, pk in enumerate(update_ids):
+            if pk not in self.update_instances:
+                update_errors[index] = {**update_errors[index], 'id': ['Recipe not found.']}
+        self.update_ids = update_ids
+        if _errors_or_none(update_errors):
+            self.errors['update'] = update_errors
+
+        delete_ids = [_parse_id(value) for value in self.delete_data]
+        self.delete_owners = dict(
+            self.visible_recipes()
+            .filter(pk__in=[pk for pk in delete_ids if pk is not None])
+            .values_list('pk', 'owner_id')
+        )
+        delete_errors = [
+            {} if pk in self.delete_owners else {'id': ['Recipe not found.']} for pk in delete_ids
+        ]
+        self.delete_ids = delete_ids
+        if _errors_or_none(delete_errors):
+            self.errors['delete'] = delete_errors
+
+        return not self.errors
+
+    def save(self):
+        created = [
+            Recipe(owner=self.user, **data) for data in self.create_serializer.validated_data
+        ]
+        updated = []
+        fields = set()
+        for pk, data in zip(self.update_ids, self.update_serializer.validated_data):
+            recipe = self.update_instances[pk]
+            for name, value in data.items():
+                setattr(recipe, name, value)
+            fields.update(data)
+            updated.append(recipe)
+
+        with transaction.atomic():
+            Recipe.objects.bulk_create(created)
+            if updated:
+                Recipe.objects.bulk_update(updated, sorted(fields))
+            if self.delete_ids:
+                # Deletes go through the collector so the ingredient links cascade
+                self.visible_recipes().filter(pk__in=self.delete_ids).delete()
+                changes.record_deletions(self.delete_owners.items())
+            # bulk_create and bulk_update bypass post_save
+            index_ingredients(created + updated)
+            if created or updated:
+                versions.bump({recipe.owner_id for recipe in created + updated})
+                changes.record(
+                    [(recipe.pk, recipe.owner_id, RecipeChange.CREATED) for recipe in created]
+                    + [(recipe.pk, recipe.owner_id, RecipeChange.UPDATED) for recipe in updated]
+                )
+
+        if updated:
+            recipe_cache.invalidate(*(recipe.pk for recipe in updated))
+
+        return {
+            'created': RecipeSerializer(created, many=True).data,
+            'updated': RecipeSerializer(updated, many=True).data,
+            'deleted': [str(pk) for pk in self.delete_ids],
+        }
@@ -0,0 +1,91 @@
+import threading
+import uuid
+
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+from cooky_recipe_apis.renderers import FastJSONRenderer
+
+CACHE_ALIAS = 'recipes'
+
+_lock = threading.Lock()
+_counters = {'hits': 0, 'misses': 0, 'sets': 0, 'invalidations': 0}
+
+
+def _count(name, amount=1):
+    with _lock:
+        _counters[name] += amount
+
+
+def _key(pk):
+    return f'recipe:{pk}'
+
+
+def _normalize(pk):
+    try:
+        return uuid.UUID(str(pk))
+    except ValueError:
+        return None
+
+
+def get_payload(pk):
+    """
+    Return ``(owner_id, json_bytes)`` for the recipe with primary key ``pk``,
+    or ``None`` if it is not cached.
+    """
+    pk = _normalize(pk)
+    if pk is None:
+        return None
+    cached = caches[CACHE_ALIAS].get(_key(pk))
+    _count('misses' if cached is None else 'hits')
+    return cached
+
+
+async def aget_payload(pk):
+    pk = _normalize(pk)
+    if pk is None:
+        return None
+    cached = await caches[CACHE_ALIAS].aget(_key(pk))
+    _count('misses' if cached is None else 'hits')
+    return cached
+
+
+def _cacheable(recipe):
+    # A replica may lag behind the primary, and a stale row cached from it
+    # would be served to every worker until the cache timeout
+    return recipe._state.db == DEFAULT_DB_ALIAS
+
+
+def set_payload(recipe, data):
+    """
+    Render ``data`` for ``recipe`` to JSON, cache it if ``recipe`` was read
+    from the primary, and return the bytes.
+    """
+    payload = FastJSONRenderer().render(data)
+    if not _cacheable(recipe):
+        return payload
+    caches[CACHE_ALIAS].set(_key(recipe.pk), (str(recipe.owner_id), payload))
+    _count('sets')
+    return payload
+
+
+async def aset_payload(recipe, data):
+    payload = FastJSONRenderer().render(data)
+    if not _cacheable(recipe):
+        return payload
+    await caches[CACHE_ALIAS].aset(_key(recipe.pk), (str(recipe.owner_id), payload))
+    _count('sets')
+    return payload
+
+
+def invalidate(*pks):
+    caches[CACHE_ALIAS].delete_many([_key(pk) for pk in pks])
+    _count('invalidations', len(pks))
+
+
+def get_stats():
+    with _lock:
+        stats = dict(_counters)
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+    return stats
@@ -0,0 +1,196 @@
+"""
+The recipe change log behind ``GET /api/recipes/changes/``.
+
+Every recipe create, update and delete appends a ``RecipeChange`` in the
+writer's transaction: from post_save for single saves, and explicitly from
+``Recipe.delete()``, the bulk endpoint, ``import_recipes`` and, for the
+cascade when a user is deleted, ``record_user_deletion``. Deletes have no
+post_delete receiver: any Recipe delete receiver makes Django load and
+signal a deleted user's recipes one by one instead of deleting them in
+bulk.
+
+A cursor names the last change a client has seen. Ids are allocated at
+insert time but become visible at commit, so on PostgreSQL a change with a
+lower id can appear after a higher one was served. The feed therefore
+orders by the writing transaction's id and only serves transactions older
+than every one still in progress (the snapshot's xmin). A later commit can
+then never land behind a cursor. SQLite commits one writer at a time, so
+id order is commit order there.
+"""
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import BigIntegerField, Func, Q
+from django.db.models.expressions import RawSQL
+
+from . import cache, versions
+from .models import Recipe, RecipeChange
+
+FIELDS = ('id', 'txid', 'recipe_id', 'owner_id', 'action', 'changed_at')
+
+
+def _txid(using):
+    if connections[using].vendor == 'postgresql':
+        return Func(function='txid_current', output_field=BigIntegerField())
+    return 0
+
+
+def record(entries, using=DEFAULT_DB_ALIAS):
+    """Append ``(recipe_id, owner_id, action)`` ``entries`` to the log in one INSERT."""
+    txid = _txid(using)
+    RecipeChange.objects.using(using).bulk_create([
+        RecipeChange(recipe_id=recipe_id, owner_id=owner_id, action=action, txid=txid)
+        for recipe_id, owner_id, action in entries
+    ])
+
+
+def record_deletions(recipes, using=DEFAULT_DB_ALIAS):
+    """
+    Log the deletion of ``(recipe_id, owner_id)`` ``recipes``, bump their
+    owners' collection versions and drop their cached payloads.
+    """
+    recipes = list(recipes)
+    if not recipes:
+        return
+    record([(recipe_id, owner_id, RecipeChange.DELETED) for recipe_id, owner_id in recipes], using)
+    versions.bump({owner_id for _, owner_id in recipes}, using=using)
+    cache.invalidate(*(recipe_id for recipe_id, _ in recipes))
+
+
+def record_user_deletion(user, using):
+    """``record_deletions()`` for all of ``user``'s recipes, before the cascade removes them."""
+    recipe_ids = Recipe.objects.using(using).filter(owner=user).values_list('pk', flat=True)
+    record_deletions([(recipe_id, user.pk) for recipe_id in recipe_ids], using)
+
+
+def encode_cursor(txid, pk):
+    return f'{txid}.{pk}'
+
+
+def decode_cursor(cursor):
+    try:
+        txid, pk = (int(part) for part in cursor.split('.'))
+    except ValueError:
+        raise ValueError('since must be a cursor returned by this endpoint') from None
+    return txid, pk
+
+
+def parse_wait(value):
+    """Seconds to wait for a change, capped at ``RECIPE_CHANGES_MAX_WAIT``."""
+    if value is None:
+        return 0
+    try:
+        wait = float(value)
+        if not 0 <= wait < float('inf'):
+            raise ValueError
+    except ValueError:
+        raise ValueError('wait must be a non-negative number of seconds') from None
+    return min(wait, settings.RECIPE_CHANGES_MAX_WAIT)
+
+
+def visible_changes(user):
+    changes = RecipeChange.objects.all()
+    if not user.is_staff:
+        changes = changes.filter(owner_id=user.pk)
+    if connections[changes.db].vendor == 'postgresql':
+        # Our own transaction's changes count as committed, so a transaction
+        # (a test case, say) can read back what it wrote
+        changes = changes.filter(
+            Q(txid__lt=RawSQL('txid_snapshot_xmin(txid_current_snapshot())', []))
+            | Q(txid=RawSQL('txid_current_if_assigned()', []))
+        )
+    return changes
+
+
+def _after(changes, cursor):
+    txid, pk = cursor
+    return changes.filter(Q(txid__gt=txid) | Q(txid=txid, id__gt=pk)).order_by('txid', 'id')
+
+
+def _head(changes):
+    return changes.order_by('-txid', '-id').values_list('txid', 'id')
+
+
+def _page(rows, cursor, limit):
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if rows:
+        cursor = (rows[-1]['txid'], rows[-1]['id'])
+    return {
+        'results': [
+            {
+                'recipe': row['recipe_id'],
+                'owner': row['owner_id'],
+                'action': row['action'],
+                'changed_at': row['changed_at'],
+            }
+            for row in rows
+        ],
+        'cursor': encode_cursor(*cursor),
+        'has_more': has_more,
+    }
+
+
+def head(user):
+    """The cursor of the newest change ``user`` can see, to start syncing from."""
+    return encode_cursor(*(_head(visible_changes(user)).first() or (0, 0)))
+
+
+async def ahead(user):
+    return encode_cursor(*(await _head(visible_changes(user)).afirst() or (0, 0)))
+
+
+def read(user, cursor, limit):
+    """Return the page of at most ``limit`` changes after the ``(txid, id)`` ``cursor``."""
+    rows = list(_after(visible_changes(user), cursor).values(*FIELDS)[:limit + 1])
+    return _page(rows, cursor, limit)
+
+
+async def aread(user, cursor, limit):
+    rows = [row async for row in _after(visible_changes(user), cursor).values(*FIELDS)[:limit + 1]]
+    return _page(rows, cursor, limit)
+
+
+def _release(using):
+    """
+    Hand the connection back (to the pool, when there is one) while a long
+    poll sleeps, so waiting requests do not hold connections that others
+    need. Inside a transaction it has to stay open.
+    """
+    connection = connections[using]
+    if not connection.in_atomic_block:
+        connection.close()
+
+
+def poll(user, cursor, limit, wait):
+    """
+    ``read()``, but if nothing changed, check again every
+    ``RECIPE_CHANGES_POLL_INTERVAL`` seconds for up to ``wait`` seconds.
+    Each check is one index range scan, and the database connection is
+    released between checks.
+    """
+    deadline = time.monotonic() + wait
+    using = visible_changes(user).db
+    while True:
+        page = read(user, cursor, limit)
+        remaining = deadline - time.monotonic()
+        if page['results'] or remaining <= 0:
+            return page
+        _release(using)
+        time.sleep(min(settings.RECIPE_CHANGES_POLL_INTERVAL, remaining))
+
+
+async def apoll(user, cursor, limit, wait):
+    deadline = time.monotonic() + wait
+    using = visible_changes(user).db
+    while True:
+        page = await aread(user, cursor, limit)
+        remaining = deadline - time.monotonic()
+        if page['results'] or remaining <= 0:
+            return page
+        # The async ORM's connection belongs to the request's sync thread
+        await sync_to_async(_release)(using)
+        await asyncio.sleep(min(settings.RECIPE_CHANGES_POLL_INTERVAL, remaining))
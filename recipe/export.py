@@ -0,0 +1,66 @@
+import csv
+import itertools
+
+from asgiref.sync import sync_to_async
+
+from cooky_recipe_apis.renderers import dumps
+
+from .serializers import RecipeSerializer, RecipeValuesSerializer
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+class _Echo:
+    """File-like object whose write() hands the value straight back to csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def _rows(queryset, chunk_size):
+    serializer = RecipeValuesSerializer()
+    rows = serializer.values(queryset).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(itertools.islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield from serializer.to_representation(chunk)
+
+
+def stream_ndjson(queryset, chunk_size):
+    for row in _rows(queryset, chunk_size):
+        yield dumps(row) + b'\n'
+
+
+def stream_csv(queryset, chunk_size):
+    fields = list(RecipeSerializer().fields)
+    writer = csv.DictWriter(_Echo(), fieldnames=fields)
+    yield writer.writeheader()
+    for row in _rows(queryset, chunk_size):
+        yield writer.writerow(row)
+
+
+STREAMERS = {
+    'ndjson': stream_ndjson,
+    'csv': stream_csv,
+}
+
+
+async def astream(stream, chunk_size):
+    """
+    Iterate over the sync ``stream`` from async code, ``chunk_size`` items
+    per trip to the thread that runs it, rather than letting the ASGI
+    handler buffer the whole export before sending it.
+    """
+    # thread_sensitive: every step must reach the same database connection
+    take = sync_to_async(lambda: list(itertools.islice(stream, chunk_size)), thread_sensitive=True)
+    try:
+        while chunk := await take():
+            for item in chunk:
+                yield item
+    finally:
+        # Ends the query early if the client went away
+        await sync_to_async(stream.close, thread_sensitive=True)()
@@ -0,0 +1,159 @@
+import sys
+import uuid
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import F
+from django.db.models.functions import Collate
+from rest_framework.exceptions import PermissionDenied, ValidationError
+
+from .serializers import EXPANSIONS, RecipeSerializer
+
+# Public ordering names mapped to the column the list is keyed on. Each one
+# has an (owner, column, id) index, so a non-staff page is one range scan
+# that also yields rows in order.
+ORDERINGS = {
+    'created': 'created_at',
+    '-created': '-created_at',
+    'name': 'name',
+    '-name': '-name',
+    'servings': 'number_of_servings',
+    '-servings': '-number_of_servings',
+    'prep_time': 'preparation_seconds',
+    '-prep_time': '-preparation_seconds',
+}
+
+
+def _non_negative_int(query_params, name):
+    value = query_params.get(name)
+    if value is None:
+        return None
+    if not value.isdigit():
+        raise ValidationError({name: ['Must be a non-negative integer.']})
+    return int(value)
+
+
+def prefix_range(prefix):
+    """
+    Return the ``[low, high)`` range, in code point order, of the strings
+    that start with ``prefix``. ``high`` is ``None`` when there is no upper
+    bound, for a prefix made only of U+10FFFF.
+    """
+    # The last code point has no successor: strings starting with "aU+10FFFF"
+    # end where the ones starting with "a" do
+    stem = prefix.rstrip(chr(sys.maxunicode))
+    if not stem:
+        return prefix, None
+    following = ord(stem[-1]) + 1
+    if 0xD800 <= following <= 0xDFFF:
+        # Surrogates can't be stored, so the range ends at the next character
+        following = 0xE000
+    return prefix, stem[:-1] + chr(following)
+
+
+def filter_name_prefix(recipes, prefix):
+    """
+    Keep the recipes whose name starts with ``prefix``, as a range a btree
+    index can answer. The range is only right in code point order, which is
+    SQLite's default; PostgreSQL compares under the "C" collation, whatever
+    the column's own (en_US sorts "{" before "z"), and recipe_owner_name_c_idx
+    covers that expression.
+    """
+    low, high = prefix_range(prefix)
+    name = F('name')
+    if connections[recipes.db].vendor == 'postgresql':
+        name = Collate(name, 'C')
+    # startswith keeps the match exact; the range is what hits the index
+    recipes = recipes.alias(name_key=name).filter(name_key__gte=low, name__startswith=prefix)
+    if high is not None:
+        recipes = recipes.filter(name_key__lt=high)
+    return recipes
+
+
+def requested_fields(request):
+    """
+    Return the serializer fields named in ``?fields=``, or ``None`` when the
+    client wants the full representation.
+    """
+    value = request.query_params.get('fields')
+    if value is None:
+        return None
+    fields = [name.strip() for name in value.split(',') if name.strip()]
+    available = RecipeSerializer().fields
+    unknown = [name for name in fields if name not in available]
+    if not fields or unknown:
+        raise ValidationError({'fields': [f"Must be a comma separated list of: {', '.join(available)}."]})
+    return fields
+
+
+def requested_expansions(request):
+    """Return the relations named in ``?expand=`` to embed in place of their ids."""
+    value = request.query_params.get('expand')
+    if value is None:
+        return ()
+    names = [name.strip() for name in value.split(',') if name.strip()]
+    if not names or any(name not in EXPANSIONS for name in names):
+        raise ValidationError({'expand': [f"Must be a comma separated list of: {', '.join(EXPANSIONS)}."]})
+    return names
+
+
+def requested_ids(request):
+    """
+    Return the recipe ids named in ``?ids=``, in order and without
+    duplicates, or ``None`` for a normal list request.
+    """
+    value = request.query_params.get('ids')
+    if value is None:
+        return None
+    try:
+        ids = list(dict.fromkeys(uuid.UUID(part.strip()) for part in value.split(',') if part.strip()))
+    except ValueError:
+        raise ValidationError({'ids': ['Must be a comma separated list of UUIDs.']})
+    if not ids or len(ids) > settings.RECIPE_MULTI_GET_MAX_IDS:
+        raise ValidationError({'ids': [f'Must name between 1 and {settings.RECIPE_MULTI_GET_MAX_IDS} recipes.']})
+    return ids
+
+
+def load_only(recipes, fields):
+    """Defer every column the response won't use, so wide text columns are never read."""
+    return recipes.only(*fields)
+
+
+def filter_recipes(recipes, request):
+    """
+    Apply the list endpoint's query parameters to ``recipes``. Returns the
+    filtered queryset and the requested ordering, or ``None`` to keep the
+    paginator's default.
+    """
+    query_params = request.query_params
+
+    owner = query_params.get('owner')
+    if owner is not None:
+        if not request.user.is_staff:
+            raise PermissionDenied('Only staff can filter by owner.')
+        try:
+            recipes = recipes.filter(owner_id=uuid.UUID(owner))
+        except ValueError:
+            raise ValidationError({'owner': ['Must be a valid UUID.']})
+
+    min_servings = _non_negative_int(query_params, 'min_servings')
+    if min_servings is not None:
+        recipes = recipes.filter(number_of_servings__gte=min_servings)
+    max_servings = _non_negative_int(query_params, 'max_servings')
+    if max_servings is not None:
+        recipes = recipes.filter(number_of_servings__lte=max_servings)
+
+    name = query_params.get('name')
+    if name:
+        recipes = filter_name_prefix(recipes, name)
+
+    max_prep = _non_negative_int(query_params, 'max_prep')
+    if max_prep is not None:
+        recipes = recipes.filter(preparation_seconds__lte=max_prep * 60)
+
+    ordering = query_params.get('ordering')
+    if ordering is not None:
+        if ordering not in ORDERINGS:
+            raise ValidationError({'ordering': [f"Must be one of: {', '.join(ORDERINGS)}."]})
+        ordering = ORDERINGS[ordering]
+    return recipes, ordering
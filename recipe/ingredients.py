@@ -0,0 +1,77 @@
+import re
+
+UNITS = {
+    'c', 'can', 'cans', 'clove', 'cloves', 'cup', 'cups', 'dash', 'g', 'gram',
+    'grams', 'handful', 'kg', 'l', 'lb', 'lbs', 'liter', 'liters', 'litre',
+    'litres', 'ml', 'ounce', 'ounces', 'oz', 'piece', 'pieces', 'pinch', 'pound',
+    'pounds', 'slice', 'slices', 'stick', 'sticks', 'tablespoon', 'tablespoons',
+    'tbsp', 'teaspoon', 'teaspoons', 'tsp',
+}
+STOP_WORDS = {'a', 'an', 'and', 'of', 'or', 'some', 'the', 'to', 'taste'}
+
+SEPARATORS = re.compile(r'[\n,;]+')
+PARENTHESES = re.compile(r'\([^)]*\)')
+WORD = re.compile(r'[^\W\d_]+')
+
+
+def _singular(word):
+    if len(word) <= 3 or word.endswith('ss'):
+        return word
+    if word.endswith('ies'):
+        return word[:-3] + 'y'
+    if word.endswith('oes'):
+        return word[:-2]
+    if word.endswith('s'):
+        return word[:-1]
+    return word
+
+
+def normalize_ingredient(text):
+    """
+    Reduce a single ingredient line such as ``"2 cups Tomatoes (diced)"`` to
+    its canonical name (``"tomato"``), or ``""`` if nothing is left.
+    """
+    words = WORD.findall(PARENTHESES.sub(' ', text.lower()))
+    words = [_singular(word) for word in words if word not in UNITS and word not in STOP_WORDS]
+    return ' '.join(words)[:255]
+
+
+def parse_ingredients(text):
+    """
+    Split a free-form ingredients field on newlines, commas and semicolons and
+    return the set of normalized ingredient names it mentions.
+    """
+    names = (normalize_ingredient(part) for part in SEPARATORS.split(text or ''))
+    return {name for name in names if name}
+
+
+def index_ingredients(recipes):
+    """
+    Rebuild the ingredient inverted index rows for ``recipes`` with a fixed
+    number of queries regardless of how many recipes are passed in.
+    """
+    from .models import Ingredient, Recipe, RecipeIngredient
+
+    parsed = {recipe.pk: parse_ingredients(recipe.ingredients) for recipe in recipes}
+    if not parsed:
+        return
+    names = set().union(*parsed.values())
+
+    Ingredient.objects.bulk_create([Ingredient(name=name) for name in names], ignore_conflicts=True)
+    ingredient_ids = dict(Ingredient.objects.filter(name__in=names).values_list('name', 'id'))
+
+    RecipeIngredient.objects.filter(recipe__in=parsed.keys()).delete()
+    RecipeIngredient.objects.bulk_create([
+        RecipeIngredient(recipe_id=recipe_id, ingredient_id=ingredient_ids[name])
+        for recipe_id, recipe_names in parsed.items()
+        for name in recipe_names
+    ])
+
+    changed = []
+    for recipe in recipes:
+        count = len(parsed[recipe.pk])
+        if recipe.ingredient_count != count:
+            recipe.ingredient_count = count
+            changed.append(recipe)
+    if changed:
+        Recipe.objects.bulk_update(changed, ['ingredient_count'])
@@ -0,0 +1,162 @@
+import csv
+import io
+import json
+import os
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router, transaction
+from rest_framework.exceptions import ValidationError
+
+from recipe import changes, versions
+from recipe.ingredients import index_ingredients, parse_ingredients
+from recipe.models import Recipe, RecipeChange, RecipeImportCheckpoint
+from recipe.serializers import RecipeSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Import recipes from a JSONL or CSV file in batches. Progress is "
+        "checkpointed in the database, so rerunning the same command after a "
+        "crash resumes where the previous run stopped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="JSONL or CSV file to import")
+        parser.add_argument("--owner", required=True, help="Email of the user who will own the recipes")
+        parser.add_argument("--format", choices=["jsonl", "csv"], help="Defaults to the file extension")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--restart", action="store_true", help="Ignore any checkpoint and import from the start"
+        )
+
+    def handle(self, *args, **options):
+        path = os.path.abspath(options["path"])
+        if not os.path.exists(path):
+            raise CommandError(f"{path} does not exist")
+        file_format = options["format"] or ("csv" if path.endswith(".csv") else "jsonl")
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be positive")
+
+        User = get_user_model()
+        try:
+            self.owner = User.objects.get(email=options["owner"])
+        except User.DoesNotExist:
+            raise CommandError(f"No user with email {options['owner']}")
+
+        self.using = router.db_for_write(Recipe)
+        self.serializer = RecipeSerializer()
+        checkpoint, _ = RecipeImportCheckpoint.objects.using(self.using).get_or_create(source=path)
+        if options["restart"]:
+            checkpoint.position = checkpoint.rows_imported = checkpoint.rows_rejected = 0
+            checkpoint.save(using=self.using)
+        elif checkpoint.position:
+            self.stdout.write(
+                f"Resuming {path} after {checkpoint.rows_imported} imported rows at byte {checkpoint.position}"
+            )
+
+        started = time.monotonic()
+        imported = 0
+        with open(path, "rb") as source:
+            rows = self.read_csv(source, checkpoint) if file_format == "csv" else self.read_jsonl(source, checkpoint)
+            batch = []
+            for line_number, position, row in rows:
+                recipe = self.build_recipe(line_number, row)
+                if recipe is None:
+                    checkpoint.rows_rejected += 1
+                else:
+                    batch.append(recipe)
+                if len(batch) >= batch_size:
+                    self.write_batch(batch, checkpoint, position)
+                    imported += len(batch)
+                    self.report(imported, started)
+                    batch = []
+                checkpoint.position = position
+            self.write_batch(batch, checkpoint, checkpoint.position)
+            imported += len(batch)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} rows in {elapsed:.1f}s ({imported / elapsed if elapsed else 0:.0f} rows/s), "
+            f"{checkpoint.rows_rejected} rejected in total"
+        ))
+
+    def read_jsonl(self, source, checkpoint):
+        source.seek(checkpoint.position)
+        line_number = 0
+        for line in iter(source.readline, b""):
+            line_number += 1
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                row = e
+            yield line_number, source.tell(), row
+
+    def read_csv(self, source, checkpoint):
+        lines = (line.decode("utf-8") for line in iter(source.readline, b""))
+        reader = csv.reader(lines)
+        header = next(reader, None)
+        if header is None:
+            return
+        if checkpoint.position:
+            source.seek(checkpoint.position)
+        for row in reader:
+            # Empty cells fall back to the serializer defaults
+            yield reader.line_num, source.tell(), {key: value for key, value in zip(header, row) if value != ""}
+
+    def build_recipe(self, line_number, row):
+        if not isinstance(row, dict):
+            self.stderr.write(f"Line {line_number}: not a JSON object ({row})")
+            return None
+        try:
+            data = self.serializer.run_validation(row)
+        except ValidationError as e:
+            self.stderr.write(f"Line {line_number}: {json.dumps(e.detail)}")
+            return None
+        recipe = Recipe(owner=self.owner, **data)
+        # Set up front so index_ingredients() does not have to UPDATE the batch
+        recipe.ingredient_count = len(parse_ingredients(recipe.ingredients))
+        return recipe
+
+    def write_batch(self, batch, checkpoint, position):
+        with transaction.atomic(using=self.using):
+            if batch:
+                if connections[self.using].vendor == "postgresql":
+                    self.copy_batch(batch)
+                else:
+                    Recipe.objects.using(self.using).bulk_create(batch)
+                index_ingredients(batch)
+                versions.bump({recipe.owner_id for recipe in batch}, using=self.using)
+                changes.record(
+                    [(recipe.pk, recipe.owner_id, RecipeChange.CREATED) for recipe in batch], using=self.using
+                )
+            checkpoint.position = position
+            checkpoint.rows_imported += len(batch)
+            checkpoint.save(using=self.using)
+
+    def copy_batch(self, batch):
+        connection = connections[self.using]
+        fields = Recipe._meta.concrete_fields
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, quoting=csv.QUOTE_NONNUMERIC)
+        for recipe in batch:
+            writer.writerow([
+                field.get_db_prep_save(getattr(recipe, field.attname), connection) for field in fields
+            ])
+        columns = ", ".join(connection.ops.quote_name(field.column) for field in fields)
+        sql = f"COPY {connection.ops.quote_name(Recipe._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv)"
+        with connection.cursor() as cursor:
+            if hasattr(cursor.cursor, "copy_expert"):
+                buffer.seek(0)
+                cursor.cursor.copy_expert(sql, buffer)
+            else:
+                with cursor.cursor.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+
+    def report(self, imported, started):
+        elapsed = time.monotonic() - started
+        self.stdout.write(f"{imported} rows imported ({imported / elapsed if elapsed else 0:.0f} rows/s)")
@@ -0,0 +1,100 @@
+from django.db import migrations
+
+# The SQL is copied rather than imported from recipe.search, so this
+# migration keeps doing what it did when it was written.
+SEARCH_CONFIG = 'english'
+SQLITE_FTS_TABLE = 'recipe_recipe_fts'
+
+# PostgreSQL keeps a weighted tsvector column on recipe_recipe in sync with a
+# trigger.
+POSTGRES_INSTALL_SQL = [
+    "ALTER TABLE recipe_recipe ADD COLUMN search_vector tsvector",
+    """
+    CREATE FUNCTION recipe_recipe_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector :=
+            setweight(to_tsvector('{config}', coalesce(NEW.name, '')), 'A') ||
+            setweight(to_tsvector('{config}', coalesce(NEW.ingredients, '')), 'B') ||
+            setweight(to_tsvector('{config}', coalesce(NEW.instructions, '')), 'C');
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """.format(config=SEARCH_CONFIG),
+    """
+    CREATE TRIGGER recipe_recipe_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, ingredients, instructions ON recipe_recipe
+    FOR EACH ROW EXECUTE FUNCTION recipe_recipe_search_vector_update()
+    """,
+    # Fire the trigger once for every existing row to backfill the column
+    "UPDATE recipe_recipe SET name = name",
+    "CREATE INDEX recipe_search_vector_idx ON recipe_recipe USING GIN (search_vector)",
+]
+
+POSTGRES_UNINSTALL_SQL = [
+    "DROP TRIGGER IF EXISTS recipe_recipe_search_vector_trigger ON recipe_recipe",
+    "DROP FUNCTION IF EXISTS recipe_recipe_search_vector_update()",
+    "ALTER TABLE recipe_recipe DROP COLUMN IF EXISTS search_vector",
+]
+
+# SQLite uses an external-content FTS5 table keyed on the implicit rowid of
+# recipe_recipe; 0012_recipe_search_key replaces it.
+SQLITE_INSTALL_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} USING fts5(
+        name, ingredients, instructions, content='recipe_recipe'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ai AFTER INSERT ON recipe_recipe BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, name, ingredients, instructions)
+        VALUES (new.rowid, new.name, new.ingredients, new.instructions);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ad AFTER DELETE ON recipe_recipe BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, name, ingredients, instructions)
+        VALUES ('delete', old.rowid, old.name, old.ingredients, old.instructions);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_au AFTER UPDATE ON recipe_recipe BEGIN
+        INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}, rowid, name, ingredients, instructions)
+        VALUES ('delete', old.rowid, old.name, old.ingredients, old.instructions);
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, name, ingredients, instructions)
+        VALUES (new.rowid, new.name, new.ingredients, new.instructions);
+    END
+    """,
+    f"INSERT INTO {SQLITE_FTS_TABLE}({SQLITE_FTS_TABLE}) VALUES ('rebuild')",
+]
+
+
+def install_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        for statement in POSTGRES_INSTALL_SQL:
+            schema_editor.execute(statement)
+    elif connection.vendor == 'sqlite':
+        for statement in SQLITE_INSTALL_SQL:
+            schema_editor.execute(statement)
+
+
+def uninstall_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'postgresql':
+        for statement in POSTGRES_UNINSTALL_SQL:
+            schema_editor.execute(statement)
+    elif connection.vendor == 'sqlite':
+        for suffix in ('ai', 'ad', 'au'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS {SQLITE_FTS_TABLE}_{suffix}')
+        schema_editor.execute(f'DROP TABLE IF EXISTS {SQLITE_FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0003_recipe_created_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_index, uninstall_search_index),
+    ]
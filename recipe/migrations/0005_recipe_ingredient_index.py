@@ -0,0 +1,102 @@
+# Generated by Django 5.0.14 on 2026-10-18 15:48
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# The parser is copied rather than imported from recipe.ingredients, so
+# this migration keeps doing what it did when it was written.
+UNITS = {
+    'c', 'can', 'cans', 'clove', 'cloves', 'cup', 'cups', 'dash', 'g', 'gram',
+    'grams', 'handful', 'kg', 'l', 'lb', 'lbs', 'liter', 'liters', 'litre',
+    'litres', 'ml', 'ounce', 'ounces', 'oz', 'piece', 'pieces', 'pinch', 'pound',
+    'pounds', 'slice', 'slices', 'stick', 'sticks', 'tablespoon', 'tablespoons',
+    'tbsp', 'teaspoon', 'teaspoons', 'tsp',
+}
+STOP_WORDS = {'a', 'an', 'and', 'of', 'or', 'some', 'the', 'to', 'taste'}
+
+SEPARATORS = re.compile(r'[\n,;]+')
+PARENTHESES = re.compile(r'\([^)]*\)')
+WORD = re.compile(r'[^\W\d_]+')
+
+
+def _singular(word):
+    if len(word) <= 3 or word.endswith('ss'):
+        return word
+    if word.endswith('ies'):
+        return word[:-3] + 'y'
+    if word.endswith('oes'):
+        return word[:-2]
+    if word.endswith('s'):
+        return word[:-1]
+    return word
+
+
+def normalize_ingredient(text):
+    words = WORD.findall(PARENTHESES.sub(' ', text.lower()))
+    words = [_singular(word) for word in words if word not in UNITS and word not in STOP_WORDS]
+    return ' '.join(words)[:255]
+
+
+def parse_ingredients(text):
+    names = (normalize_ingredient(part) for part in SEPARATORS.split(text or ''))
+    return {name for name in names if name}
+
+
+def backfill_ingredient_index(apps, schema_editor):
+    Recipe = apps.get_model('recipe', 'Recipe')
+    Ingredient = apps.get_model('recipe', 'Ingredient')
+    RecipeIngredient = apps.get_model('recipe', 'RecipeIngredient')
+
+    ingredient_ids = {}
+    recipes = Recipe.objects.order_by('pk').only('id', 'ingredients')
+    batch = list(recipes[:1000])
+    while batch:
+        links = []
+        for recipe in batch:
+            names = parse_ingredients(recipe.ingredients)
+            missing = names - ingredient_ids.keys()
+            if missing:
+                Ingredient.objects.bulk_create([Ingredient(name=name) for name in missing], ignore_conflicts=True)
+                ingredient_ids.update(Ingredient.objects.filter(name__in=missing).values_list('name', 'id'))
+            links.extend(RecipeIngredient(recipe_id=recipe.id, ingredient_id=ingredient_ids[name]) for name in names)
+            recipe.ingredient_count = len(names)
+        RecipeIngredient.objects.bulk_create(links)
+        Recipe.objects.bulk_update(batch, ['ingredient_count'])
+        batch = list(recipes.filter(pk__gt=batch[-1].pk)[:1000])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0004_recipe_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ingredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='ingredient_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='RecipeIngredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipe_links', to='recipe.ingredient')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingredient_links', to='recipe.recipe')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='recipeingredient',
+            constraint=models.UniqueConstraint(fields=('ingredient', 'recipe'), name='recipe_ingredient_unique'),
+        ),
+        migrations.RunPython(backfill_ingredient_index, migrations.RunPython.noop),
+    ]
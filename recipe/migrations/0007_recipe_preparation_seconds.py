@@ -0,0 +1,51 @@
+# Generated by Django 5.0.14 on 2026-10-18 15:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def preparation_seconds(preparation_time):
+    # Copied rather than imported from recipe.models, so this migration
+    # keeps doing what it did when it was written
+    try:
+        hours, minutes, seconds = (int(part) for part in preparation_time.split(':'))
+    except (AttributeError, ValueError):
+        return 0
+    return hours * 3600 + minutes * 60 + seconds
+
+
+def backfill_preparation_seconds(apps, schema_editor):
+    Recipe = apps.get_model('recipe', 'Recipe')
+    recipes = Recipe.objects.order_by('pk').only('id', 'preparation_time')
+    batch = list(recipes[:1000])
+    while batch:
+        for recipe in batch:
+            recipe.preparation_seconds = preparation_seconds(recipe.preparation_time)
+        Recipe.objects.bulk_update(batch, ['preparation_seconds'])
+        batch = list(recipes.filter(pk__gt=batch[-1].pk)[:1000])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0006_recipe_import_checkpoint'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='preparation_seconds',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        # Backfill before the indexes exist so the updates don't maintain them
+        migrations.RunPython(backfill_preparation_seconds, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['preparation_seconds', 'id'], name='recipe_prep_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['owner', 'preparation_seconds', 'id'], name='recipe_owner_prep_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.14 on 2026-10-18 16:22
+
+import cooky_recipe_apis.ids
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0008_recipe_owner_filter_indexes'),
+    ]
+
+    # The default is applied by Django, not the database: only the migration
+    # state changes, and existing ids and the table itself are left alone.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='recipe',
+                    name='id',
+                    field=models.UUIDField(default=cooky_recipe_apis.ids.uuid7, editable=False, primary_key=True, serialize=False),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.14 on 2026-10-18 16:25
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0009_recipe_uuid7_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeCollectionVersion',
+            fields=[
+                ('scope', models.CharField(max_length=36, primary_key=True, serialize=False)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.14 on 2026-10-18 16:29
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0010_recipe_collection_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipe_id', models.UUIDField()),
+                ('owner_id', models.UUIDField()),
+                ('action', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('deleted', 'Deleted')], max_length=7)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('txid', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['txid', 'id'], name='recipe_change_idx'), models.Index(fields=['owner_id', 'txid', 'id'], name='recipe_change_owner_idx')],
+            },
+        ),
+    ]
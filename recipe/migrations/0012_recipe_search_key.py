@@ -0,0 +1,113 @@
+from django.db import migrations
+
+# The SQL is copied rather than imported from recipe.search, so this
+# migration keeps doing what it did when it was written.
+OLD_FTS_TABLE = 'recipe_recipe_fts'
+FTS_TABLE = 'recipe_recipe_search'
+KEY_TABLE = 'recipe_recipe_search_key'
+
+
+def _key(table):
+    return f"(SELECT id FROM {KEY_TABLE} WHERE recipe_id = {table}.id)"
+
+
+INSTALL_SQL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {KEY_TABLE} (
+        id INTEGER PRIMARY KEY, recipe_id char(32) NOT NULL UNIQUE
+    )
+    """,
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(name, ingredients, instructions)",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON recipe_recipe BEGIN
+        INSERT INTO {KEY_TABLE}(recipe_id) VALUES (new.id);
+        INSERT INTO {FTS_TABLE}(rowid, name, ingredients, instructions)
+        VALUES ({_key('new')}, new.name, new.ingredients, new.instructions);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON recipe_recipe BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = {_key('old')};
+        DELETE FROM {KEY_TABLE} WHERE recipe_id = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au
+    AFTER UPDATE OF name, ingredients, instructions ON recipe_recipe BEGIN
+        UPDATE {FTS_TABLE}
+        SET name = new.name, ingredients = new.ingredients, instructions = new.instructions
+        WHERE rowid = {_key('new')};
+    END
+    """,
+    f"INSERT INTO {KEY_TABLE}(recipe_id) SELECT id FROM recipe_recipe",
+    f"""
+    INSERT INTO {FTS_TABLE}(rowid, name, ingredients, instructions)
+    SELECT k.id, r.name, r.ingredients, r.instructions
+    FROM {KEY_TABLE} k JOIN recipe_recipe r ON r.id = k.recipe_id
+    """,
+]
+
+# The external-content index of 0004_recipe_search, keyed on the rowid
+OLD_INSTALL_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {OLD_FTS_TABLE} USING fts5(
+        name, ingredients, instructions, content='recipe_recipe'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {OLD_FTS_TABLE}_ai AFTER INSERT ON recipe_recipe BEGIN
+        INSERT INTO {OLD_FTS_TABLE}(rowid, name, ingredients, instructions)
+        VALUES (new.rowid, new.name, new.ingredients, new.instructions);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {OLD_FTS_TABLE}_ad AFTER DELETE ON recipe_recipe BEGIN
+        INSERT INTO {OLD_FTS_TABLE}({OLD_FTS_TABLE}, rowid, name, ingredients, instructions)
+        VALUES ('delete', old.rowid, old.name, old.ingredients, old.instructions);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {OLD_FTS_TABLE}_au AFTER UPDATE ON recipe_recipe BEGIN
+        INSERT INTO {OLD_FTS_TABLE}({OLD_FTS_TABLE}, rowid, name, ingredients, instructions)
+        VALUES ('delete', old.rowid, old.name, old.ingredients, old.instructions);
+        INSERT INTO {OLD_FTS_TABLE}(rowid, name, ingredients, instructions)
+        VALUES (new.rowid, new.name, new.ingredients, new.instructions);
+    END
+    """,
+    f"INSERT INTO {OLD_FTS_TABLE}({OLD_FTS_TABLE}) VALUES ('rebuild')",
+]
+
+
+def drop(schema_editor, fts_table, *tables):
+    for suffix in ('ai', 'ad', 'au'):
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {fts_table}_{suffix}')
+    for table in (fts_table, *tables):
+        schema_editor.execute(f'DROP TABLE IF EXISTS {table}')
+
+
+def key_search_index(apps, schema_editor):
+    # PostgreSQL's tsvector column lives on recipe_recipe itself
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    drop(schema_editor, OLD_FTS_TABLE)
+    for statement in INSTALL_SQL:
+        schema_editor.execute(statement)
+
+
+def unkey_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    drop(schema_editor, FTS_TABLE, KEY_TABLE)
+    for statement in OLD_INSTALL_SQL:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0011_recipe_change'),
+    ]
+
+    operations = [
+        migrations.RunPython(key_search_index, unkey_search_index),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+# The ?name= prefix range compares names under the "C" collation on
+# PostgreSQL (see recipe.filters.filter_name_prefix), which the
+# recipe_owner_name_idx in the column's collation cannot answer. SQLite
+# already compares in code point order, so it needs no second index.
+INDEX = 'recipe_owner_name_c_idx'
+
+
+def add_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {INDEX} ON recipe_recipe (owner_id, (name COLLATE "C"), id)'
+        )
+
+
+def remove_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipe', '0012_recipe_search_key'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_index, remove_index),
+    ]
@@ -1,10 +1,24 @@
-from django.db import models
+from django.db import models, router, transaction
+from django.utils import timezone
 from users.models import CustomUser
-import uuid
+from cooky_recipe_apis.ids import uuid7
 from django.core.validators import URLValidator, MinValueValidator, RegexValidator
 
+
+def preparation_seconds(preparation_time):
+    """
+    Convert an ``"HH:MM:SS"`` preparation time to seconds. Values that do
+    not match the format count as 0.
+    """
+    try:
+        hours, minutes, seconds = (int(part) for part in preparation_time.split(':'))
+    except (AttributeError, ValueError):
+        return 0
+    return hours * 3600 + minutes * 60 + seconds
+
+
 class Recipe(models.Model):
-    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
     name = models.CharField(max_length=255)
     number_of_servings = models.PositiveIntegerField(
         validators=[MinValueValidator(1)]
@@ -25,6 +39,110 @@ class Recipe(models.Model):
     instructions = models.TextField()
     ingredients = models.TextField()
     owner = models.ForeignKey(CustomUser, on_delete=models.CASCADE)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
+    ingredient_count = models.PositiveIntegerField(default=0, editable=False)
+    # Derived from preparation_time so prep time filters and sorts are index scans
+    preparation_seconds = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='recipe_created_idx'),
+            models.Index(fields=['owner', 'created_at', 'id'], name='recipe_owner_created_idx'),
+            models.Index(fields=['preparation_seconds', 'id'], name='recipe_prep_idx'),
+            models.Index(fields=['owner', 'preparation_seconds', 'id'], name='recipe_owner_prep_idx'),
+            models.Index(fields=['owner', 'number_of_servings', 'id'], name='recipe_owner_servings_idx'),
+            models.Index(fields=['owner', 'name', 'id'], name='recipe_owner_name_idx'),
+        ]
+
+    def __str__(self):
+        return self.title
+
+    def save(self, *args, **kwargs):
+        self.preparation_seconds = preparation_seconds(self.preparation_time)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'preparation_time' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'preparation_seconds'}
+        # post_save writes the change log; it must commit with the row
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using, savepoint=False):
+            super().save(*args, **kwargs)
+
+    def delete(self, using=None, keep_parents=False):
+        # Recorded here rather than from post_delete, which would stop a
+        # deleted user's recipes from being deleted in bulk
+        from .changes import record_deletions
+
+        using = using or router.db_for_write(type(self), instance=self)
+        recipe_id, owner_id = self.pk, self.owner_id
+        with transaction.atomic(using=using, savepoint=False):
+            deleted = super().delete(using=using, keep_parents=keep_parents)
+            record_deletions([(recipe_id, owner_id)], using)
+        return deleted
+
+
+class Ingredient(models.Model):
+    name = models.CharField(max_length=255, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class RecipeIngredient(models.Model):
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='ingredient_links')
+    ingredient = models.ForeignKey(Ingredient, on_delete=models.CASCADE, related_name='recipe_links')
+
+    class Meta:
+        constraints = [
+            # Doubles as the inverted index from ingredient to recipes
+            models.UniqueConstraint(fields=['ingredient', 'recipe'], name='recipe_ingredient_unique'),
+        ]
+
+
+class RecipeImportCheckpoint(models.Model):
+    # Written in the same transaction as each imported batch, so a resumed
+    # import never loses or duplicates rows.
+    source = models.CharField(max_length=1024, unique=True)
+    position = models.BigIntegerField(default=0)
+    rows_imported = models.BigIntegerField(default=0)
+    rows_rejected = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.source
+
+
+class RecipeCollectionVersion(models.Model):
+    # One row per owner, keyed by the owner id, plus versions.GLOBAL_SCOPE for
+    # every recipe (what staff see). Bumped after each write; see versions.py.
+    scope = models.CharField(max_length=36, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f'{self.scope}@{self.version}'
+
+
+class RecipeChange(models.Model):
+    # Outbox of recipe writes, served by the changes feed (see changes.py).
+    # Plain ids rather than foreign keys: entries outlive their recipe and owner.
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    ACTIONS = [(CREATED, 'Created'), (UPDATED, 'Updated'), (DELETED, 'Deleted')]
+
+    recipe_id = models.UUIDField()
+    owner_id = models.UUIDField()
+    action = models.CharField(max_length=7, choices=ACTIONS)
+    changed_at = models.DateTimeField(default=timezone.now)
+    # Id of the writing PostgreSQL transaction, 0 elsewhere; the feed is
+    # read in (txid, id) order
+    txid = models.BigIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['txid', 'id'], name='recipe_change_idx'),
+            models.Index(fields=['owner_id', 'txid', 'id'], name='recipe_change_owner_idx'),
+        ]
 
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return f'{self.action} {self.recipe_id}'
@@ -0,0 +1,113 @@
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = 'english'
+
+# PostgreSQL keeps a weighted tsvector column on recipe_recipe in sync with a
+# trigger; see migration 0004_recipe_search.
+
+# SQLite keeps a copy of the searchable columns in an FTS5 table. FTS5 rows
+# are addressed by integer rowids, and recipe_recipe's implicit rowid is not
+# stable (VACUUM may renumber it, as the primary key is a UUID), so every
+# recipe id gets an integer key of its own in SQLITE_FTS_KEY_TABLE. SQLite
+# rebuilds recipe_recipe (dropping its triggers) on most schema changes, so
+# these statements are (re)applied after every migrate run; see migration
+# 0012_recipe_search_key.
+SQLITE_FTS_TABLE = 'recipe_recipe_search'
+SQLITE_FTS_KEY_TABLE = 'recipe_recipe_search_key'
+
+
+def _sqlite_key(table):
+    return f"(SELECT id FROM {SQLITE_FTS_KEY_TABLE} WHERE recipe_id = {table}.id)"
+
+
+SQLITE_INSTALL_SQL = [
+    f"""
+    CREATE TABLE IF NOT EXISTS {SQLITE_FTS_KEY_TABLE} (
+        id INTEGER PRIMARY KEY, recipe_id char(32) NOT NULL UNIQUE
+    )
+    """,
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SQLITE_FTS_TABLE} USING fts5(name, ingredients, instructions)",
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ai AFTER INSERT ON recipe_recipe BEGIN
+        INSERT INTO {SQLITE_FTS_KEY_TABLE}(recipe_id) VALUES (new.id);
+        INSERT INTO {SQLITE_FTS_TABLE}(rowid, name, ingredients, instructions)
+        VALUES ({_sqlite_key('new')}, new.name, new.ingredients, new.instructions);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_ad AFTER DELETE ON recipe_recipe BEGIN
+        DELETE FROM {SQLITE_FTS_TABLE} WHERE rowid = {_sqlite_key('old')};
+        DELETE FROM {SQLITE_FTS_KEY_TABLE} WHERE recipe_id = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SQLITE_FTS_TABLE}_au
+    AFTER UPDATE OF name, ingredients, instructions ON recipe_recipe BEGIN
+        UPDATE {SQLITE_FTS_TABLE}
+        SET name = new.name, ingredients = new.ingredients, instructions = new.instructions
+        WHERE rowid = {_sqlite_key('new')};
+    END
+    """,
+    # Rebuild both tables from scratch: rows copied by a table rebuild did
+    # not go through the triggers
+    f"DELETE FROM {SQLITE_FTS_TABLE}",
+    f"DELETE FROM {SQLITE_FTS_KEY_TABLE}",
+    f"INSERT INTO {SQLITE_FTS_KEY_TABLE}(recipe_id) SELECT id FROM recipe_recipe",
+    f"""
+    INSERT INTO {SQLITE_FTS_TABLE}(rowid, name, ingredients, instructions)
+    SELECT k.id, r.name, r.ingredients, r.instructions
+    FROM {SQLITE_FTS_KEY_TABLE} k JOIN recipe_recipe r ON r.id = k.recipe_id
+    """,
+]
+
+
+def install_sqlite_index(connection):
+    with connection.cursor() as cursor:
+        for statement in SQLITE_INSTALL_SQL:
+            cursor.execute(statement)
+
+
+def search_recipes(queryset, query):
+    """
+    Filter ``queryset`` down to recipes matching ``query`` and annotate each
+    row with a ``search_rank`` where higher means more relevant.
+    """
+    vendor = connections[queryset.db].vendor
+
+    if vendor == 'postgresql':
+        tsquery = f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+        return queryset.filter(
+            RawSQL(f"recipe_recipe.search_vector @@ {tsquery}", (query,), output_field=BooleanField())
+        ).annotate(
+            # Cast to float8 so the rank survives the round trip through a cursor
+            search_rank=RawSQL(
+                f"ts_rank(recipe_recipe.search_vector, {tsquery})::float8", (query,), output_field=FloatField()
+            )
+        )
+
+    if vendor == 'sqlite':
+        terms = re.findall(r'\w+', query)
+        if not terms:
+            return queryset.none().annotate(search_rank=Value(0.0, output_field=FloatField()))
+        match = ' '.join('"%s"' % term for term in terms)
+        matching_keys = f"SELECT rowid FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH %s"
+        return queryset.filter(
+            pk__in=RawSQL(f"SELECT recipe_id FROM {SQLITE_FTS_KEY_TABLE} WHERE id IN ({matching_keys})", (match,))
+        ).annotate(
+            # bm25() is lower for better matches; the rowid lookup makes the
+            # MATCH a seek to one row
+            search_rank=RawSQL(
+                f"SELECT -rank FROM {SQLITE_FTS_TABLE} WHERE {SQLITE_FTS_TABLE} MATCH %s"
+                f" AND rowid = {_sqlite_key('recipe_recipe')}",
+                (match,),
+                output_field=FloatField(),
+            )
+        )
+
+    return queryset.filter(
+        Q(name__icontains=query) | Q(ingredients__icontains=query) | Q(instructions__icontains=query)
+    ).annotate(search_rank=Value(0.0, output_field=FloatField()))
@@ -1,7 +1,25 @@
-from rest_framework import serializers
-from .models import Recipe
+import datetime
+import operator
+
+from django.db import models
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+from users.models import CustomUser
+from .models import Recipe, preparation_seconds
 from django.core.validators import URLValidator, MinValueValidator, RegexValidator
 
+
+class RecipeOwnerSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = CustomUser
+        fields = ['id', 'name', 'email']
+
+
+# ?expand= names mapped to the serializer that embeds the related object
+EXPANSIONS = {'owner': RecipeOwnerSerializer}
+
+
 class RecipeSerializer(serializers.ModelSerializer):
     number_of_servings = serializers.IntegerField(default=1, validators=[MinValueValidator(1)])
     main_image = serializers.URLField(default="https://picsum.photos/seed/picsum/200/300", validators=[URLValidator()])
@@ -18,9 +36,25 @@ class RecipeSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Recipe
-        fields = '__all__'
+        exclude = ['ingredient_count', 'preparation_seconds']
         extra_kwargs = {'owner': {'read_only': True}}
 
+    def __init__(self, *args, fields=None, expand=(), **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            # Sparse fieldset: only render the requested fields
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in expand:
+            if name in self.fields:
+                self.fields[name] = EXPANSIONS[name](read_only=True)
+
+    def validate(self, attrs):
+        # Keep the indexed copy in sync for bulk writes, which bypass Recipe.save()
+        if 'preparation_time' in attrs:
+            attrs['preparation_seconds'] = preparation_seconds(attrs['preparation_time'])
+        return attrs
+
     def create(self, validated_data):
         # Get the current user from the request
         user = self.context['request'].user
@@ -29,4 +63,171 @@ class RecipeSerializer(serializers.ModelSerializer):
         validated_data['owner'] = user
 
         # Call the default create method to save the instance
-        return super().create(validated_data)
\ No newline at end of file
+        return super().create(validated_data)
+
+
+
+def _nullable(converter):
+    def convert(value):
+        return None if value is None else converter(value)
+    return convert
+
+
+class _Memo(dict):
+    """``memo[value]`` is ``convert(value)``, computed once per distinct value."""
+
+    def __init__(self, convert):
+        self.convert = convert
+
+    def __missing__(self, value):
+        result = self[value] = self.convert(value)
+        return result
+
+
+def _row_converter(plan):
+    """
+    Return a function applying ``plan`` to a row. Copied columns are read
+    with one ``operator.itemgetter`` call and zipped with the output names,
+    then only the converted and expanded fields are filled in, so a row
+    with no conversions never goes through Python-level per-field code.
+    """
+    names = tuple(name for name, _, _ in plan)
+    # An expansion reads one of its own columns as a placeholder, which
+    # keeps every output key in the serializer's order
+    columns = [column[0][1] if type(column) is tuple else column for _, column, _ in plan]
+    if len(columns) > 1:
+        get = operator.itemgetter(*columns)
+    else:
+        # itemgetter() of a single key returns the bare value
+        column, = columns
+
+        def get(row):
+            return (row[column],)
+    converted = tuple((name, convert) for name, column, convert in plan if convert is not None)
+    expanded = tuple((name, _row_converter(column)) for name, column, _ in plan if type(column) is tuple)
+
+    if not converted and not expanded:
+        def convert_row(row):
+            return dict(zip(names, get(row)))
+    elif not expanded:
+        def convert_row(row):
+            result = dict(zip(names, get(row)))
+            for name, convert in converted:
+                result[name] = convert(result[name])
+            return result
+    else:
+        def convert_row(row):
+            result = dict(zip(names, get(row)))
+            for name, convert in converted:
+                result[name] = convert(result[name])
+            for name, convert_related in expanded:
+                result[name] = convert_related(row)
+            return result
+    return convert_row
+
+
+def _iso_datetime(field):
+    """
+    DRF's ISO 8601 ``DateTimeField.to_representation`` with the field's
+    timezone looked up once rather than for every value.
+    """
+    tz = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+    utc = tz is not None and str(tz) in ('UTC', 'Etc/UTC')
+
+    def convert(value):
+        if utc and value.tzinfo is datetime.timezone.utc:
+            # What the database returns with USE_TZ; converting is a no-op
+            return value.isoformat()[:-6] + 'Z'
+        if tz is not None:
+            value = value.astimezone(tz) if timezone.is_aware(value) else timezone.make_aware(value, tz)
+        elif timezone.is_aware(value):
+            value = timezone.make_naive(value, datetime.timezone.utc)
+        value = value.isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
+
+
+class RecipeValuesSerializer:
+    """
+    Read-only fast path for rendering many recipes.
+
+    Builds the same representation as ``RecipeSerializer`` straight from
+    ``.values()`` rows. Each call works out once how every field turns into
+    its output: columns the database driver already returns in their final
+    form are copied as-is, foreign keys are converted once per distinct
+    value, and no model instances or bound serializer fields are created
+    per row.
+    """
+
+    def __init__(self, fields=None, expand=()):
+        model_fields = {field.name: field for field in Recipe._meta.concrete_fields}
+        self.fields = []
+        for name, field in RecipeSerializer(fields=fields).fields.items():
+            if not field.write_only:
+                self.fields.append((name, model_fields[field.source], field))
+        self.columns = [model_field.attname for _, model_field, _ in self.fields]
+        # Expanded relations are read through a join in the same query
+        self.expanded = {}
+        for name, model_field, _ in self.fields:
+            if name in expand:
+                related_fields = model_field.related_model._meta
+                self.expanded[name] = [
+                    (key, f'{name}__{key}', related_fields.get_field(key), field)
+                    for key, field in EXPANSIONS[name]().fields.items()
+                ]
+                self.columns.extend(column for _, column, _, _ in self.expanded[name])
+
+    def get_converter(self, model_field, field):
+        """
+        Return the function applying ``field.to_representation()`` to a
+        value of ``model_field`` as returned by the database, or ``None``
+        if that value is already its representation.
+        """
+        if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+            # values() gives the raw key, which is what DRF renders
+            return str if isinstance(model_field.target_field, models.UUIDField) else None
+        if isinstance(field, serializers.UUIDField) and field.uuid_format == 'hex_verbose':
+            return str
+        if type(field) in (serializers.CharField, serializers.EmailField, serializers.URLField, serializers.IntegerField):
+            # str()/int() of the str/int the driver returns
+            return None
+        if type(field) is serializers.DateTimeField and (
+            getattr(field, 'format', api_settings.DATETIME_FORMAT) or ''
+        ).lower() == ISO_8601:
+            return _iso_datetime(field)
+        return field.to_representation
+
+    def compile(self):
+        """
+        Return a function turning a row into its output dict. The
+        ``(output_name, column, converter)`` of every field is worked out
+        once here and specialised by ``_row_converter()``; ``converter`` is
+        ``None`` for values copied as-is, and for an expanded relation
+        ``column`` is the nested tuple.
+        """
+        plan = []
+        for name, model_field, field in self.fields:
+            if name in self.expanded:
+                plan.append((name, tuple(
+                    (key, column, self.get_converter(related_field, nested))
+                    for key, column, related_field, nested in self.expanded[name]
+                ), None))
+                continue
+            convert = self.get_converter(model_field, field)
+            if convert is not None:
+                if model_field.null:
+                    convert = _nullable(convert)
+                if model_field.is_relation:
+                    convert = _Memo(convert).__getitem__
+            plan.append((name, model_field.attname, convert))
+        return _row_converter(plan)
+
+    def values(self, queryset, *extra):
+        """``queryset.values()`` for the columns this serializer needs, plus ``extra``."""
+        return queryset.values(*dict.fromkeys(['id', *self.columns, *extra]))
+
+    def to_representation(self, rows):
+        convert_row = self.compile()
+        return [convert_row(row) for row in rows]
@@ -0,0 +1,48 @@
+from django.db import connections
+from django.db.migrations.recorder import MigrationRecorder
+
+from . import cache, changes, versions
+from .ingredients import index_ingredients
+from .models import RecipeChange
+from .search import install_sqlite_index
+
+
+def reinstall_sqlite_search_index(sender, using, **kwargs):
+    # SQLite drops triggers whenever a migration rebuilds recipe_recipe, so
+    # put the full-text index back after every migrate run.
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return
+    applied = MigrationRecorder(connection).applied_migrations()
+    if ('recipe', '0012_recipe_search_key') in applied:
+        install_sqlite_index(connection)
+
+
+def reindex_recipe_ingredients(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and 'ingredients' not in update_fields):
+        return
+    index_ingredients([instance])
+
+
+def invalidate_cached_recipe(sender, instance, **kwargs):
+    cache.invalidate(instance.pk)
+
+
+def bump_collection_versions(sender, instance, using, **kwargs):
+    versions.bump([instance.owner_id], using=using)
+
+
+def record_recipe_save(sender, instance, created, using, **kwargs):
+    action = RecipeChange.CREATED if created else RecipeChange.UPDATED
+    changes.record([(instance.pk, instance.owner_id, action)], using)
+
+
+def record_owner_deletion(sender, instance, using, **kwargs):
+    changes.record_user_deletion(instance, using)
+
+
+def bump_owner_collection_versions(sender, instance, created, using, update_fields=None, **kwargs):
+    # ?expand=owner embeds the owner's name and email in their recipes
+    if created or (update_fields is not None and not {'name', 'email'} & set(update_fields)):
+        return
+    versions.bump([instance.pk], using=using)
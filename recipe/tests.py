@@ -1,8 +1,37 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import os
+import tempfile
+import time
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import F
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from django.utils import timezone
+from django.utils.http import http_date
 from rest_framework import status
-from rest_framework.test import APIClient
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
 from users.models import CustomUser
-from .models import Recipe
+from . import async_views
+from . import cache as recipe_cache
+from . import changes as recipe_changes
+from .management.commands.import_recipes import Command as ImportCommand
+from .filters import filter_recipes, prefix_range
+from .models import Recipe, RecipeChange, RecipeCollectionVersion, preparation_seconds
+from .pagination import RecipeCursorPagination
+from .serializers import RecipeSerializer, RecipeValuesSerializer
 
 
 class RecipeTests(TestCase):
@@ -255,3 +284,1565 @@ class RecipeTests(TestCase):
         # Attempt to delete the recipe (should fail)
         response = self.client.delete(f"{self.recipes_url}{self.recipe.id}/")
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class RecipePaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(
+            email="pager@example.com",
+            name="Pager",
+            password="testpassword",
+            is_staff=False,
+        )
+        response = self.client.post(
+            "/api/token/",
+            {"email": self.user.email, "password": "testpassword"},
+            format="json",
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {response.data.get('access_token')}"
+        )
+        # Half of the recipes share a timestamp so the pk tie-breaker is exercised
+        created_at = timezone.now()
+        Recipe.objects.bulk_create(
+            Recipe(
+                name=f"Recipe {i}",
+                instructions="Test instructions",
+                ingredients="Test ingredients",
+                owner=self.user,
+                number_of_servings=1,
+                main_image="https://picsum.photos/seed/picsum/200/300",
+                preparation_time="00:10:10",
+                created_at=created_at if i % 2 else created_at - timedelta(minutes=i),
+            )
+            for i in range(7)
+        )
+
+    def test_walk_all_pages(self):
+        seen = []
+        url = "/api/recipes/?page_size=3"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertLessEqual(len(response.data["results"]), 3)
+            seen.extend(recipe["id"] for recipe in response.data["results"])
+            url = response.data["next"]
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(len(set(seen)), 7)
+
+    def test_previous_link_returns_previous_page(self):
+        first = self.client.get("/api/recipes/?page_size=3")
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+        self.assertEqual(
+            [r["id"] for r in back.data["results"]],
+            [r["id"] for r in first.data["results"]],
+        )
+
+    def test_page_size_is_capped(self):
+        with mock.patch.object(RecipeCursorPagination, "max_page_size", 2):
+            response = self.client.get("/api/recipes/?page_size=100")
+        self.assertEqual(len(response.data["results"]), 2)
+
+    def test_large_pages_are_streamed(self):
+        whole = self.client.get("/api/recipes/?page_size=7")
+        self.assertFalse(whole.streaming)
+        with override_settings(JSON_RENDER_CHUNK_SIZE=2):
+            response = self.client.get("/api/recipes/?page_size=7")
+            self.assertTrue(response.streaming)
+            self.assertGreater(len(list(response.streaming_content)), 3)
+            response = self.client.get("/api/recipes/?page_size=7")
+            self.assertEqual(b"".join(response.streaming_content), whole.content)
+            self.assertEqual(response["ETag"], whole["ETag"])
+            # The browsable API and indented JSON are rendered in one piece
+            self.assertFalse(self.client.get("/api/recipes/?page_size=7", HTTP_ACCEPT="text/html").streaming)
+            self.assertFalse(
+                self.client.get("/api/recipes/?page_size=7", HTTP_ACCEPT="application/json; indent=2").streaming
+            )
+
+    async def test_large_pages_are_streamed_by_async_views(self):
+        headers = {"authorization": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+        whole = await AsyncClient().get("/api/recipes/?page_size=7", headers=headers)
+        self.assertFalse(whole.streaming)
+        with override_settings(JSON_RENDER_CHUNK_SIZE=2):
+            response = await AsyncClient().get("/api/recipes/?page_size=7", headers=headers)
+        self.assertTrue(response.streaming)
+        self.assertEqual(b"".join([piece async for piece in response.streaming_content]), whole.content)
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/recipes/?cursor=garbage")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class RecipeSearchTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(
+            email="searcher@example.com",
+            name="Searcher",
+            password="testpassword",
+            is_staff=False,
+        )
+        self.other_user = CustomUser.objects.create_user(
+            email="other@example.com",
+            name="Other",
+            password="testpassword",
+            is_staff=False,
+        )
+        response = self.client.post(
+            "/api/token/",
+            {"email": self.user.email, "password": "testpassword"},
+            format="json",
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {response.data.get('access_token')}"
+        )
+        self.pancakes = self.create_recipe(
+            "Banana Pancakes", "banana, flour, eggs", "Whisk and fry the banana batter."
+        )
+        self.bread = self.create_recipe(
+            "Banana Bread", "banana, flour", "Bake for an hour."
+        )
+        self.soup = self.create_recipe("Tomato Soup", "tomato, salt", "Simmer.")
+        self.create_recipe(
+            "Banana Split", "banana, ice cream", "Split the banana.", owner=self.other_user
+        )
+
+    def create_recipe(self, name, ingredients, instructions, owner=None):
+        return Recipe.objects.create(
+            name=name,
+            instructions=instructions,
+            ingredients=ingredients,
+            owner=owner or self.user,
+            number_of_servings=1,
+            main_image="https://picsum.photos/seed/picsum/200/300",
+            preparation_time="00:10:10",
+        )
+
+    def search(self, query):
+        response = self.client.get("/api/recipes/", {"q": query})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [recipe["id"] for recipe in response.data["results"]]
+
+    def test_search_matches_all_text_fields(self):
+        self.assertEqual(set(self.search("banana")), {str(self.pancakes.id), str(self.bread.id)})
+        self.assertEqual(self.search("simmer"), [str(self.soup.id)])
+        self.assertEqual(self.search("eggs"), [str(self.pancakes.id)])
+
+    def test_search_ranks_more_relevant_first(self):
+        self.assertEqual(self.search("banana")[0], str(self.pancakes.id))
+
+    def test_search_respects_ownership(self):
+        self.assertEqual(self.search("split"), [])
+
+    def test_search_sees_updates_and_deletes(self):
+        self.soup.name = "Gazpacho"
+        self.soup.save()
+        self.assertEqual(self.search("gazpacho"), [str(self.soup.id)])
+        self.soup.delete()
+        self.assertEqual(self.search("gazpacho"), [])
+
+    def test_search_does_not_depend_on_recipe_rowids(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("The full-text index is keyed separately only on SQLite")
+        # Rowids can change under an unchanged row: VACUUM may renumber them
+        # in a table whose primary key is not an integer
+        with connection.cursor() as cursor:
+            cursor.execute("UPDATE recipe_recipe SET rowid = rowid + 1000")
+        self.assertEqual(self.search("simmer"), [str(self.soup.id)])
+        self.soup.instructions = "Blend."
+        self.soup.save()
+        self.assertEqual(self.search("simmer"), [])
+        self.assertEqual(self.search("blend"), [str(self.soup.id)])
+        self.soup.delete()
+        self.assertEqual(self.search("blend"), [])
+
+
+class RecipePantryTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(
+            email="cook@example.com",
+            name="Cook",
+            password="testpassword",
+            is_staff=False,
+        )
+        response = self.client.post(
+            "/api/token/",
+            {"email": self.user.email, "password": "testpassword"},
+            format="json",
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {response.data.get('access_token')}"
+        )
+        self.omelette = self.create_recipe("Omelette", "3 Eggs\n1 tbsp butter\nSalt to taste")
+        self.pancakes = self.create_recipe("Pancakes", "2 cups flour, 2 eggs, 1 cup milk, butter")
+        self.salad = self.create_recipe("Salad", "lettuce; tomatoes (diced); olive oil")
+
+    def create_recipe(self, name, ingredients):
+        return Recipe.objects.create(
+            name=name,
+            instructions="Cook it.",
+            ingredients=ingredients,
+            owner=self.user,
+            number_of_servings=1,
+            main_image="https://picsum.photos/seed/picsum/200/300",
+            preparation_time="00:10:10",
+        )
+
+    def test_ingredients_are_indexed_on_write(self):
+        self.assertEqual(
+            set(self.omelette.ingredient_links.values_list("ingredient__name", flat=True)),
+            {"egg", "butter", "salt"},
+        )
+        self.omelette.ingredients = "eggs, cheese"
+        self.omelette.save()
+        self.omelette.refresh_from_db()
+        self.assertEqual(self.omelette.ingredient_count, 2)
+        self.assertEqual(
+            set(self.omelette.ingredient_links.values_list("ingredient__name", flat=True)),
+            {"egg", "cheese"},
+        )
+
+    def test_ranked_by_coverage(self):
+        response = self.client.get("/api/recipes/pantry/", {"items": "Eggs,butter,SALT,milk"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = [
+            (result["recipe"]["name"], result["matched"], result["missing"])
+            for result in response.data["results"]
+        ]
+        self.assertEqual(results, [("Omelette", 3, 0), ("Pancakes", 3, 1)])
+
+    def test_max_missing(self):
+        response = self.client.get(
+            "/api/recipes/pantry/", {"items": "eggs,butter,salt,milk", "max_missing": 0}
+        )
+        self.assertEqual([r["recipe"]["name"] for r in response.data["results"]], ["Omelette"])
+
+    def test_pantry_requires_items(self):
+        response = self.client.get("/api/recipes/pantry/")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class RecipeCacheTests(TestCase):
+    def setUp(self):
+        caches[recipe_cache.CACHE_ALIAS].clear()
+        self.client = APIClient()
+        self.admin = CustomUser.objects.create_user(
+            email="cacheadmin@example.com",
+            name="Cache Admin",
+            password="testpassword",
+            is_staff=True,
+        )
+        self.owner = CustomUser.objects.create_user(
+            email="cacheowner@example.com",
+            name="Cache Owner",
+            password="testpassword",
+            is_staff=False,
+        )
+        self.recipe = Recipe.objects.create(
+            name="Cached Recipe",
+            instructions="Test instructions",
+            ingredients="Test ingredients",
+            owner=self.owner,
+            number_of_servings=1,
+            main_image="https://picsum.photos/seed/picsum/200/300",
+            preparation_time="00:10:10",
+        )
+        self.url = f"/api/recipes/{self.recipe.id}/"
+
+    def authenticate(self, user):
+        response = self.client.post(
+            "/api/token/",
+            {"email": user.email, "password": "testpassword"},
+            format="json",
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {response.data.get('access_token')}"
+        )
+
+    def test_second_read_is_served_from_cache(self):
+        self.authenticate(self.owner)
+        first = self.client.get(self.url)
+        # Both the payload and the token's user are cached by now; only the
+        # collection version behind the ETag is read
+        with self.assertNumQueries(1):
+            second = self.client.get(self.url)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(json.loads(second.content)["name"], "Cached Recipe")
+
+    def test_cached_payload_still_checks_ownership(self):
+        self.authenticate(self.owner)
+        self.client.get(self.url)
+        other = CustomUser.objects.create_user(
+            email="cacheother@example.com",
+            name="Cache Other",
+            password="testpassword",
+        )
+        self.authenticate(other)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_put_replaces_cached_payload(self):
+        self.authenticate(self.owner)
+        self.client.get(self.url)
+        data = {
+            "name": "Renamed Recipe",
+            "instructions": "Test instructions",
+            "ingredients": "Test ingredients",
+        }
+        self.client.put(self.url, data, format="json")
+        response = self.client.get(self.url)
+        self.assertEqual(json.loads(response.content)["name"], "Renamed Recipe")
+
+    def test_delete_invalidates_cached_payload(self):
+        self.authenticate(self.owner)
+        self.client.get(self.url)
+        self.client.delete(self.url)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_user_delete_invalidates_cached_payloads(self):
+        self.authenticate(self.admin)
+        self.client.get(self.url)
+        self.client.delete(f"/api/users/{self.owner.id}/")
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_replica_reads_are_not_cached(self):
+        recipe = Recipe.objects.get(pk=self.recipe.pk)
+        # As loaded by a safe request routed to a (possibly lagging) replica
+        recipe._state.db = "replica1"
+        payload = recipe_cache.set_payload(recipe, RecipeSerializer(recipe).data)
+        self.assertEqual(json.loads(payload)["name"], "Cached Recipe")
+        self.assertIsNone(recipe_cache.get_payload(recipe.pk))
+
+    def test_cache_stats(self):
+        self.authenticate(self.admin)
+        before = self.client.get("/api/recipes/cache-stats/").data
+        self.client.get(self.url)
+        self.client.get(self.url)
+        after = self.client.get("/api/recipes/cache-stats/").data
+        self.assertEqual(after["misses"] - before["misses"], 1)
+        self.assertEqual(after["hits"] - before["hits"], 1)
+
+    def test_cache_stats_requires_staff(self):
+        self.authenticate(self.owner)
+        response = self.client.get("/api/recipes/cache-stats/")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class RecipeConditionalGetTests(TestCase):
+    def setUp(self):
+        caches[recipe_cache.CACHE_ALIAS].clear()
+        self.client = APIClient()
+        self.admin = CustomUser.objects.create_user(
+            email="etagadmin@example.com", name="ETag Admin", password="testpassword", is_staff=True
+        )
+        self.owner = CustomUser.objects.create_user(
+            email="etagowner@example.com", name="ETag Owner", password="testpassword"
+        )
+        self.other = CustomUser.objects.create_user(
+            email="etagother@example.com", name="ETag Other", password="testpassword"
+        )
+        self.recipe = self.create_recipe("Versioned", self.owner)
+        self.url = f"/api/recipes/{self.recipe.id}/"
+
+    def create_recipe(self, name, owner):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Recipe.objects.create(
+                name=name,
+                instructions="Test instructions",
+                ingredients="eggs",
+                owner=owner,
+                number_of_servings=1,
+                main_image="https://picsum.photos/seed/picsum/200/300",
+                preparation_time="00:10:10",
+            )
+
+    def authenticate(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+    def test_unchanged_list_is_not_modified(self):
+        self.authenticate(self.owner)
+        response = self.client.get("/api/recipes/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+        self.assertRegex(etag, r'^"\d+-[0-9a-f]+"$')
+        self.assertTrue(response.has_header("Last-Modified"))
+        self.assertIn("Authorization", response["Vary"])
+
+        # Only the version is read, not the recipes
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/recipes/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
+        # Every page and filter has its own ETag
+        response = self.client.get("/api/recipes/?page_size=1", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_writes_change_the_etag(self):
+        self.authenticate(self.owner)
+        etag = self.client.get("/api/recipes/")["ETag"]
+        self.create_recipe("Another", self.owner)
+        response = self.client.get("/api/recipes/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 2)
+
+        etag = response["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(self.url, {"name": "Renamed", "instructions": "Mix", "ingredients": "eggs"}, format="json")
+        self.assertEqual(self.client.get("/api/recipes/", HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_other_owners_writes_only_change_the_staff_etag(self):
+        self.authenticate(self.owner)
+        owner_etag = self.client.get("/api/recipes/")["ETag"]
+        self.authenticate(self.admin)
+        admin_etag = self.client.get("/api/recipes/")["ETag"]
+
+        self.create_recipe("Not yours", self.other)
+        response = self.client.get("/api/recipes/", HTTP_IF_NONE_MATCH=admin_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.authenticate(self.owner)
+        response = self.client.get("/api/recipes/", HTTP_IF_NONE_MATCH=owner_etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_is_not_modified_until_deleted(self):
+        self.authenticate(self.owner)
+        response = self.client.get(self.url)
+        etag = response["ETag"]
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        # A fresh Last-Modified works when there is no ETag to compare
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(self.url)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_forbidden_detail_has_no_etag(self):
+        self.authenticate(self.other)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(response.has_header("ETag"))
+
+    def test_preconditions_do_not_hide_missing_or_forbidden_recipes(self):
+        self.create_recipe("Not yours", self.other)
+        missing = f"/api/recipes/{uuid.uuid4()}/"
+        for headers in ({"HTTP_IF_NONE_MATCH": "*"}, {"HTTP_IF_MODIFIED_SINCE": http_date(time.time() + 3600)}):
+            self.authenticate(self.owner)
+            self.assertEqual(self.client.get(missing, **headers).status_code, status.HTTP_404_NOT_FOUND)
+            # Served from the cache, then from the database
+            self.authenticate(self.other)
+            self.client.get(self.url)
+            self.assertEqual(self.client.get(self.url, **headers).status_code, status.HTTP_403_FORBIDDEN)
+            caches[recipe_cache.CACHE_ALIAS].clear()
+            self.assertEqual(self.client.get(self.url, **headers).status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_detail_etag_follows_the_owners_collection(self):
+        self.authenticate(self.admin)
+        etag = self.client.get(self.url)["ETag"]
+        # Staff see every collection, but only the owner's writes change a recipe
+        self.create_recipe("Not yours", self.other)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_bulk_writes_and_user_deletes_bump_versions(self):
+        self.authenticate(self.owner)
+        etag = self.client.get("/api/recipes/")["ETag"]
+        payload = {"create": [{"name": "Bulk", "instructions": "Mix", "ingredients": "eggs"}]}
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post("/api/recipes/bulk/", payload, format="json")
+        response = self.client.get("/api/recipes/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.authenticate(self.admin)
+        etag = self.client.get("/api/recipes/")["ETag"]
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.client.delete(f"/api/users/{self.owner.id}/")
+        # One bump for the whole cascade
+        self.assertEqual(len(callbacks), 1)
+        response = self.client.get("/api/recipes/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"], [])
+
+    def test_versions_are_not_cached_per_process(self):
+        self.authenticate(self.owner)
+        etag = self.client.get("/api/recipes/")["ETag"]
+        # As bumped by another worker, whose caches this one never sees
+        RecipeCollectionVersion.objects.filter(scope=str(self.owner.pk)).update(version=F("version") + 1)
+        response = self.client.get("/api/recipes/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_invalid_parameters_are_not_answered_with_304(self):
+        self.authenticate(self.owner)
+        for params in ({"ordering": "bogus"}, {"fields": "bogus"}, {"ids": "bogus"}, {"min_servings": "-1"}):
+            response = self.client.get("/api/recipes/", params, HTTP_IF_NONE_MATCH="*")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    async def test_async_views(self):
+        headers = {"authorization": f"Bearer {RefreshToken.for_user(self.owner).access_token}"}
+        client = AsyncClient()
+        for url in ("/api/recipes/", self.url):
+            response = await client.get(url, headers=headers)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response = await client.get(url, headers={**headers, "if-none-match": response["ETag"]})
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = await client.get(f"/api/recipes/{uuid.uuid4()}/", headers={**headers, "if-none-match": "*"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = await client.get("/api/recipes/?ordering=bogus", headers={**headers, "if-none-match": "*"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        headers = {"authorization": f"Bearer {RefreshToken.for_user(self.other).access_token}"}
+        response = await client.get(self.url, headers={**headers, "if-none-match": "*"})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class RecipeMultiGetTests(TestCase):
+    def setUp(self):
+        caches[recipe_cache.CACHE_ALIAS].clear()
+        self.client = APIClient()
+        self.admin = CustomUser.objects.create_user(
+            email="multiadmin@example.com", name="Multi Admin", password="testpassword", is_staff=True
+        )
+        self.owner = CustomUser.objects.create_user(
+            email="multiowner@example.com", name="Multi Owner", password="testpassword"
+        )
+        self.other = CustomUser.objects.create_user(
+            email="multiother@example.com", name="Multi Other", password="testpassword"
+        )
+        self.recipes = [self.create_recipe(f"Recipe {i}", self.owner) for i in range(20)]
+        self.other_recipe = self.create_recipe("Not yours", self.other)
+        self.authenticate(self.owner)
+
+    def create_recipe(self, name, owner):
+        return Recipe.objects.create(
+            name=name,
+            instructions="Test instructions",
+            ingredients="eggs",
+            owner=owner,
+            number_of_servings=1,
+            main_image="https://picsum.photos/seed/picsum/200/300",
+            preparation_time="00:10:10",
+        )
+
+    def authenticate(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+    def get(self, ids, **params):
+        return self.client.get("/api/recipes/", {"ids": ",".join(str(pk) for pk in ids), **params})
+
+    def test_found_and_missing_ids_in_request_order(self):
+        missing = "00000000-0000-0000-0000-000000000000"
+        ids = [self.recipes[3].id, self.other_recipe.id, missing, self.recipes[1].id, self.recipes[3].id]
+        response = self.get(ids)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item["id"] for item in response.data["results"]], [str(self.recipes[3].id), str(self.recipes[1].id)]
+        )
+        # Someone else's recipe looks the same as one that does not exist
+        self.assertEqual(response.data["missing"], [str(self.other_recipe.id), missing])
+        self.assertEqual(
+            response.json()["results"][0], json.loads(JSONRenderer().render(RecipeSerializer(self.recipes[3]).data))
+        )
+
+        self.authenticate(self.admin)
+        response = self.get(ids)
+        self.assertEqual(len(response.data["results"]), 3)
+        self.assertEqual(response.data["missing"], [missing])
+
+    def test_one_query_however_many_ids(self):
+        def run(count):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.get([recipe.id for recipe in self.recipes[:count]], fields="id,name")
+            self.assertEqual(len(response.data["results"]), count)
+            self.assertEqual(list(response.data["results"][0]), ["id", "name"])
+            return len(queries)
+
+        run(1)  # warm the authentication user cache
+        # The collection version and the recipes
+        self.assertEqual(run(2), 2)
+        self.assertEqual(run(20), 2)
+
+    def test_invalid_ids(self):
+        self.assertEqual(self.get(["not-a-uuid"]).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get("/api/recipes/", {"ids": ""}).status_code, status.HTTP_400_BAD_REQUEST)
+        with self.settings(RECIPE_MULTI_GET_MAX_IDS=2):
+            response = self.get([recipe.id for recipe in self.recipes[:3]])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_async_multi_get(self):
+        headers = {"authorization": f"Bearer {RefreshToken.for_user(self.owner).access_token}"}
+        ids = f"{self.recipes[0].id},{self.other_recipe.id}"
+        response = await AsyncClient().get("/api/recipes/", {"ids": ids}, headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["id"] for item in response.json()["results"]], [str(self.recipes[0].id)])
+        self.assertEqual(response.json()["missing"], [str(self.other_recipe.id)])
+
+
+class RecipeExpandTests(TestCase):
+    def setUp(self):
+        caches[recipe_cache.CACHE_ALIAS].clear()
+        self.client = APIClient()
+        self.admin = CustomUser.objects.create_user(
+            email="expandadmin@example.com", name="Expand Admin", password="testpassword", is_staff=True
+        )
+        self.owners = [
+            CustomUser.objects.create_user(email=f"cook{i}@example.com", name=f"Cook {i}", password="testpassword")
+            for i in range(4)
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            for i in range(20):
+                Recipe.objects.create(
+                    name=f"Recipe {i}",
+                    instructions="Test instructions",
+                    ingredients="eggs",
+                    owner=self.owners[i % len(self.owners)],
+                    number_of_servings=1,
+                    main_image="https://picsum.photos/seed/picsum/200/300",
+                    preparation_time="00:10:10",
+                )
+        self.recipe = Recipe.objects.filter(owner=self.owners[0]).first()
+        self.url = f"/api/recipes/{self.recipe.id}/"
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.admin).access_token}")
+
+    def owner_of(self, user):
+        return {"id": str(user.id), "name": user.name, "email": user.email}
+
+    def test_list_embeds_owners(self):
+        response = self.client.get("/api/recipes/", {"expand": "owner"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        owners = {str(user.id): self.owner_of(user) for user in self.owners}
+        for item in response.json()["results"]:
+            self.assertEqual(item["owner"], owners[item["owner"]["id"]])
+
+        response = self.client.get("/api/recipes/", {"expand": "owner", "fields": "name,owner"})
+        self.assertEqual(list(response.json()["results"][0]), ["name", "owner"])
+        self.assertIn("email", response.json()["results"][0]["owner"])
+
+    def test_list_query_count_does_not_grow_with_page_size(self):
+        def run(page_size):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get("/api/recipes/", {"expand": "owner", "page_size": page_size})
+            self.assertEqual(len(response.data["results"]), page_size)
+            return len(queries)
+
+        run(1)  # warm the authentication user cache
+        # The collection version and the recipes
+        self.assertEqual(run(2), 2)
+        self.assertEqual(run(20), 2)
+
+    def test_detail_embeds_owner_in_one_query(self):
+        self.client.get(self.url)  # warm the caches
+        # The recipe with its owner, then the collection version
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {"expand": "owner"})
+        self.assertEqual(response.json()["owner"], self.owner_of(self.owners[0]))
+        # The recipe cache only holds plain representations
+        self.assertEqual(self.client.get(self.url).json()["owner"], str(self.owners[0].id))
+
+    def test_owner_renames_change_the_etag(self):
+        etag = self.client.get("/api/recipes/", {"expand": "owner"})["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.owners[0].name = "Renamed"
+            self.owners[0].save()
+        response = self.client.get("/api/recipes/", {"expand": "owner"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_unknown_expansion(self):
+        response = self.client.get("/api/recipes/", {"expand": "ingredients"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {"expand": ""}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_async_views(self):
+        headers = {"authorization": f"Bearer {RefreshToken.for_user(self.admin).access_token}"}
+        client = AsyncClient()
+        response = await client.get(self.url, {"expand": "owner"}, headers=headers)
+        self.assertEqual(response.json()["owner"], self.owner_of(self.owners[0]))
+        response = await client.get("/api/recipes/", {"expand": "owner", "page_size": 3}, headers=headers)
+        self.assertEqual(len(response.json()["results"]), 3)
+        self.assertIn("name", response.json()["results"][0]["owner"])
+
+
+class RecipeChangesFeedTests(TestCase):
+    url = "/api/recipes/changes/"
+
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = CustomUser.objects.create_user(
+            email="feedadmin@example.com", name="Feed Admin", password="testpassword", is_staff=True
+        )
+        self.owner = CustomUser.objects.create_user(
+            email="feedowner@example.com", name="Feed Owner", password="testpassword"
+        )
+        self.other = CustomUser.objects.create_user(
+            email="feedother@example.com", name="Feed Other", password="testpassword"
+        )
+        self.authenticate(self.owner)
+
+    def authenticate(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+    def create_recipe(self, name, owner):
+        return Recipe.objects.create(
+            name=name,
+            instructions="Test instructions",
+            ingredients="eggs",
+            owner=owner,
+            number_of_servings=1,
+            main_image="https://picsum.photos/seed/picsum/200/300",
+            preparation_time="00:10:10",
+        )
+
+    def changes(self, cursor, **params):
+        response = self.client.get(self.url, {"since": cursor, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_feed_returns_writes_after_the_cursor(self):
+        self.create_recipe("Before", self.owner)
+        start = self.client.get(self.url).data
+        self.assertEqual(start["results"], [])
+
+        response = self.client.post(
+            "/api/recipes/", {"name": "New", "instructions": "Mix", "ingredients": "eggs"}, format="json"
+        )
+        recipe_id = response.data["id"]
+        self.client.put(
+            f"/api/recipes/{recipe_id}/", {"name": "Renamed", "instructions": "Mix", "ingredients": "eggs"}, format="json"
+        )
+        self.create_recipe("Not yours", self.other)
+        self.client.delete(f"/api/recipes/{recipe_id}/")
+
+        page = self.changes(start["cursor"])
+        self.assertEqual(
+            [(str(change["recipe"]), change["action"]) for change in page["results"]],
+            [(recipe_id, "created"), (recipe_id, "updated"), (recipe_id, "deleted")],
+        )
+        self.assertFalse(page["has_more"])
+        # Nothing new since the last cursor
+        self.assertEqual(self.changes(page["cursor"])["results"], [])
+
+        self.authenticate(self.admin)
+        self.assertEqual(len(self.changes(start["cursor"])["results"]), 4)
+
+    def test_pages(self):
+        start = self.client.get(self.url).data["cursor"]
+        for i in range(3):
+            self.create_recipe(f"Recipe {i}", self.owner)
+        first = self.changes(start, page_size=2)
+        self.assertEqual(len(first["results"]), 2)
+        self.assertTrue(first["has_more"])
+        second = self.changes(first["cursor"], page_size=2)
+        self.assertEqual(len(second["results"]), 1)
+        self.assertFalse(second["has_more"])
+
+    def test_bulk_writes_and_user_deletes_are_logged(self):
+        recipe = self.create_recipe("Existing", self.owner)
+        start = self.client.get(self.url).data["cursor"]
+        payload = {
+            "create": [{"name": "Bulk", "instructions": "Mix", "ingredients": "eggs"}],
+            "update": [{"id": str(recipe.id), "name": "Bulk rename", "instructions": "Mix", "ingredients": "eggs"}],
+        }
+        self.client.post("/api/recipes/bulk/", payload, format="json")
+        actions = [change["action"] for change in self.changes(start)["results"]]
+        self.assertEqual(actions, ["created", "updated"])
+
+        self.authenticate(self.admin)
+        start = self.client.get(self.url).data["cursor"]
+        with CaptureQueriesContext(connection) as queries:
+            self.client.delete(f"/api/users/{self.owner.id}/")
+        # The cascade is logged with one INSERT, not one per recipe
+        inserts = [q for q in queries if q["sql"].startswith('INSERT INTO "recipe_recipechange"')]
+        self.assertEqual(len(inserts), 1)
+        changes = self.changes(start)["results"]
+        self.assertEqual(len(changes), 2)
+        self.assertEqual({change["action"] for change in changes}, {"deleted"})
+
+    def test_user_delete_does_not_load_recipes(self):
+        for i in range(3):
+            self.create_recipe(f"Recipe {i}", self.owner)
+        self.authenticate(self.admin)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.delete(f"/api/users/{self.owner.id}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Without per-recipe delete receivers the cascade only reads ids
+        self.assertFalse([q for q in queries if '"recipe_recipe"."instructions"' in q["sql"]])
+        self.assertFalse(Recipe.objects.filter(owner_id=self.owner.id).exists())
+        self.assertEqual(RecipeChange.objects.filter(owner_id=self.owner.id, action=RecipeChange.DELETED).count(), 3)
+
+    def test_long_poll_waits_for_a_change(self):
+        start = self.client.get(self.url).data["cursor"]
+        with mock.patch("recipe.changes.time.sleep") as sleep:
+            sleep.side_effect = lambda seconds: self.create_recipe("Arrived", self.owner)
+            page = self.changes(start, wait=5)
+        sleep.assert_called_once_with(1)
+        self.assertEqual([change["action"] for change in page["results"]], ["created"])
+
+        with self.settings(RECIPE_CHANGES_MAX_WAIT=0.01, RECIPE_CHANGES_POLL_INTERVAL=0.005):
+            page = self.changes(page["cursor"], wait=60)
+        self.assertEqual(page["results"], [])
+
+    def test_long_poll_releases_its_connection_while_waiting(self):
+        start = self.client.get(self.url).data["cursor"]
+        with mock.patch("recipe.changes._release") as release, mock.patch("recipe.changes.time.sleep") as sleep:
+            def arrive(seconds):
+                release.assert_called_once_with("default")
+                self.create_recipe("Arrived", self.owner)
+
+            sleep.side_effect = arrive
+            page = self.changes(start, wait=5)
+        self.assertEqual([change["action"] for change in page["results"]], ["created"])
+
+        with mock.patch.object(connection, "close") as close:
+            # Never inside a transaction, such as the test case's
+            recipe_changes._release("default")
+            close.assert_not_called()
+            with mock.patch.object(connection, "in_atomic_block", False):
+                recipe_changes._release("default")
+            close.assert_called_once_with()
+
+    def test_invalid_parameters(self):
+        for params in ({"since": "nope"}, {"since": "0.0", "wait": "-1"}, {"since": "0.0", "wait": "soon"}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_async_long_poll(self):
+        client = AsyncClient()
+        headers = {"authorization": f"Bearer {RefreshToken.for_user(self.owner).access_token}"}
+        start = (await client.get(self.url, headers=headers)).json()["cursor"]
+        await sync_to_async(self.create_recipe)("Async", self.owner)
+        response = await client.get(self.url, {"since": start, "wait": 1}, headers=headers)
+        self.assertEqual([change["action"] for change in response.json()["results"]], ["created"])
+
+        with self.settings(RECIPE_CHANGES_POLL_INTERVAL=0.005):
+            response = await client.get(self.url, {"since": response.json()["cursor"], "wait": 0.01}, headers=headers)
+        self.assertEqual(response.json()["results"], [])
+
+
+class RecipeBulkTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(
+            email="bulk@example.com",
+            name="Bulk",
+            password="testpassword",
+            is_staff=False,
+        )
+        self.other_user = CustomUser.objects.create_user(
+            email="bulkother@example.com",
+            name="Bulk Other",
+            password="testpassword",
+            is_staff=False,
+        )
+        response = self.client.post(
+            "/api/token/",
+            {"email": self.user.email, "password": "testpassword"},
+            format="json",
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {response.data.get('access_token')}"
+        )
+        self.recipe = self.create_recipe("Existing", self.user)
+        self.other_recipe = self.create_recipe("Not Mine", self.other_user)
+
+    def create_recipe(self, name, owner):
+        return Recipe.objects.create(
+            name=name,
+            instructions="Test instructions",
+            ingredients="eggs",
+            owner=owner,
+            number_of_servings=1,
+            main_image="https://picsum.photos/seed/picsum/200/300",
+            preparation_time="00:10:10",
+        )
+
+    def recipe_data(self, name, **extra):
+        return {"name": name, "instructions": "Mix", "ingredients": "flour, milk", **extra}
+
+    def test_bulk_create_update_delete(self):
+        doomed = self.create_recipe("Doomed", self.user)
+        payload = {
+            "create": [self.recipe_data("First"), self.recipe_data("Second")],
+            "update": [self.recipe_data("Renamed", id=str(self.recipe.id))],
+            "delete": [str(doomed.id)],
+        }
+        response = self.client.post("/api/recipes/bulk/", payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([r["name"] for r in response.data["created"]], ["First", "Second"])
+        self.assertEqual(response.data["updated"][0]["name"], "Renamed")
+        self.assertEqual(response.data["deleted"], [str(doomed.id)])
+
+        self.recipe.refresh_from_db()
+        self.assertEqual(self.recipe.name, "Renamed")
+        self.assertFalse(Recipe.objects.filter(pk=doomed.pk).exists())
+        created = Recipe.objects.get(pk=response.data["created"][0]["id"])
+        self.assertEqual(created.owner, self.user)
+        self.assertEqual(created.ingredient_count, 2)
+
+    def test_invalid_item_rejects_whole_batch(self):
+        payload = {
+            "create": [self.recipe_data("Valid"), {"name": "No instructions"}],
+            "update": [self.recipe_data("Stolen", id=str(self.other_recipe.id))],
+        }
+        response = self.client.post("/api/recipes/bulk/", payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["create"][0], {})
+        self.assertIn("instructions", response.data["create"][1])
+        self.assertIn("id", response.data["update"][0])
+        self.assertFalse(Recipe.objects.filter(name="Valid").exists())
+        self.other_recipe.refresh_from_db()
+        self.assertEqual(self.other_recipe.name, "Not Mine")
+
+    def test_body_must_be_an_object(self):
+        for payload in ([], [self.recipe_data("Listed")], "create"):
+            response = self.client.post("/api/recipes/bulk/", payload, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("error", response.data)
+
+    def test_batch_size_limit(self):
+        payload = {"create": [self.recipe_data("Recipe")] * 3}
+        with self.settings(RECIPE_BULK_MAX_ITEMS=2):
+            response = self.client.post("/api/recipes/bulk/", payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_query_count_does_not_grow_with_batch(self):
+        def run(size):
+            payload = {"create": [self.recipe_data(f"Recipe {i}") for i in range(size)]}
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post("/api/recipes/bulk/", payload, format="json")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return len(queries)
+
+        run(1)  # warm the authentication user cache
+        self.assertEqual(run(2), run(20))
+
+
+class RecipeExportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(
+            email="exporter@example.com",
+            name="Exporter",
+            password="testpassword",
+            is_staff=False,
+        )
+        other_user = CustomUser.objects.create_user(
+            email="exportother@example.com",
+            name="Export Other",
+            password="testpassword",
+            is_staff=False,
+        )
+        response = self.client.post(
+            "/api/token/",
+            {"email": self.user.email, "password": "testpassword"},
+            format="json",
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {response.data.get('access_token')}"
+        )
+        for i, owner in enumerate([self.user, self.user, self.user, other_user]):
+            Recipe.objects.create(
+                name=f"Recipe {i}",
+                instructions="Line one\nLine two, with a comma",
+                ingredients="Test ingredients",
+                owner=owner,
+                number_of_servings=1,
+                main_image="https://picsum.photos/seed/picsum/200/300",
+                preparation_time="00:10:10",
+            )
+
+    def test_export_ndjson(self):
+        response = self.client.get("/api/recipes/export/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row["name"] for row in rows], ["Recipe 0", "Recipe 1", "Recipe 2"])
+        self.assertEqual(rows[0]["instructions"], "Line one\nLine two, with a comma")
+
+    def test_export_csv(self):
+        response = self.client.get("/api/recipes/export/", {"type": "csv"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        content = b"".join(response.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1]["name"], "Recipe 1")
+        self.assertEqual(rows[1]["instructions"], "Line one\nLine two, with a comma")
+
+    def test_export_unknown_type(self):
+        response = self.client.get("/api/recipes/export/", {"type": "xml"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_async_export_streams_chunks(self):
+        headers = {"authorization": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+        with self.settings(RECIPE_EXPORT_CHUNK_SIZE=2):
+            for export_type in ("ndjson", "csv"):
+                response = await AsyncClient().get(f"/api/recipes/export/?type={export_type}", headers=headers)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                # Streamed as it is read, not buffered by the ASGI handler
+                self.assertTrue(response.is_async)
+                content = b"".join([line async for line in response.streaming_content]).decode()
+                if export_type == "csv":
+                    rows = list(csv.DictReader(io.StringIO(content)))
+                else:
+                    rows = [json.loads(line) for line in content.splitlines()]
+                self.assertEqual([row["name"] for row in rows], ["Recipe 0", "Recipe 1", "Recipe 2"])
+
+
+class ImportRecipesCommandTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email="importer@example.com",
+            name="Importer",
+            password="testpassword",
+        )
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def write_file(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def jsonl(self, count, invalid=()):
+        lines = []
+        for i in range(count):
+            row = {"name": f"Imported {i}", "instructions": "Cook", "ingredients": "rice, beans"}
+            if i in invalid:
+                del row["instructions"]
+            lines.append(json.dumps(row))
+        return "\n".join(lines) + "\n"
+
+    def run_import(self, path, *args):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command("import_recipes", path, "--owner", self.user.email, *args, stdout=stdout, stderr=stderr)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_imported_rows_are_in_the_change_log(self):
+        path = self.write_file("recipes.jsonl", self.jsonl(3))
+        self.run_import(path, "--batch-size", "2")
+        logged = RecipeChange.objects.filter(owner_id=self.user.pk, action=RecipeChange.CREATED)
+        self.assertEqual(
+            set(logged.values_list("recipe_id", flat=True)),
+            set(Recipe.objects.filter(owner=self.user).values_list("pk", flat=True)),
+        )
+        self.assertEqual(logged.count(), 3)
+
+    def test_import_jsonl(self):
+        path = self.write_file("recipes.jsonl", self.jsonl(5, invalid={2}))
+        stdout, stderr = self.run_import(path, "--batch-size", "2")
+        self.assertEqual(Recipe.objects.filter(owner=self.user).count(), 4)
+        self.assertIn("Line 3", stderr)
+        self.assertIn("rows/s", stdout)
+        recipe = Recipe.objects.get(name="Imported 0")
+        self.assertEqual(recipe.preparation_time, "00:10:10")
+        self.assertEqual(recipe.ingredient_count, 2)
+
+    def test_import_csv(self):
+        path = self.write_file(
+            "recipes.csv",
+            "name,instructions,ingredients,number_of_servings\n"
+            'Soup,"Boil\nthen serve",water,4\n'
+            "Toast,Toast it,bread,\n",
+        )
+        self.run_import(path)
+        self.assertEqual(Recipe.objects.get(name="Soup").instructions, "Boil\nthen serve")
+        self.assertEqual(Recipe.objects.get(name="Soup").number_of_servings, 4)
+        self.assertEqual(Recipe.objects.get(name="Toast").number_of_servings, 1)
+
+    def test_resume_after_crash(self):
+        path = self.write_file("recipes.jsonl", self.jsonl(7))
+        original = ImportCommand.write_batch
+        calls = []
+
+        def crash_on_third_batch(command, batch, *args):
+            calls.append(len(batch))
+            if len(calls) == 3:
+                raise RuntimeError("crash")
+            return original(command, batch, *args)
+
+        with mock.patch.object(ImportCommand, "write_batch", crash_on_third_batch):
+            with self.assertRaises(RuntimeError):
+                self.run_import(path, "--batch-size", "2")
+        self.assertEqual(Recipe.objects.count(), 4)
+
+        stdout, _ = self.run_import(path, "--batch-size", "2")
+        self.assertIn("Resuming", stdout)
+        names = sorted(Recipe.objects.values_list("name", flat=True))
+        self.assertEqual(names, [f"Imported {i}" for i in range(7)])
+
+    def test_unknown_owner(self):
+        path = self.write_file("recipes.jsonl", self.jsonl(1))
+        with self.assertRaises(CommandError):
+            call_command("import_recipes", path, "--owner", "nobody@example.com")
+
+
+class AsyncRecipeViewTests(TestCase):
+    """The recipe endpoints as served through the ASGI entry point."""
+
+    def setUp(self):
+        caches[recipe_cache.CACHE_ALIAS].clear()
+        self.client = AsyncClient()
+        self.admin = CustomUser.objects.create_user(
+            email="asyncadmin@example.com", name="Async Admin", password="testpassword", is_staff=True
+        )
+        self.owner = CustomUser.objects.create_user(
+            email="asyncowner@example.com", name="Async Owner", password="testpassword"
+        )
+        self.other = CustomUser.objects.create_user(
+            email="asyncother@example.com", name="Async Other", password="testpassword"
+        )
+        self.recipe = Recipe.objects.create(
+            name="Async Recipe",
+            instructions="Test instructions",
+            ingredients="flour, eggs",
+            owner=self.owner,
+            number_of_servings=1,
+            main_image="https://picsum.photos/seed/picsum/200/300",
+            preparation_time="00:10:10",
+        )
+        self.url = f"/api/recipes/{self.recipe.id}/"
+
+    def auth(self, user):
+        return {"authorization": f"Bearer {RefreshToken.for_user(user).access_token}"}
+
+    def test_asgi_routes_to_async_views(self):
+        match = resolve(self.url, urlconf="cooky_recipe_apis.asgi_urls")
+        self.assertIs(match.func, async_views.recipe_detail)
+        self.assertIs(resolve("/api/recipes/", urlconf="cooky_recipe_apis.asgi_urls").func, async_views.recipe_list)
+
+    async def test_list_matches_sync_response(self):
+        response = await self.client.get("/api/recipes/", headers=self.auth(self.owner))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item["id"] for item in response.json()["results"]], [str(self.recipe.id)])
+
+        sync_client = APIClient()
+        sync_client.credentials(HTTP_AUTHORIZATION=self.auth(self.owner)["authorization"])
+        sync_response = await sync_to_async(sync_client.get)("/api/recipes/")
+        self.assertEqual(response.content, sync_response.content)
+
+        response = await self.client.get("/api/recipes/", headers=self.auth(self.other))
+        self.assertEqual(response.json()["results"], [])
+
+    async def test_unauthenticated_request_is_rejected(self):
+        response = await self.client.get("/api/recipes/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertTrue(response.has_header("WWW-Authenticate"))
+        response = await self.client.get("/api/recipes/", headers={"authorization": "Bearer nonsense"})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_unsupported_method(self):
+        response = await self.client.patch(self.url, {}, content_type="application/json", headers=self.auth(self.owner))
+        self.assertEqual(response.status_code, status.HTTP_405_METHOD_NOT_ALLOWED)
+
+    async def test_create_recipe(self):
+        response = await self.client.post(
+            "/api/recipes/",
+            {"name": "New", "instructions": "Mix", "ingredients": "flour, sugar, butter"},
+            content_type="application/json",
+            headers=self.auth(self.other),
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        recipe = await Recipe.objects.aget(pk=response.json()["id"])
+        self.assertEqual(recipe.owner_id, self.other.pk)
+        self.assertEqual(recipe.ingredient_count, 3)
+
+        response = await self.client.post(
+            "/api/recipes/", {"name": "Missing fields"}, content_type="application/json", headers=self.auth(self.other)
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_retrieve_recipe(self):
+        response = await self.client.get(self.url, headers=self.auth(self.owner))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["name"], "Async Recipe")
+        # Second request is served from the cache
+        cached = await self.client.get(self.url, headers=self.auth(self.owner))
+        self.assertEqual(cached.content, response.content)
+
+        response = await self.client.get(self.url, headers=self.auth(self.other))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = await self.client.get(self.url, headers=self.auth(self.admin))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = await self.client.get(
+            "/api/recipes/00000000-0000-0000-0000-000000000000/", headers=self.auth(self.owner)
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = await self.client.get("/api/recipes/not-a-uuid/", headers=self.auth(self.owner))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_update_and_delete_recipe(self):
+        payload = {"name": "Renamed", "instructions": "Stir", "ingredients": "rice"}
+        response = await self.client.put(self.url, payload, content_type="application/json", headers=self.auth(self.other))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = await self.client.put(self.url, payload, content_type="application/json", headers=self.auth(self.owner))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["updated_recipe"]["name"], "Renamed")
+        await self.recipe.arefresh_from_db()
+        self.assertEqual(self.recipe.ingredient_count, 1)
+        response = await self.client.get(self.url, headers=self.auth(self.owner))
+        self.assertEqual(response.json()["name"], "Renamed")
+
+        response = await self.client.delete(self.url, headers=self.auth(self.owner))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(await Recipe.objects.filter(pk=self.recipe.pk).aexists())
+
+
+class RecipePreparationTimeTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(
+            email="prep@example.com", name="Prep", password="testpassword"
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+        for i, preparation_time in enumerate(["01:00:00", "00:10:00", "00:45:30", "00:10:00", "00:29:59"]):
+            Recipe.objects.create(
+                name=f"Recipe {i}",
+                instructions="Test instructions",
+                ingredients="Test ingredients",
+                owner=self.user,
+                number_of_servings=1,
+                main_image="https://picsum.photos/seed/picsum/200/300",
+                preparation_time=preparation_time,
+            )
+
+    def test_preparation_seconds(self):
+        self.assertEqual(preparation_seconds("01:02:03"), 3723)
+        self.assertEqual(preparation_seconds("0:90:0"), 5400)
+        self.assertEqual(preparation_seconds("soon"), 0)
+        self.assertEqual(
+            sorted(Recipe.objects.values_list("preparation_seconds", flat=True)),
+            [600, 600, 1799, 2730, 3600],
+        )
+
+    def test_kept_in_sync_on_update(self):
+        recipe = Recipe.objects.get(preparation_time="01:00:00")
+        response = self.client.put(
+            f"/api/recipes/{recipe.pk}/",
+            {"name": "Quick", "instructions": "Fast", "ingredients": "Salt", "preparation_time": "00:05:00"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("preparation_seconds", response.data["updated_recipe"])
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.preparation_seconds, 300)
+
+        recipe.preparation_time = "00:01:00"
+        recipe.save(update_fields=["preparation_time"])
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.preparation_seconds, 60)
+
+    def test_kept_in_sync_on_bulk_create(self):
+        response = self.client.post(
+            "/api/recipes/bulk/",
+            {"create": [{"name": "Bulk", "instructions": "Mix", "ingredients": "Flour", "preparation_time": "00:02:00"}]},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Recipe.objects.get(name="Bulk").preparation_seconds, 120)
+
+    def test_max_prep(self):
+        response = self.client.get("/api/recipes/?max_prep=30")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(r["preparation_time"] for r in response.data["results"]),
+            ["00:10:00", "00:10:00", "00:29:59"],
+        )
+        response = self.client.get("/api/recipes/?max_prep=-1")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("max_prep", response.data)
+
+    def test_ordering_by_prep_time_across_pages(self):
+        seen = []
+        url = "/api/recipes/?ordering=prep_time&page_size=2"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen.extend(r["preparation_time"] for r in response.data["results"])
+            url = response.data["next"]
+        self.assertEqual(seen, ["00:10:00", "00:10:00", "00:29:59", "00:45:30", "01:00:00"])
+
+        response = self.client.get("/api/recipes/?ordering=-prep_time&max_prep=50")
+        self.assertEqual(
+            [r["preparation_time"] for r in response.data["results"]],
+            ["00:45:30", "00:29:59", "00:10:00", "00:10:00"],
+        )
+        response = self.client.get("/api/recipes/?ordering=instructions")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_range_scan_uses_index(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("Plan text is SQLite specific")
+        plan = (
+            Recipe.objects.filter(owner=self.user, preparation_seconds__lte=1800)
+            .order_by("preparation_seconds", "pk")
+            .explain()
+        )
+        self.assertIn("recipe_owner_prep_idx", plan)
+
+
+class RecipeFilterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.admin = CustomUser.objects.create_user(
+            email="filteradmin@example.com", name="Filter Admin", password="testpassword", is_staff=True
+        )
+        self.user = CustomUser.objects.create_user(
+            email="filter@example.com", name="Filter", password="testpassword"
+        )
+        self.other = CustomUser.objects.create_user(
+            email="filterother@example.com", name="Filter Other", password="testpassword"
+        )
+        for owner, name, servings in [
+            (self.user, "Pancakes", 2),
+            (self.user, "Pasta", 4),
+            (self.user, "pad thai", 3),
+            (self.user, "Omelette", 1),
+            (self.other, "Paella", 6),
+        ]:
+            Recipe.objects.create(
+                name=name,
+                instructions="Test instructions",
+                ingredients="Test ingredients",
+                owner=owner,
+                number_of_servings=servings,
+                main_image="https://picsum.photos/seed/picsum/200/300",
+                preparation_time="00:10:10",
+            )
+
+    def login(self, user):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+    def names(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return [recipe["name"] for recipe in response.data["results"]]
+
+    def test_servings_range(self):
+        self.login(self.user)
+        self.assertEqual(self.names("/api/recipes/?min_servings=2&max_servings=3&ordering=servings"), ["Pancakes", "pad thai"])
+        response = self.client.get("/api/recipes/?min_servings=two")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_name_prefix_is_case_sensitive(self):
+        self.login(self.user)
+        self.assertEqual(self.names("/api/recipes/?name=Pa&ordering=name"), ["Pancakes", "Pasta"])
+        self.assertEqual(self.names("/api/recipes/?name=pa&ordering=name"), ["pad thai"])
+        self.assertEqual(self.names("/api/recipes/?name=Pasta"), ["Pasta"])
+
+    def test_name_prefix_ending_in_z(self):
+        for name in ["Pizza", "Pizzoccheri", "Pi{e}", "Pita", "Z\U0010ffff top"]:
+            Recipe.objects.create(
+                name=name,
+                instructions="Test instructions",
+                ingredients="Test ingredients",
+                owner=self.user,
+                number_of_servings=1,
+                main_image="https://picsum.photos/seed/picsum/200/300",
+                preparation_time="00:10:10",
+            )
+        self.login(self.user)
+        self.assertEqual(self.names("/api/recipes/?name=Piz&ordering=name"), ["Pizza", "Pizzoccheri"])
+        response = self.client.get("/api/recipes/", {"name": "Z\U0010ffff"})
+        self.assertEqual([recipe["name"] for recipe in response.data["results"]], ["Z\U0010ffff top"])
+        response = self.client.get("/api/recipes/", {"name": "\U0010ffff"})
+        self.assertEqual(response.data["results"], [])
+
+    def test_prefix_range_is_in_code_point_order(self):
+        self.assertEqual(prefix_range("Piz"), ("Piz", "Pi{"))
+        self.assertEqual(prefix_range("a\U0010ffff\U0010ffff"), ("a\U0010ffff\U0010ffff", "b"))
+        self.assertEqual(prefix_range("\U0010ffff"), ("\U0010ffff", None))
+        self.assertEqual(prefix_range("a\ud7ff"), ("a\ud7ff", "a\ue000"))
+
+    def test_owner_filter_is_staff_only(self):
+        self.login(self.user)
+        response = self.client.get(f"/api/recipes/?owner={self.other.pk}")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.login(self.admin)
+        self.assertEqual(self.names(f"/api/recipes/?owner={self.other.pk}"), ["Paella"])
+        self.assertEqual(self.names(f"/api/recipes/?owner={self.user.pk}&name=Pa&ordering=-name"), ["Pasta", "Pancakes"])
+        response = self.client.get("/api/recipes/?owner=nobody")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_ordering_across_pages(self):
+        self.login(self.user)
+        seen = []
+        url = "/api/recipes/?ordering=-servings&page_size=3"
+        while url:
+            response = self.client.get(url)
+            seen.extend(recipe["name"] for recipe in response.data["results"])
+            url = response.data["next"]
+        self.assertEqual(seen, ["Pasta", "pad thai", "Pancakes", "Omelette"])
+
+    def page_query(self, params):
+        """The exact query recipe_list runs for a non-staff user."""
+        request = Request(APIRequestFactory().get("/api/recipes/", params))
+        request.user = self.user
+        recipes, ordering = filter_recipes(Recipe.objects.filter(owner=self.user), request)
+        paginator = RecipeCursorPagination()
+        if ordering:
+            paginator.ordering = ordering
+        return paginator.get_page_queryset(recipes, request)
+
+    def assertUsesIndex(self, params, index):
+        queryset = self.page_query(params)
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                # The test tables are tiny; make the planner show its indexed plan
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            plan = queryset.explain()
+            self.assertRegex(plan, rf"Index Scan (Backward )?using {index}")
+            self.assertNotIn("Sort", plan)
+        elif connection.vendor == "sqlite":
+            plan = queryset.explain()
+            self.assertIn(f"USING INDEX {index}", plan)
+            self.assertNotIn("TEMP B-TREE", plan)
+        else:
+            self.skipTest(f"No expected plan for {connection.vendor}")
+
+    def test_query_plans(self):
+        self.assertUsesIndex({}, "recipe_owner_created_idx")
+        self.assertUsesIndex({"min_servings": 2, "max_servings": 4, "ordering": "servings"}, "recipe_owner_servings_idx")
+        self.assertUsesIndex({"name": "Pa", "ordering": "name"}, "recipe_owner_name_idx")
+        self.assertUsesIndex({"max_prep": 30, "ordering": "-prep_time"}, "recipe_owner_prep_idx")
+
+
+class RecipeSparseFieldsTests(TestCase):
+    def setUp(self):
+        caches[recipe_cache.CACHE_ALIAS].clear()
+        self.client = APIClient()
+        self.user = CustomUser.objects.create_user(
+            email="fields@example.com", name="Fields", password="testpassword"
+        )
+        self.other = CustomUser.objects.create_user(
+            email="fieldsother@example.com", name="Fields Other", password="testpassword"
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+        for i in range(3):
+            self.recipe = Recipe.objects.create(
+                name=f"Card {i}",
+                instructions="A very long method " * 100,
+                ingredients="flour, eggs, milk",
+                owner=self.user,
+                number_of_servings=1,
+                main_image="https://picsum.photos/seed/picsum/200/300",
+                preparation_time=f"00:{i}0:00",
+            )
+        self.url = f"/api/recipes/{self.recipe.id}/"
+
+    def recipe_selects(self, queries):
+        return [q["sql"] for q in queries if q["sql"].startswith("SELECT") and '"recipe_recipe"' in q["sql"]]
+
+    def test_list_returns_and_loads_only_requested_fields(self):
+        # Warm the user cache so only recipe queries are counted
+        self.client.get("/api/recipes/")
+        with CaptureQueriesContext(connection) as full:
+            self.client.get("/api/recipes/?ordering=prep_time")
+        with CaptureQueriesContext(connection) as sparse:
+            response = self.client.get("/api/recipes/?fields=id,name,main_image&ordering=prep_time&page_size=2")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 2)
+        for recipe in response.data["results"]:
+            self.assertCountEqual(recipe, ["id", "name", "main_image"])
+        # No per-row queries for deferred columns, even to build the cursor
+        self.assertEqual(len(sparse), len(full))
+        for sql in self.recipe_selects(sparse):
+            self.assertNotIn('"instructions"', sql)
+            self.assertNotIn('"ingredients"', sql)
+
+        response = self.client.get(response.data["next"])
+        self.assertEqual([r["name"] for r in response.data["results"]], ["Card 2"])
+
+    def test_unknown_field(self):
+        response = self.client.get("/api/recipes/?fields=name,secret")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("fields", response.data)
+        response = self.client.get(f"{self.url}?fields=")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_detail_bypasses_cache(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"{self.url}?fields=name,preparation_time")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {"name": "Card 2", "preparation_time": "00:20:00"})
+        for sql in self.recipe_selects(queries):
+            self.assertNotIn('"instructions"', sql)
+        self.assertIsNone(recipe_cache.get_payload(self.recipe.id))
+
+        # A full read after a sparse one is still complete
+        response = self.client.get(self.url)
+        self.assertIn("instructions", response.data)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.other).access_token}")
+        response = self.client.get(f"{self.url}?fields=name")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    async def test_async_views(self):
+        client = AsyncClient()
+        headers = {"authorization": f"Bearer {RefreshToken.for_user(self.user).access_token}"}
+        response = await client.get("/api/recipes/?fields=name", headers=headers)
+        self.assertEqual(response.json()["results"], [{"name": "Card 2"}, {"name": "Card 1"}, {"name": "Card 0"}])
+        response = await client.get(f"{self.url}?fields=id,owner", headers=headers)
+        self.assertEqual(response.json(), {"id": str(self.recipe.id), "owner": str(self.user.id)})
+        self.assertIsNone(await recipe_cache.aget_payload(self.recipe.id))
+
+
+class RecipeValuesSerializerTests(TestCase):
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(
+            email="values@example.com", name="Values", password="testpassword"
+        )
+        for name, ingredients in [("Crème brûlée", "cream, sugar"), ("Plain", ""), ('Quote "me"', "\\ back\nslash")]:
+            Recipe.objects.create(
+                name=name,
+                instructions="Step 1\nStep 2",
+                ingredients=ingredients,
+                owner=self.user,
+                number_of_servings=3,
+                main_image="https://picsum.photos/seed/picsum/200/300",
+                preparation_time="00:10:10",
+            )
+
+    def assertSameJSON(self, fields=None):
+        recipes = Recipe.objects.order_by("created_at", "pk")
+        expected = JSONRenderer().render(RecipeSerializer(recipes, many=True, fields=fields).data)
+        serializer = RecipeValuesSerializer(fields=fields)
+        actual = JSONRenderer().render(serializer.to_representation(serializer.values(recipes)))
+        self.assertEqual(actual, expected)
+
+    def test_byte_identical_to_model_serializer(self):
+        self.assertSameJSON()
+        self.assertSameJSON(["name", "owner", "created_at"])
+        self.assertSameJSON(["instructions"])
+        with timezone.override("Asia/Kolkata"):
+            self.assertSameJSON()
+
+    def test_list_endpoint_output_is_unchanged(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+        response = client.get("/api/recipes/")
+        recipes = Recipe.objects.order_by("-created_at", "-pk")
+        self.assertEqual(
+            json.loads(response.content)["results"],
+            json.loads(JSONRenderer().render(RecipeSerializer(recipes, many=True).data)),
+        )
+
+    def test_only_fetches_needed_columns(self):
+        serializer = RecipeValuesSerializer(fields=["name", "owner"])
+        self.assertEqual(serializer.columns, ["name", "owner_id"])
+        self.assertEqual(
+            list(serializer.values(Recipe.objects.all(), "preparation_seconds").query.values_select),
+            ["id", "name", "owner_id", "preparation_seconds"],
+        )
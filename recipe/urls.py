@@ -1,7 +1,14 @@
 from django.urls import path
-from .views import recipe_list, recipe_detail
+from .views import (
+    recipe_list, recipe_detail, recipe_pantry, recipe_cache_stats, recipe_bulk, recipe_export, recipe_changes,
+)
 
 urlpatterns = [
     path('recipes/', recipe_list, name='recipe-list'),
+    path('recipes/bulk/', recipe_bulk, name='recipe-bulk'),
+    path('recipes/export/', recipe_export, name='recipe-export'),
+    path('recipes/changes/', recipe_changes, name='recipe-changes'),
+    path('recipes/pantry/', recipe_pantry, name='recipe-pantry'),
+    path('recipes/cache-stats/', recipe_cache_stats, name='recipe-cache-stats'),
     path('recipes/<str:pk>/', recipe_detail, name='recipe-detail'),
 ]
\ No newline at end of file
@@ -1,13 +1,48 @@
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import status, permissions
+from django.conf import settings
+from django.db.models import Count, F
+from django.http import HttpResponse, StreamingHttpResponse
+from cooky_recipe_apis.renderers import stream_large
 from .models import Recipe
-from .serializers import RecipeSerializer
+from .bulk import BulkRecipeWrite
+from .export import CONTENT_TYPES, STREAMERS
+from .ingredients import normalize_ingredient
+from . import cache as recipe_cache, changes, versions
+from .serializers import EXPANSIONS, RecipeSerializer, RecipeValuesSerializer
+from .filters import ORDERINGS, filter_recipes, load_only, requested_expansions, requested_fields, requested_ids
+from .pagination import RecipeCursorPagination
+from .search import search_recipes
 from .permissions import IsAdminOrReadOnly, IsRecipeOwnerOrAdmin
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
 
+@swagger_auto_schema(
+    method="GET",
+    manual_parameters=[
+        openapi.Parameter("cursor", openapi.IN_QUERY, type=openapi.TYPE_STRING),
+        openapi.Parameter("page_size", openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        openapi.Parameter("q", openapi.IN_QUERY, description="Full-text search", type=openapi.TYPE_STRING),
+        openapi.Parameter("name", openapi.IN_QUERY, description="Name prefix", type=openapi.TYPE_STRING),
+        openapi.Parameter("min_servings", openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        openapi.Parameter("max_servings", openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        openapi.Parameter("owner", openapi.IN_QUERY, description="Owner id (staff only)", type=openapi.TYPE_STRING),
+        openapi.Parameter(
+            "max_prep", openapi.IN_QUERY, description="Maximum preparation time in minutes", type=openapi.TYPE_INTEGER
+        ),
+        openapi.Parameter("ordering", openapi.IN_QUERY, enum=list(ORDERINGS), type=openapi.TYPE_STRING),
+        openapi.Parameter("fields", openapi.IN_QUERY, description="Comma separated fields to return", type=openapi.TYPE_STRING),
+        openapi.Parameter("expand", openapi.IN_QUERY, enum=list(EXPANSIONS), type=openapi.TYPE_STRING),
+        openapi.Parameter(
+            "ids",
+            openapi.IN_QUERY,
+            description="Comma separated recipe ids to fetch in one request; filters and pagination are ignored",
+            type=openapi.TYPE_STRING,
+        ),
+    ],
+)
 @swagger_auto_schema(method="POST", request_body=RecipeSerializer)
 @api_view(["GET", "POST"])
 @permission_classes([permissions.IsAuthenticated])
@@ -20,8 +55,42 @@ def recipe_list(request):
             # If user is not staff, fetch only their own recipes
             recipes = Recipe.objects.filter(owner=request.user)
 
-        serializer = RecipeSerializer(recipes, many=True)
-        return Response(serializer.data)
+        # Validated up front, so a bad request is never answered with 304
+        serializer = RecipeValuesSerializer(fields=requested_fields(request), expand=requested_expansions(request))
+        ids = requested_ids(request)
+        if ids is None:
+            recipes, ordering = filter_recipes(recipes, request)
+
+        # Answered from the collection version, before any recipe is read
+        scope = versions.scope_for(request.user)
+        etag, last_modified = versions.validators(request, scope, *versions.get_version(scope))
+        not_modified = versions.not_modified(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        if ids is not None:
+            # One IN query; the owner filter above does the permission check,
+            # so other users' recipes are reported like missing ones
+            found = {row["id"]: row for row in serializer.values(recipes.filter(pk__in=ids))}
+            response = Response({
+                "results": serializer.to_representation([found[pk] for pk in ids if pk in found]),
+                "missing": [str(pk) for pk in ids if pk not in found],
+            })
+            return stream_large(request, versions.set_validators(response, etag, last_modified))
+
+        paginator = RecipeCursorPagination()
+        query = request.query_params.get("q")
+        if query:
+            recipes = search_recipes(recipes, query)
+            paginator.ordering = "-search_rank"
+        if ordering:
+            paginator.ordering = ordering
+        # Read straight from .values() rows; only the requested columns are fetched
+        recipes = serializer.values(recipes, paginator.ordering.lstrip("-"))
+
+        page = paginator.paginate_queryset(recipes, request)
+        response = paginator.get_paginated_response(serializer.to_representation(page))
+        return stream_large(request, versions.set_validators(response, etag, last_modified))
 
     elif request.method == "POST":
         serializer = RecipeSerializer(data=request.data, context={"request": request})
@@ -31,12 +100,46 @@ def recipe_list(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@swagger_auto_schema(
+    method="GET",
+    manual_parameters=[
+        openapi.Parameter("fields", openapi.IN_QUERY, description="Comma separated fields to return", type=openapi.TYPE_STRING),
+        openapi.Parameter("expand", openapi.IN_QUERY, enum=list(EXPANSIONS), type=openapi.TYPE_STRING),
+    ],
+)
 @swagger_auto_schema(method="PUT", request_body=RecipeSerializer)
 @api_view(["GET", "PUT", "DELETE"])
 @permission_classes([permissions.IsAuthenticated, IsRecipeOwnerOrAdmin])
 def recipe_detail(request, pk):
+    fields = requested_fields(request) if request.method == "GET" else None
+    expand = requested_expansions(request) if request.method == "GET" else ()
+    # The cache only holds full representations
+    use_cache = (
+        request.method == "GET" and fields is None and not expand and request.accepted_renderer.format == "json"
+    )
+    if use_cache:
+        cached = recipe_cache.get_payload(pk)
+        if cached is not None:
+            owner_id, payload = cached
+            if not request.user.is_staff and str(request.user.pk) != owner_id:
+                return Response(
+                    {"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN
+                )
+            etag, last_modified = versions.recipe_validators(request, owner_id)
+            not_modified = versions.not_modified(request, etag, last_modified)
+            if not_modified is not None:
+                return not_modified
+            response = HttpResponse(payload, content_type="application/json")
+            return versions.set_validators(response, etag, last_modified)
+
+    recipes = Recipe.objects.all()
+    if expand:
+        recipes = recipes.select_related(*expand)
+    if fields is not None:
+        # The owner is always needed for the permission check
+        recipes = load_only(recipes, [*fields, "owner"])
     try:
-        recipe = Recipe.objects.get(pk=pk)
+        recipe = recipes.get(pk=pk)
     except Recipe.DoesNotExist:
         return Response({"error": "Recipe not found"}, status=status.HTTP_404_NOT_FOUND)
     except Exception as e:
@@ -48,8 +151,14 @@ def recipe_detail(request, pk):
             return Response(
                 {"error": "Permission denied"}, status=status.HTTP_403_FORBIDDEN
             )
-        serializer = RecipeSerializer(recipe)
-        return Response(serializer.data)
+        etag, last_modified = versions.recipe_validators(request, recipe.owner_id)
+        not_modified = versions.not_modified(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        serializer = RecipeSerializer(recipe, fields=fields, expand=expand)
+        if use_cache:
+            recipe_cache.set_payload(recipe, serializer.data)
+        return versions.set_validators(Response(serializer.data), etag, last_modified)
 
     elif request.method == "PUT":
         # Check if the user is a staff member or the owner of the recipe
@@ -61,6 +170,7 @@ def recipe_detail(request, pk):
         serializer = RecipeSerializer(recipe, data=request.data)
         if serializer.is_valid():
             serializer.save()
+            recipe_cache.set_payload(recipe, serializer.data)
             return Response(
                 {"message": "Successfully updated", "updated_recipe": serializer.data}
             )
@@ -75,3 +185,150 @@ def recipe_detail(request, pk):
 
         recipe.delete()
         return Response({"message": "Successfully deleted"}, status=status.HTTP_200_OK)
+
+
+@swagger_auto_schema(
+    method="GET",
+    manual_parameters=[
+        openapi.Parameter(
+            "items", openapi.IN_QUERY, description="Comma separated pantry items", type=openapi.TYPE_STRING, required=True
+        ),
+        openapi.Parameter("max_missing", openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+        openapi.Parameter("page_size", openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+    ],
+)
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def recipe_pantry(request):
+    items = {normalize_ingredient(item) for item in request.query_params.get("items", "").split(",")}
+    items.discard("")
+    if not items:
+        return Response({"error": "Provide at least one pantry item"}, status=status.HTTP_400_BAD_REQUEST)
+
+    if request.user.is_staff:
+        recipes = Recipe.objects.all()
+    else:
+        recipes = Recipe.objects.filter(owner=request.user)
+
+    # The join through the ingredient index does the set intersection; counting
+    # the surviving links gives the number of pantry items each recipe uses.
+    recipes = (
+        recipes.filter(ingredient_links__ingredient__name__in=items)
+        .annotate(matched=Count("ingredient_links"))
+        .annotate(missing=F("ingredient_count") - F("matched"))
+        .order_by("missing", "-matched", "pk")
+    )
+    max_missing = request.query_params.get("max_missing")
+    if max_missing is not None:
+        if not max_missing.isdigit():
+            return Response({"error": "max_missing must be a non-negative integer"}, status=status.HTTP_400_BAD_REQUEST)
+        recipes = recipes.filter(missing__lte=int(max_missing))
+
+    page_size = RecipeCursorPagination().get_page_size(request)
+    results = [
+        {"recipe": RecipeSerializer(recipe).data, "matched": recipe.matched, "missing": recipe.missing}
+        for recipe in recipes[:page_size]
+    ]
+    return Response({"items": sorted(items), "results": results})
+
+
+@swagger_auto_schema(
+    method="GET",
+    manual_parameters=[
+        openapi.Parameter(
+            "since", openapi.IN_QUERY, description="Cursor from the previous response", type=openapi.TYPE_STRING
+        ),
+        openapi.Parameter(
+            "wait", openapi.IN_QUERY, description="Seconds to wait for a change when there is none", type=openapi.TYPE_NUMBER
+        ),
+        openapi.Parameter("page_size", openapi.IN_QUERY, type=openapi.TYPE_INTEGER),
+    ],
+)
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def recipe_changes(request):
+    since = request.query_params.get("since")
+    try:
+        cursor = changes.decode_cursor(since) if since else None
+        wait = changes.parse_wait(request.query_params.get("wait"))
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if cursor is None:
+        # Start of a sync: take the cursor first, then fetch the full list
+        return Response({"results": [], "cursor": changes.head(request.user), "has_more": False})
+    page_size = RecipeCursorPagination().get_page_size(request)
+    return Response(changes.poll(request.user, cursor, page_size, wait))
+
+
+@api_view(["GET"])
+@permission_classes([permissions.IsAdminUser])
+def recipe_cache_stats(request):
+    return Response(recipe_cache.get_stats())
+
+
+@swagger_auto_schema(
+    method="POST",
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        properties={
+            "create": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
+            "update": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_OBJECT)),
+            "delete": openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING)),
+        },
+    ),
+)
+@api_view(["POST"])
+@permission_classes([permissions.IsAuthenticated])
+def recipe_bulk(request):
+    if not isinstance(request.data, dict):
+        return Response(
+            {"error": "Expected an object with create, update and delete lists"}, status=status.HTTP_400_BAD_REQUEST
+        )
+    operations = {}
+    for operation in ("create", "update", "delete"):
+        items = request.data.get(operation, [])
+        if not isinstance(items, list):
+            return Response({operation: ["Expected a list of items."]}, status=status.HTTP_400_BAD_REQUEST)
+        operations[operation] = items
+
+    total = sum(len(items) for items in operations.values())
+    if total > settings.RECIPE_BULK_MAX_ITEMS:
+        return Response(
+            {"error": f"A bulk request may contain at most {settings.RECIPE_BULK_MAX_ITEMS} items"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    bulk = BulkRecipeWrite(request.user, **operations)
+    if not bulk.is_valid():
+        return Response(bulk.errors, status=status.HTTP_400_BAD_REQUEST)
+    return Response(bulk.save(), status=status.HTTP_200_OK)
+
+
+@swagger_auto_schema(
+    method="GET",
+    manual_parameters=[
+        openapi.Parameter("type", openapi.IN_QUERY, enum=list(STREAMERS), default="ndjson", type=openapi.TYPE_STRING),
+    ],
+)
+@api_view(["GET"])
+@permission_classes([permissions.IsAuthenticated])
+def recipe_export(request):
+    export_type = request.query_params.get("type", "ndjson")
+    if export_type not in STREAMERS:
+        return Response(
+            {"error": f"type must be one of: {', '.join(STREAMERS)}"}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if request.user.is_staff:
+        recipes = Recipe.objects.all()
+    else:
+        recipes = Recipe.objects.filter(owner=request.user)
+    recipes = recipes.order_by("created_at", "pk")
+
+    response = StreamingHttpResponse(
+        STREAMERS[export_type](recipes, settings.RECIPE_EXPORT_CHUNK_SIZE),
+        content_type=CONTENT_TYPES[export_type],
+    )
+    response["Content-Disposition"] = f'attachment; filename="recipes.{export_type}"'
+    return response
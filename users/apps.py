@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class UserConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from .models import CustomUser
+        from .signals import invalidate_cached_user
+
+        post_save.connect(invalidate_cached_user, sender=CustomUser)
+        post_delete.connect(invalidate_cached_user, sender=CustomUser)
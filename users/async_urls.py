@@ -0,0 +1,17 @@
+# users/async_urls.py
+from django.urls import path
+
+from . import async_views
+from .urls import urlpatterns as sync_urlpatterns
+
+ASYNC_VIEWS = {
+    'register-user': async_views.register_user,
+    'token-obtain': async_views.obtain_token,
+    'list-users': async_views.list_users,
+    'manage-user': async_views.manage_user,
+}
+
+urlpatterns = [
+    path(str(pattern.pattern), ASYNC_VIEWS.get(pattern.name, pattern.callback), name=pattern.name)
+    for pattern in sync_urlpatterns
+]
@@ -0,0 +1,80 @@
+# users/async_views.py
+from asgiref.sync import sync_to_async
+from rest_framework import permissions, status
+from rest_framework.response import Response
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from cooky_recipe_apis.async_api import async_api_view
+
+from .hashing import aauthenticate, amake_password
+from .models import CustomUser
+from .serializers import CustomUserSerializer
+
+
+@async_api_view(["POST"], [permissions.AllowAny])
+async def obtain_token(request):
+    email = request.data.get("email")
+    password = request.data.get("password")
+    if email is None or password is None:
+        return Response({"error": "Please provide both email and password"},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    user = await aauthenticate(email, password)
+    if user is None:
+        return Response({"error": "Invalid credentials"},
+                        status=status.HTTP_401_UNAUTHORIZED)
+
+    refresh = RefreshToken.for_user(user)
+    return Response({"access_token": str(refresh.access_token)}, status=status.HTTP_200_OK)
+
+
+@async_api_view(["POST"], [permissions.AllowAny])
+async def register_user(request):
+    serializer = CustomUserSerializer(data=request.data)
+    # Validation checks email uniqueness against the database
+    if not await sync_to_async(serializer.is_valid)():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    validated_data = serializer.validated_data
+    serializer.instance = await CustomUser.objects.acreate(
+        email=validated_data["email"],
+        name=validated_data["name"],
+        is_staff=validated_data.get("is_staff", False),
+        password=await amake_password(validated_data["password"]),
+    )
+    return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+@async_api_view(["GET"], [permissions.IsAdminUser])
+async def list_users(request):
+    users = [user async for user in CustomUser.objects.all()]
+    serializer = CustomUserSerializer(users, many=True)
+    return Response(serializer.data)
+
+
+@async_api_view(["GET", "PUT", "DELETE"], [permissions.IsAdminUser])
+async def manage_user(request, user_id):
+    try:
+        user = await CustomUser.objects.aget(pk=user_id)
+    except CustomUser.DoesNotExist:
+        return Response({"error": "User not found"},
+                        status=status.HTTP_404_NOT_FOUND)
+    except Exception as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    if request.method == "GET":
+        serializer = CustomUserSerializer(user)
+        return Response(serializer.data)
+
+    if request.method == "PUT":
+        serializer = CustomUserSerializer(user, data=request.data, partial=True)
+        if await sync_to_async(serializer.is_valid)():
+            # Same field assignment as ModelSerializer.update()
+            for name, value in serializer.validated_data.items():
+                setattr(user, name, value)
+            await user.asave()
+            return Response({"message": "Successfully updated", "updated_user": serializer.data})
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    await user.adelete()
+    return Response({"message": "Successfully deleted"}, status=status.HTTP_200_OK)
@@ -0,0 +1,12 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+    Django's PBKDF2-SHA256 hasher with the iteration count taken from the
+    PASSWORD_HASH_ITERATIONS setting. It keeps the ``pbkdf2_sha256``
+    algorithm name, so existing hashes still verify and get rehashed on the
+    next login when the setting changes.
+    """
+    iterations = settings.PASSWORD_HASH_ITERATIONS or hashers.PBKDF2PasswordHasher.iterations
@@ -0,0 +1,58 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, get_hasher, identify_hasher, make_password
+
+from .authentication import user_cache
+
+_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix='password-hash')
+
+
+async def run_in_pool(func, *args):
+    """
+    Run a CPU-bound hashing call on the bounded hashing pool. hashlib drops
+    the GIL while hashing, so the event loop keeps serving other requests.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, functools.partial(func, *args))
+
+
+def needs_rehash(encoded):
+    preferred = get_hasher('default')
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
+
+
+async def aauthenticate(email, password):
+    """
+    Async equivalent of ``authenticate(email=..., password=...)`` with the
+    default ModelBackend, hashing on the pool instead of the request thread.
+    """
+    User = get_user_model()
+    try:
+        user = await User._default_manager.aget(**{User.USERNAME_FIELD: email})
+    except User.DoesNotExist:
+        # Hash anyway so unknown emails take as long as wrong passwords
+        await run_in_pool(make_password, password)
+        return None
+
+    if not await run_in_pool(check_password, password, user.password):
+        return None
+    if not user.is_active:
+        return None
+
+    if needs_rehash(user.password):
+        user.password = await run_in_pool(make_password, password)
+        await User._default_manager.filter(pk=user.pk).aupdate(password=user.password)
+        user_cache.invalidate(user.pk)
+    return user
+
+
+async def amake_password(password):
+    return await run_in_pool(make_password, password)
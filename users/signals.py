@@ -0,0 +1,7 @@
+from .authentication import user_cache
+
+
+def invalidate_cached_user(sender, instance, **kwargs):
+    # Covers profile edits from manage_user as well as is_active, is_staff
+    # and password changes made anywhere else.
+    user_cache.invalidate(instance.pk)
@@ -1,7 +1,10 @@
-from django.test import TestCase
+from django.contrib.auth.hashers import make_password
+from django.test import AsyncClient, TestCase, override_settings
 from rest_framework import status
 from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import get_user_model
+from .authentication import UserCache
 
 User = get_user_model()
 
@@ -282,3 +285,207 @@ class NonStaffUserTests(TestCase):
         # Attempt to fetch the list of users
         response = self.client.get(self.users_url)
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.users_url = "/api/users/"
+        self.admin_user = User.objects.create_user(
+            email="cacheadmin@example.com", name="Cache Admin", password="test123", is_staff=True
+        )
+        self.user = User.objects.create_user(
+            email="cacheuser@example.com", name="Cache User", password="test123"
+        )
+
+    def get_access_token(self, user):
+        response = self.client.post(
+            "/api/token/",
+            {"email": user.email, "password": "test123"},
+            format="json",
+        )
+        return response.data.get("access_token")
+
+    def test_user_is_resolved_from_cache(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.get_access_token(self.user)}")
+        self.client.get("/api/recipes/")
+        # Only the collection version and the recipe page queries remain
+        with self.assertNumQueries(2):
+            response = self.client.get("/api/recipes/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_staff_change_through_manage_user_takes_effect(self):
+        user_token = self.get_access_token(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {user_token}")
+        self.assertEqual(self.client.get(self.users_url).status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.get_access_token(self.admin_user)}")
+        self.client.put(f"{self.users_url}{self.user.id}/", {"is_staff": True}, format="json")
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {user_token}")
+        self.assertEqual(self.client.get(self.users_url).status_code, status.HTTP_200_OK)
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.get_access_token(self.user)}")
+        self.assertEqual(self.client.get("/api/recipes/").status_code, status.HTTP_200_OK)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/recipes/").status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_user_is_rejected(self):
+        user_token = self.get_access_token(self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {user_token}")
+        self.client.get("/api/recipes/")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.get_access_token(self.admin_user)}")
+        self.client.delete(f"{self.users_url}{self.user.id}/")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {user_token}")
+        self.assertEqual(self.client.get("/api/recipes/").status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_cache_is_bounded(self):
+        cache = UserCache(max_size=2, ttl=60)
+        for user_id in ("a", "b", "c"):
+            cache.set(user_id, self.user)
+        self.assertIsNone(cache.get("a"))
+        self.assertIsNotNone(cache.get("c"))
+
+    def test_cache_entries_expire(self):
+        cache = UserCache(max_size=2, ttl=0)
+        cache.set("a", self.user)
+        self.assertIsNone(cache.get("a"))
+
+
+class AsyncAuthenticationTests(TestCase):
+    """Login and registration as served through the ASGI entry point."""
+
+    def setUp(self):
+        self.client = AsyncClient()
+        self.user = User.objects.create_user(
+            email="asyncuser@example.com", name="Async User", password="test123"
+        )
+
+    async def test_obtain_token(self):
+        response = await self.client.post(
+            "/api/token/",
+            {"email": "asyncuser@example.com", "password": "test123"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue("access_token" in response.json())
+
+    async def test_obtain_token_invalid_credentials(self):
+        response = await self.client.post(
+            "/api/token/",
+            {"email": "asyncuser@example.com", "password": "wrong"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = await self.client.post(
+            "/api/token/",
+            {"email": "nobody@example.com", "password": "test123"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    async def test_obtain_token_missing_fields(self):
+        response = await self.client.post(
+            "/api/token/", {"email": "asyncuser@example.com"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_register_user(self):
+        response = await self.client.post(
+            "/api/register/",
+            {"email": "asyncnew@example.com", "name": "Async New", "password": "test123"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        user = await User.objects.aget(email="asyncnew@example.com")
+        self.assertTrue(user.check_password("test123"))
+
+        response = await self.client.post(
+            "/api/register/",
+            {"email": "asyncnew@example.com", "name": "Async New", "password": "test123"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue("email" in response.json())
+
+    @override_settings(PASSWORD_HASHERS=[
+        "users.hashers.PBKDF2PasswordHasher",
+        "django.contrib.auth.hashers.MD5PasswordHasher",
+    ])
+    async def test_login_rehashes_outdated_password(self):
+        self.user.password = make_password("test123", hasher="md5")
+        await self.user.asave()
+        response = await self.client.post(
+            "/api/token/",
+            {"email": "asyncuser@example.com", "password": "test123"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        await self.user.arefresh_from_db()
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$"))
+
+
+class AsyncUserViewTests(TestCase):
+    """User management as served through the ASGI entry point."""
+
+    def setUp(self):
+        self.client = AsyncClient()
+        self.admin_user = User.objects.create_user(
+            email="asyncadmin@example.com", name="Async Admin", password="test123", is_staff=True
+        )
+        self.user = User.objects.create_user(
+            email="asyncmember@example.com", name="Async Member", password="test123"
+        )
+        self.user_url = f"/api/users/{self.user.id}/"
+
+    def auth(self, user):
+        return {"authorization": f"Bearer {RefreshToken.for_user(user).access_token}"}
+
+    async def test_list_users(self):
+        response = await self.client.get("/api/users/", headers=self.auth(self.admin_user))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()), 2)
+
+        response = await self.client.get("/api/users/", headers=self.auth(self.user))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    async def test_fetch_user(self):
+        response = await self.client.get(self.user_url, headers=self.auth(self.admin_user))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["email"], "asyncmember@example.com")
+
+        response = await self.client.get(
+            "/api/users/00000000-0000-0000-0000-000000000000/", headers=self.auth(self.admin_user)
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = await self.client.get("/api/users/invalid/", headers=self.auth(self.admin_user))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    async def test_update_user(self):
+        response = await self.client.put(
+            self.user_url, {"name": "Renamed"}, content_type="application/json", headers=self.auth(self.admin_user)
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["updated_user"]["name"], "Renamed")
+
+        response = await self.client.put(
+            self.user_url,
+            {"email": "asyncadmin@example.com"},
+            content_type="application/json",
+            headers=self.auth(self.admin_user),
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertTrue("email" in response.json())
+
+    async def test_delete_user(self):
+        response = await self.client.delete(self.user_url, headers=self.auth(self.user))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        response = await self.client.delete(self.user_url, headers=self.auth(self.admin_user))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(await User.objects.filter(pk=self.user.pk).aexists())
+        # The deleted user's token stops working straight away
+        response = await self.client.get("/api/recipes/", headers=self.auth(self.user))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)